@@ -8,6 +8,9 @@ from alembic import context
 
 # Import All Models
 from app.models.user import *
+from app.models.email_outbox import *
+from app.models.vehicle import *
+from app.models.telemetry import *
 
 from app.config.settings import get_settings
 settings = get_settings()
@@ -1,23 +1,111 @@
+import inspect
+from functools import lru_cache
 from app.config.settings import get_settings
-from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import Generator
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncGenerator, Callable, Union
 from sqlalchemy import create_engine
+from app.config.metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URI,
-                       pool_pre_ping=True,
-                       pool_recycle=3600,
-                       pool_size=20,
-                       max_overflow=0)
+def get_pool_limits(workers: int = None) -> dict:
+    """
+    Pool arguments for one worker: DB_MAX_CONNECTIONS is split evenly across the
+    WEB_CONCURRENCY workers, and DB_POOL_SIZE / DB_MAX_OVERFLOW are capped to that share.
+    """
+    share = max(1, settings.DB_MAX_CONNECTIONS // max(1, workers or settings.WEB_CONCURRENCY))
+    max_overflow = max(0, min(settings.DB_MAX_OVERFLOW, share - 1))
+    return {
+        "pool_size": max(1, min(settings.DB_POOL_SIZE, share - max_overflow)),
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
 
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# Services accept either session flavour, see `maybe_await`.
+DBSession = Union[Session, AsyncSession]
+
+
+@lru_cache()
+def get_engine():
+    # Built on first use, so importing the app (CLI tools, tests, workers) does not
+    # load the database driver or size a pool it may never use.
+    engine = create_engine(settings.DATABASE_URI,
+                           poolclass=InstrumentedQueuePool,
+                           pool_pre_ping=True,
+                           **get_pool_limits())
+    return instrument_engine(engine)
+
+
+@lru_cache()
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(bind=get_engine(), autocommit=False, autoflush=False)
+
+
+def __getattr__(name):
+    # `engine` and `SessionLocal` stay importable from here, built on first access.
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache()
+def get_async_engine():
+    # Built on first use so the async driver is only required when DB_ASYNC is on.
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URI,
+                                       poolclass=InstrumentedAsyncQueuePool,
+                                       pool_pre_ping=True,
+                                       **get_pool_limits())
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
 
-def get_session() -> Generator:
-    session = SessionLocal()
+@lru_cache()
+def get_async_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def dispose_engines():
+    """Closes pooled connections on shutdown, so a draining worker releases its share at once."""
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+
+
+async def get_session() -> AsyncGenerator:
+    if settings.DB_ASYNC:
+        async with get_async_sessionmaker()() as session:
+            yield session
+        return
+
+    session = get_sessionmaker()()
     try:
         yield session
     finally:
         session.close()
+
+
+async def maybe_await(value):
+    """
+    Awaits `value` when it was returned by an AsyncSession method.
+
+    Lets the same service code run on the blocking and the async session, so the
+    DB_ASYNC switch can be benchmarked without maintaining two code paths.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def run_sync(session: DBSession, fn: Callable, *args):
+    """Runs `fn(sync_session, *args)`, bridging through `AsyncSession.run_sync` when needed."""
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args)
+    return fn(session, *args)
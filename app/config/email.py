@@ -1,35 +1,80 @@
 import os
-from pathlib import Path
-from fastapi_mail import FastMail, MessageSchema, MessageType, ConnectionConfig
+from functools import lru_cache
 from fastapi.background import BackgroundTasks
 from app.config.settings import get_settings
+from app.config.templates import TEMPLATE_FOLDER, render_template
 
 settings = get_settings()
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.environ.get("MAIL_USERNAME", ""),
-    MAIL_PASSWORD=os.environ.get("MAIL_PASSWORD", ""),
-    MAIL_PORT=os.environ.get("MAIL_PORT", 1025),
-    MAIL_SERVER=os.environ.get("MAIL_SERVER", "smtp"),
-    MAIL_STARTTLS=os.environ.get("MAIL_STARTTLS", False),
-    MAIL_SSL_TLS=os.environ.get("MAIL_SSL_TLS", False),
-    MAIL_DEBUG=True,
-    MAIL_FROM=os.environ.get("MAIL_FROM", 'noreply@test.com'),
-    MAIL_FROM_NAME=os.environ.get("MAIL_FROM_NAME", settings.APP_NAME),
-    TEMPLATE_FOLDER=Path(__file__).parent.parent / "templates",
-    USE_CREDENTIALS=os.environ.get("USE_CREDENTIALS", True)
-)
 
-fm = FastMail(conf)
+@lru_cache()
+def get_fastmail():
+    """
+    Returns the shared FastMail client, built on first use.
+
+    fastapi_mail pulls in httpx, redis and the email validators, which dominate the
+    import time of the app, so it is only loaded once a message is actually sent.
+    """
+    from fastapi_mail import ConnectionConfig, FastMail
+    conf = ConnectionConfig(
+        MAIL_USERNAME=os.environ.get("MAIL_USERNAME", ""),
+        MAIL_PASSWORD=os.environ.get("MAIL_PASSWORD", ""),
+        MAIL_PORT=os.environ.get("MAIL_PORT", 1025),
+        MAIL_SERVER=os.environ.get("MAIL_SERVER", "smtp"),
+        MAIL_STARTTLS=os.environ.get("MAIL_STARTTLS", False),
+        MAIL_SSL_TLS=os.environ.get("MAIL_SSL_TLS", False),
+        MAIL_DEBUG=True,
+        MAIL_FROM=os.environ.get("MAIL_FROM", 'noreply@test.com'),
+        MAIL_FROM_NAME=os.environ.get("MAIL_FROM_NAME", settings.APP_NAME),
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+        USE_CREDENTIALS=os.environ.get("USE_CREDENTIALS", True)
+    )
+    return FastMail(conf)
+
+
+def __getattr__(name):
+    # `fm` and `conf` stay importable from here, built on first access.
+    if name == "fm":
+        return get_fastmail()
+    if name == "conf":
+        return get_fastmail().config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def send_email(recipients: list, subject: str, context: dict, template_name: str,
-                     background_tasks: BackgroundTasks):
+                     background_tasks: BackgroundTasks, session=None):
+    """
+    With the outbox enabled and a `session`, the message is only added to that session:
+    the caller commits it together with the change it announces, so neither is kept
+    without the other.
+    """
+    if settings.EMAIL_OUTBOX_ENABLED and session is not None:
+        # Persisted and delivered by the outbox worker, see app.services.email_outbox.
+        from app.models.email_outbox import EmailOutbox
+        session.add(EmailOutbox(recipients=recipients, subject=subject,
+                                template_name=template_name, context=context))
+        return
+
+    from fastapi_mail import MessageSchema, MessageType
     message = MessageSchema(
         subject=subject,
         recipients=recipients,
-        template_body=context,
+        body=render_template(template_name, context),
         subtype=MessageType.html
     )
 
-    background_tasks.add_task(fm.send_message, message, template_name=template_name)
+    background_tasks.add_task(get_fastmail().send_message, message)
+
+
+async def send_emails(messages: list, background_tasks: BackgroundTasks, session=None):
+    """
+    Queues several messages (dicts of `send_email` arguments), e.g. for bulk imports;
+    like `send_email`, the caller commits the outbox rows.
+    """
+    if settings.EMAIL_OUTBOX_ENABLED and session is not None:
+        from app.models.email_outbox import EmailOutbox
+        session.add_all(EmailOutbox(**message) for message in messages)
+        return
+
+    for message in messages:
+        await send_email(background_tasks=background_tasks, **message)
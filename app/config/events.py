@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable, Iterable, Optional
+
+import orjson
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+DROPPED = "events.dropped"
+
+
+class Subscriber:
+    """
+    One connected dashboard: a bounded queue of the events addressed to it.
+
+    A subscriber that falls `queue_size` events behind is either sent a
+    `events.dropped` notice in place of the oldest events, telling the client to
+    refetch ("drop_oldest"), or disconnected ("disconnect"), see EVENTS_SLOW_CONSUMER.
+    """
+
+    def __init__(self, user_id: int, is_admin: bool, queue_size: int, policy: str):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.policy = policy
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+        self.total_dropped = 0
+        self.overflowed = False
+        self._held = None
+
+    def wants(self, event: dict) -> bool:
+        return (self.is_admin and event["admins"]) or self.user_id in event["users"]
+
+    def offer(self, event: dict):
+        if self.queue.full():
+            if self.policy == "disconnect":
+                self.overflowed = True
+                return
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.total_dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Optional[dict]:
+        """Returns the next event, a drop notice if events were lost, or None once disconnected."""
+        if self._held is not None:
+            event, self._held = self._held, None
+            return event
+        event = await self.queue.get()
+        if self.overflowed:
+            return None
+        if self.dropped:
+            # The notice goes first, so the client refetches before applying newer events.
+            self._held = event
+            dropped, self.dropped = self.dropped, 0
+            return {"id": event["id"], "type": DROPPED, "data": {"count": dropped}}
+        return event
+
+
+class MemoryBackend:
+    """Delivers events to the subscribers of this process only."""
+
+    def __init__(self):
+        self._deliver = None
+
+    async def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+
+    async def publish(self, event: dict):
+        self._deliver(event)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Publishes events on a Redis channel that every worker listens to, so a change
+    made on one worker reaches dashboards connected to any of them.
+
+    `client` is a `redis.asyncio.Redis` (or fakeredis) instance.
+    """
+
+    def __init__(self, client, channel: str):
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+        self._task = None
+
+    async def start(self, deliver: Callable[[dict], None]):
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Callable[[dict], None]):
+        async for message in self._pubsub.listen():
+            if message["type"] == "message":
+                try:
+                    deliver(orjson.loads(message["data"]))
+                except Exception as deliver_exec:
+                    logging.warning(f"Dropped a malformed event: {deliver_exec}")
+
+    async def publish(self, event: dict):
+        await self.client.publish(self.channel, orjson.dumps(event))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+
+def build_backend():
+    if settings.EVENTS_BACKEND == "redis":
+        from redis.asyncio import Redis
+        return RedisBackend(Redis.from_url(settings.EVENTS_REDIS_URL), settings.EVENTS_CHANNEL)
+    return MemoryBackend()
+
+
+class EventBroker:
+    """
+    Fans change events out to the connected dashboards.
+
+    Events are addressed to user ids and/or to every admin. Publishing costs one
+    bounded queue put per interested subscriber and never waits on a slow one.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._started = False
+        self._subscribers = set()
+        self.published = 0
+        self.delivered = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = build_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend, self._started = backend, False
+
+    async def _start(self):
+        if not self._started:
+            self._started = True
+            await self.backend.start(self.deliver)
+
+    async def subscribe(self, user_id: int, is_admin: bool) -> Subscriber:
+        await self._start()
+        subscriber = Subscriber(user_id, is_admin, settings.EVENTS_QUEUE_SIZE, settings.EVENTS_SLOW_CONSUMER)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def clear(self):
+        self._subscribers.clear()
+
+    async def publish(self, event_type: str, data: dict, users: Iterable[int] = (), admins: bool = False):
+        """Publishes `data` as an `event_type` event to `users` and, with `admins`, to every admin."""
+        event = {"id": uuid.uuid4().hex, "type": event_type, "data": data, "users": list(users), "admins": admins}
+        try:
+            await self._start()
+            await self.backend.publish(event)
+            self.published += 1
+        except Exception as publish_exec:
+            # Dashboards catch up on their next refetch; the change itself is committed.
+            logging.warning(f"Could not publish {event_type} event: {publish_exec}")
+
+    def deliver(self, event: dict):
+        """Hands `event` to every local subscriber it is addressed to."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscriber in list(self._subscribers):
+            if not subscriber.wants(event):
+                continue
+            if running is subscriber.loop:
+                subscriber.offer(event)
+            else:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+                except RuntimeError:
+                    # Its loop closed without unsubscribing it; the others still get the event.
+                    self.unsubscribe(subscriber)
+                    continue
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "published": self.published, "delivered": self.delivered,
+                "dropped": sum(subscriber.total_dropped for subscriber in self._subscribers)}
+
+    async def close(self):
+        if self._started:
+            await self.backend.close()
+        self._started = False
+
+
+event_broker = EventBroker()
+
+
+def client_event(event: dict) -> dict:
+    """The part of an event sent to clients, without its addressing."""
+    return {"id": event["id"], "type": event["type"], "data": event["data"]}
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.config.metrics import record_timing
+from app.config.security import hash_password, hash_passwords, verify_password
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+_executor: Optional[Executor] = None
+
+metrics = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "total_seconds": 0.0,
+}
+
+
+def get_hashing_executor() -> Optional[Executor]:
+    """
+    Returns the process pool used for bcrypt, creating it on first use.
+
+    With HASH_POOL_WORKERS=0 no pool is created and the work runs on the event loop's
+    default thread pool instead.
+    """
+    global _executor
+    if _executor is None and settings.HASH_POOL_WORKERS > 0:
+        _executor = ProcessPoolExecutor(max_workers=settings.HASH_POOL_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_hashing_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def _run(fn, *args):
+    if metrics["in_flight"] >= settings.HASH_POOL_MAX_PENDING:
+        metrics["rejected"] += 1
+        logging.warning("Password hashing queue is full, rejecting request.")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Server is busy, please try again shortly.",
+                            headers={"Retry-After": "1"})
+
+    metrics["submitted"] += 1
+    metrics["in_flight"] += 1
+    metrics["max_in_flight"] = max(metrics["max_in_flight"], metrics["in_flight"])
+    started = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(get_hashing_executor(), fn, *args)
+    except Exception:
+        metrics["failed"] += 1
+        raise
+    else:
+        metrics["completed"] += 1
+        return result
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics["in_flight"] -= 1
+        metrics["total_seconds"] += elapsed
+        record_timing("hash", elapsed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def hash_passwords_async(passwords: list) -> list:
+    """
+    Hashes a batch of passwords across the pool, one task per worker rather than per
+    password, so a bulk import neither pays per-item IPC nor fills the pending queue.
+    """
+    if not passwords:
+        return []
+    slices = max(1, min(settings.HASH_POOL_WORKERS, len(passwords)))
+    size = -(-len(passwords) // slices)
+    results = await asyncio.gather(*(_run(hash_passwords, passwords[start:start + size])
+                                     for start in range(0, len(passwords), size)))
+    return [hashed for batch in results for hashed in batch]
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def hashing_stats() -> dict:
+    return {**metrics, "workers": settings.HASH_POOL_WORKERS, "max_pending": settings.HASH_POOL_MAX_PENDING}
@@ -0,0 +1,228 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        return self._header() + [f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+                                 for labels, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), function: Optional[Callable] = None):
+        super().__init__(name, documentation, labels)
+        self._function = function
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> list:
+        values = self._function() if self._function else self._values
+        return self._header() + [f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+                                 for labels, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+REGISTRY: list = []
+
+http_requests_total = Counter("http_requests_total", "HTTP responses by route and status.",
+                              ("method", "route", "status"))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                  ("method", "route"))
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+db_queries_total = Counter("db_queries_total", "SQL statements executed, by route.", ("route",))
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement execution time.")
+db_pool_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                         buckets=(.0005, .001, .005, .01, .05, .1, .5, 1.0, 5.0, 30.0))
+db_pool_timeouts_total = Counter("db_pool_timeouts_total", "Checkouts that failed because the pool was exhausted.")
+
+# Per-request timings (seconds by kind, plus the query count) for the Server-Timing header.
+_request_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(kind: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[kind] = timings.get(kind, 0.0) + seconds
+
+
+def _current_route() -> str:
+    timings = _request_timings.get()
+    if timings is None:
+        return "background"
+    return getattr(timings["scope"].get("route"), "path", None) or "unmatched"
+
+
+def _timed_do_get(pool_class):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return pool_class._do_get(self)
+        except exc.TimeoutError:
+            db_pool_timeouts_total.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            db_pool_wait.observe(waited)
+            record_timing("pool", waited)
+    return _do_get
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time and exhaustion."""
+    _do_get = _timed_do_get(QueuePool)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    _do_get = _timed_do_get(AsyncAdaptedQueuePool)
+
+
+def instrument_engine(engine):
+    """Counts statements and their execution time, per request and globally."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_query_duration.observe(elapsed)
+        db_queries_total.inc(_current_route())
+        record_timing("db", elapsed)
+        record_timing("queries", 1)
+
+    return engine
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _server_timing(timings: dict, total: float) -> bytes:
+    parts = []
+    if "db" in timings:
+        parts.append(f'db;dur={timings["db"] * 1000:.2f};desc="{int(timings.get("queries", 0))} queries"')
+    for kind in ("pool", "hash"):
+        if kind in timings:
+            parts.append(f"{kind};dur={timings[kind] * 1000:.2f}")
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight metrics per route.
+
+    The route label is the matched path template (e.g. `/users/{pk}`), so label
+    cardinality stays bounded. Responses get a `Server-Timing` header splitting the
+    time spent in SQL, pool checkout and password hashing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = {"scope": scope}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = {"code": 500}
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - started)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route_path = _current_route()
+            http_requests_in_flight.dec()
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route_path)
+            http_requests_total.inc(scope["method"], route_path, status["code"])
+            _request_timings.reset(token)
@@ -0,0 +1,173 @@
+import math
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+
+@lru_cache(maxsize=None)
+def parse_limits(spec: str) -> tuple:
+    """
+    Parses a limit spec such as "ip:20/60,account:5/300" into
+    `(("ip", 20, 60.0), ("account", 5, 300.0))`: at most 20 requests per IP and 5 per
+    account within any 60 and 300 second window respectively.
+    """
+    limits = []
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        scope, _, rule = part.partition(":")
+        count, _, seconds = rule.partition("/")
+        limits.append((scope.strip(), int(count), float(seconds)))
+    return tuple(limits)
+
+
+class MemoryBackend:
+    """Sliding-window log per key, kept in this process."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._hits = {}
+
+    def _prune(self, now: float):
+        for key in [key for key, (window, hits) in self._hits.items() if not hits or hits[-1] <= now - window]:
+            del self._hits[key]
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Records a request on `key`; returns 0 if allowed, else the seconds until it would be."""
+        now = time.monotonic()
+        entry = self._hits.get(key)
+        if entry is None:
+            if len(self._hits) >= self.max_keys:
+                self._prune(now)
+                if len(self._hits) >= self.max_keys:
+                    del self._hits[next(iter(self._hits))]
+            entry = self._hits[key] = (window, deque())
+        hits = entry[1]
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return hits[0] + window - now
+        hits.append(now)
+        return 0.0
+
+    async def reset(self):
+        self._hits.clear()
+
+
+class RedisBackend:
+    """
+    Sliding-window log per key in a Redis sorted set, shared by every worker.
+
+    `client` is a `redis.asyncio.Redis` (or fakeredis) instance.
+    """
+
+    def __init__(self, client, prefix: str = "rate-limit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        key = self.prefix + key
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex[:8]}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - window)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.pexpire(key, int(window * 1000) + 1000)
+            _, _, count, _ = await pipe.execute()
+        if count <= limit:
+            return 0.0
+        # Rejected requests do not use up the window.
+        await self.client.zrem(key, member)
+        oldest = await self.client.zrange(key, 0, 0, withscores=True)
+        return max(0.0, oldest[0][1] + window - now) if oldest else window
+
+    async def reset(self):
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def build_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        from redis.asyncio import Redis
+        return RedisBackend(Redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+    return MemoryBackend()
+
+
+class RateLimiter:
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = build_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+
+    async def check(self, name: str, keys: dict):
+        """
+        Counts a request to the `name` route against every configured limit, e.g.
+        `keys={"ip": "10.0.0.1", "account": "user@example.com"}`, and raises 429
+        with Retry-After when one of them is exhausted.
+        """
+        retry_after = 0.0
+        for scope, limit, window in parse_limits(getattr(settings, f"RATE_LIMIT_{name.upper()}")):
+            if not keys.get(scope):
+                continue
+            retry_after = max(retry_after, await self.backend.hit(f"{name}:{scope}:{keys[scope]}", limit, window))
+            if retry_after:
+                break
+        if retry_after:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                detail="Too many requests, please try again later.",
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    async def reset(self):
+        if self._backend is not None:
+            await self._backend.reset()
+
+
+rate_limiter = RateLimiter()
+
+
+async def _account(request: Request) -> Optional[str]:
+    # FastAPI has already read and cached the body, so this does not consume it.
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith(("application/x-www-form-urlencoded", "multipart/form-data")):
+            account = (await request.form()).get("username")
+        elif content_type.startswith("application/json"):
+            body = await request.json()
+            account = body.get("email") if isinstance(body, dict) else None
+        else:
+            return None
+    except Exception:
+        return None
+    return account.strip().lower() if isinstance(account, str) and account.strip() else None
+
+
+def rate_limit(name: str):
+    """
+    Dependency limiting the route by client IP and by account (the `username` form
+    field or the `email` JSON field), using the RATE_LIMIT_<NAME> setting. Declare it
+    in the route's `dependencies` so it runs before the session and any hashing.
+    """
+
+    async def _check_rate_limit(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        keys = {"ip": request.client.host if request.client else None, "account": await _account(request)}
+        await rate_limiter.check(name, keys)
+
+    return _check_rate_limit
@@ -0,0 +1,167 @@
+import logging
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import AsyncGenerator, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config.database import DBSession, get_pool_limits, get_session
+from app.config.metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+PIN_COOKIE = "db_primary_until"
+
+# Per-request flag set when a session flushes changes, see ReplicaPinMiddleware.
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_write(session, flush_context):
+    writes = _request_writes.get()
+    if writes is not None:
+        writes["wrote"] = True
+
+
+@lru_cache()
+def get_replica_sessionmaker():
+    """Sessions bound to the read replica, or None when REPLICA_DATABASE_URI is not set."""
+    if settings.DB_ASYNC:
+        if not settings.ASYNC_REPLICA_DATABASE_URI:
+            return None
+        replica_engine = create_async_engine(settings.ASYNC_REPLICA_DATABASE_URI,
+                                             poolclass=InstrumentedAsyncQueuePool,
+                                             pool_pre_ping=True,
+                                             **get_pool_limits())
+        instrument_engine(replica_engine.sync_engine)
+        return async_sessionmaker(bind=replica_engine, autoflush=False, expire_on_commit=False)
+
+    if not settings.REPLICA_DATABASE_URI:
+        return None
+    replica_engine = create_engine(settings.REPLICA_DATABASE_URI,
+                                   poolclass=InstrumentedQueuePool,
+                                   pool_pre_ping=True,
+                                   **get_pool_limits())
+    instrument_engine(replica_engine)
+    return sessionmaker(bind=replica_engine, autocommit=False, autoflush=False)
+
+
+class ReplicaLag:
+    """
+    Caches the replica's replication delay for REPLICA_LAG_CHECK_SECONDS.
+
+    Only MySQL reports a delay (`Seconds_Behind_Source`); other backends count as
+    up to date. A replica whose delay is unknown, e.g. because replication stopped,
+    is treated as too far behind.
+    """
+
+    def __init__(self):
+        self.seconds: Optional[float] = 0.0
+        self._checked_at = None
+
+    async def _measure(self, session: DBSession) -> Optional[float]:
+        bind = session.get_bind()
+        if bind.dialect.name != "mysql":
+            return 0.0
+        result = session.execute(text("SHOW REPLICA STATUS"))
+        if not isinstance(session, Session):
+            result = await result
+        status = result.mappings().first()
+        if status is None:
+            return None
+        return status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+
+    async def acceptable(self, session: DBSession) -> bool:
+        if settings.REPLICA_MAX_LAG_SECONDS <= 0:
+            return True
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at > settings.REPLICA_LAG_CHECK_SECONDS:
+            self._checked_at = now
+            try:
+                self.seconds = await self._measure(session)
+            except Exception as lag_exec:
+                logging.warning(f"Could not read the replica lag: {lag_exec}")
+                self.seconds = None
+        return self.seconds is not None and self.seconds <= settings.REPLICA_MAX_LAG_SECONDS
+
+    def reset(self):
+        self.seconds, self._checked_at = 0.0, None
+
+
+replica_lag = ReplicaLag()
+
+
+async def dispose_replica():
+    if get_replica_sessionmaker.cache_info().currsize and get_replica_sessionmaker() is not None:
+        bind = get_replica_sessionmaker().kw["bind"]
+        result = bind.dispose()
+        if result is not None:
+            await result
+
+
+def _pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(request: Request, primary: DBSession = Depends(get_session)) -> AsyncGenerator:
+    """
+    Session for read-only routes: the replica when one is configured, healthy and the
+    client has not written recently, the primary otherwise.
+
+    `primary` is opened lazily by SQLAlchemy, so routing a request to the replica does
+    not check out a primary connection.
+    """
+    replica_sessionmaker = get_replica_sessionmaker()
+    if replica_sessionmaker is None or _pinned_to_primary(request):
+        yield primary
+        return
+
+    replica = replica_sessionmaker()
+    try:
+        if not await replica_lag.acceptable(replica):
+            yield primary
+            return
+        yield replica
+    finally:
+        close = replica.close()
+        if not isinstance(replica, Session):
+            await close
+
+
+class ReplicaPinMiddleware:
+    """
+    Pins a client to the primary for REPLICA_PIN_SECONDS after it wrote, so it reads
+    its own writes (e.g. a category it just created) while the replica catches up.
+
+    The pin is a cookie holding its expiry time, which `get_read_session` checks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or get_replica_sessionmaker() is None:
+            return await self.app(scope, receive, send)
+
+        writes = {"wrote": False}
+        token = _request_writes.set(writes)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes["wrote"]:
+                until = int(time.time() + settings.REPLICA_PIN_SECONDS)
+                cookie = f"{PIN_COOKIE}={until}; Max-Age={settings.REPLICA_PIN_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
@@ -2,28 +2,58 @@ import logging
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 import jwt
-from passlib.context import CryptContext
 import base64
-from sqlalchemy.orm import joinedload, Session
+import hashlib
+import hmac
+import time
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
 from datetime import datetime, timedelta
-from app.config.database import get_session
+from functools import lru_cache
+from app.config.database import DBSession, get_session, maybe_await
 from app.config.settings import get_settings
-from app.models.user import UserToken
+from app.models.user import User, UserToken
+from app.utils.bloom import RotatingBloomFilter
+from app.utils.cache import TTLCache
 
 SPECIAL_CHARACTERS = ['@', '#', '$', '%', '=', ':', '?', '.', '/', '|', '~', '>']
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Validated access tokens, keyed by (access_key, user_token_id). The cache is per
+# process, so a token revoked on another worker stays usable here for at most
+# TOKEN_CACHE_TTL_SECONDS.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+# Access keys (and "user:<id>" for deactivated users) revoked before their JWT
+# expires. Entries only need to outlive an access token, so the filter rotates on
+# that period. A hit may be a false positive and is confirmed against the DB.
+revocation_filter = RotatingBloomFilter(capacity=settings.REVOCATION_FILTER_CAPACITY,
+                                        window=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+@lru_cache()
+def get_pwd_context():
+    # passlib and the bcrypt backend load on first use, not when the app is imported.
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
 def hash_password(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def hash_passwords(passwords: list) -> list:
+    pwd_context = get_pwd_context()
+    return [pwd_context.hash(password) for password in passwords]
 
 
 def is_password_strong_enough(password: str) -> bool:
@@ -68,34 +98,184 @@ def generate_token(payload: dict, secret: str, algo: str, expiry: timedelta):
     return jwt.encode(payload, secret, algorithm=algo)
 
 
+def _sign_email_token(user: User, context: str, expires: int) -> str:
+    message = f"{user.id}:{expires}:{user.get_context_string(context=context)}"
+    digest = hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode('ascii')
+
+
+def generate_signed_token(user: User, context: str, expiry: timedelta) -> str:
+    """
+    Mints a compact, URL-safe `<user_id>.<expires>.<signature>` token.
+
+    The HMAC covers the user's context string (purpose, password fingerprint and last
+    update), so the token stops working once the password or account changes.
+    """
+    expires = int(time.time() + expiry.total_seconds())
+    return f"{user.id}.{expires}.{_sign_email_token(user, context, expires)}"
+
+
+def verify_signed_token(token: str, user: User, context: str) -> bool:
+    try:
+        user_id, expires, signature = token.split(".")
+        expires = int(expires)
+    except ValueError:
+        return False
+    if user_id != str(user.id) or expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign_email_token(user, context, expires))
+
+
+def is_legacy_email_token(token: str) -> bool:
+    return token.startswith("$2")
+
+
+async def create_email_token(user: User, context: str, expiry: timedelta) -> str:
+    if settings.EMAIL_TOKEN_MODE == "bcrypt":
+        from app.config.hashing import hash_password_async
+        return await hash_password_async(user.get_context_string(context=context))
+    return generate_signed_token(user, context, expiry)
+
+
+async def verify_email_token(token: str, user: User, context: str) -> bool:
+    if is_legacy_email_token(token):
+        if not settings.ACCEPT_LEGACY_EMAIL_TOKENS:
+            return False
+        from app.config.hashing import verify_password_async
+        return await verify_password_async(user.get_context_string(context=context), token)
+    return verify_signed_token(token, user, context)
+
+
+def _detached_user_copy(user: User) -> User:
+    """Builds a session-less snapshot of `user` that can later be merged without a SELECT."""
+    copy = User.__mapper__.class_manager.new_instance()
+    for attr in inspect(User).column_attrs:
+        set_committed_value(copy, attr.key, getattr(user, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+def cache_token_user(access_key: str, user_token_id, user: User, expires_at: datetime):
+    if not settings.TOKEN_CACHE_ENABLED:
+        return
+    ttl = (expires_at - datetime.utcnow()).total_seconds()
+    token_cache.set((access_key, str(user_token_id)), _detached_user_copy(user), ttl=ttl)
+
+
+def invalidate_token_cache(access_key: str, user_token_id):
+    token_cache.pop((access_key, str(user_token_id)))
+    revocation_filter.add(access_key)
+
+
+def invalidate_user_token_cache(user_id: int):
+    token_cache.pop_where(lambda key, cached_user: cached_user.id == user_id)
+    revocation_filter.add(f"user:{user_id}")
+
+
+@event.listens_for(User.is_active, "set")
+def _evict_deactivated_user(target, value, oldvalue, initiator):
+    # `oldvalue` is not loaded when the attribute was expired or deferred, so only the new value counts.
+    if not value and target.id is not None:
+        invalidate_user_token_cache(target.id)
+
+
+def _deactivated_rows(orm_execute_state) -> list:
+    parameters = orm_execute_state.parameters
+    rows = parameters if isinstance(parameters, list) else [parameters or {}]
+    # Only the SET values given to .values(), without a column for every parameter key.
+    values = orm_execute_state.statement.compile(column_keys=[]).params
+    rows = [{**values, **row} for row in rows]
+    return [row for row in rows if not row.get("is_active", True)]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _evict_bulk_deactivated_users(orm_execute_state):
+    """Bulk `update(User)` statements bypass the attribute listener above; their users are evicted here."""
+    mapper = orm_execute_state.bind_mapper
+    if not orm_execute_state.is_update or mapper is None or mapper.class_ is not User:
+        return None
+    rows = _deactivated_rows(orm_execute_state)
+    if not rows:
+        return None
+    if all("id" in row for row in rows):
+        user_ids = [row["id"] for row in rows]
+    else:
+        # Rows matched by criteria: looked up before the update changes what they match.
+        query = select(User.id)
+        if orm_execute_state.statement.whereclause is not None:
+            query = query.where(orm_execute_state.statement.whereclause)
+        user_ids = orm_execute_state.session.scalars(query).all()
+    result = orm_execute_state.invoke_statement()
+    for user_id in user_ids:
+        invalidate_user_token_cache(user_id)
+    return result
+
+
 async def get_token_user(token: str, db):
     payload = get_token_payload(token, settings.JWT_SECRET, settings.JWT_ALGORITHM)
     if payload:
         user_token_id = str_decode(payload.get('r'))
         user_id = str_decode(payload.get('sub'))
         access_key = payload.get('a')
-        user_token = db.query(UserToken).options(joinedload(UserToken.user)).filter(UserToken.access_key == access_key,
-                                                 UserToken.id == user_token_id,
-                                                 UserToken.user_id == user_id,
-                                                 UserToken.expires_at > datetime.utcnow()
-                                                 ).first()
+        if settings.TOKEN_CACHE_ENABLED:
+            cached_user = token_cache.get((access_key, user_token_id))
+            if cached_user is not None and str(cached_user.id) == user_id:
+                return await maybe_await(db.merge(cached_user, load=False))
+        user_token = await maybe_await(db.scalar(
+            select(UserToken).options(joinedload(UserToken.user)).where(UserToken.access_key == access_key,
+                                                                        UserToken.id == user_token_id,
+                                                                        UserToken.user_id == user_id,
+                                                                        UserToken.expires_at > datetime.utcnow())
+        ))
         if user_token:
+            cache_token_user(access_key, user_token.id, user_token.user, user_token.expires_at)
             return user_token.user
     return None
 
 
 async def load_user(email: str, db):
-    from app.models.user import User
     try:
-        user = db.query(User).filter(User.email == email).first()
+        user = await maybe_await(db.scalar(select(User).where(User.email == email)))
     except Exception as user_exec:
         logging.info(f"User Not Found, Email: {email}")
         user = None
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_session)):
     user = await get_token_user(token=token, db=db)
     if user:
         return user
-    raise HTTPException(status_code=401, detail="Not authorised.")
\ No newline at end of file
+    raise HTTPException(status_code=401, detail="Not authorised.")
+
+
+def get_claims_user(payload: dict):
+    """Builds a transient User from the profile claims of an access token, if it carries them."""
+    if not payload.get('e'):
+        return None
+    created_at = payload.get('c')
+    return User(id=int(str_decode(payload.get('sub'))),
+                name=str_decode(payload.get('n')),
+                email=payload.get('e'),
+                is_active=True,
+                created_at=datetime.fromisoformat(created_at) if created_at else None)
+
+
+async def get_current_user_read_only(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_session)):
+    """
+    Authenticates read-only routes.
+
+    With AUTH_STATELESS_READS on, a token is trusted on its signature and `exp`
+    alone unless it shows up in the revocation filter, and the user is rebuilt from
+    its claims without touching the database. Otherwise this is `get_current_user`.
+    """
+    if settings.AUTH_STATELESS_READS:
+        payload = get_token_payload(token, settings.JWT_SECRET, settings.JWT_ALGORITHM)
+        if not payload:
+            raise HTTPException(status_code=401, detail="Not authorised.")
+        access_key, user_id = payload.get('a'), str_decode(payload.get('sub'))
+        if access_key not in revocation_filter and f"user:{user_id}" not in revocation_filter:
+            user = get_claims_user(payload)
+            if user:
+                return user
+    return await get_current_user(token=token, db=db)
\ No newline at end of file
@@ -25,6 +25,51 @@ class Settings(BaseSettings):
     MYSQL_PORT: int = int(os.environ.get("MYSQL_PORT", 3306))
     MYSQL_DB: str = os.environ.get("MYSQL_DB", 'fastapi')
     DATABASE_URI: str = f"mysql+pymysql://{MYSQL_USER}:%s@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}" % quote_plus(MYSQL_PASS)
+    ASYNC_DATABASE_URI: str = f"mysql+aiomysql://{MYSQL_USER}:%s@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}" % quote_plus(MYSQL_PASS)
+    # Serve requests from an AsyncSession instead of the blocking Session
+    DB_ASYNC: bool = os.environ.get("DB_ASYNC", "false").lower() == "true"
+
+    # Number of server processes. `python -m app.server` defaults it to the CPU count and
+    # exports it to its workers, which use it to size their pools.
+    WEB_CONCURRENCY: int = int(os.environ.get("WEB_CONCURRENCY", 1))
+    SERVER_HOST: str = os.environ.get("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.environ.get("SERVER_PORT", 8000))
+    # Seconds in-flight requests get to finish after SIGTERM before workers exit
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.environ.get("SERVER_KEEPALIVE_SECONDS", 5))
+
+    # Optional read replica for read-only routes (empty disables it)
+    REPLICA_DATABASE_URI: str = os.environ.get("REPLICA_DATABASE_URI", "")
+    ASYNC_REPLICA_DATABASE_URI: str = os.environ.get("ASYNC_REPLICA_DATABASE_URI", "")
+    # After a write the client reads from the primary for this long (read-your-writes)
+    REPLICA_PIN_SECONDS: int = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+    # Reads go back to the primary while the replica is further behind (0 never checks)
+    REPLICA_MAX_LAG_SECONDS: float = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", 5))
+    REPLICA_LAG_CHECK_SECONDS: float = float(os.environ.get("REPLICA_LAG_CHECK_SECONDS", 5))
+
+    # Connection pool of each worker. DB_MAX_CONNECTIONS is the budget for all workers
+    # together (keep it below MySQL's max_connections); each worker gets an equal share,
+    # and DB_POOL_SIZE / DB_MAX_OVERFLOW are capped to fit in it.
+    DB_MAX_CONNECTIONS: int = int(os.environ.get("DB_MAX_CONNECTIONS", 100))
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 0))
+    DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", 3600))
+
+    # Compiled email templates are cached here (empty uses the system temp directory)
+    TEMPLATE_BYTECODE_CACHE_DIR: str = os.environ.get("TEMPLATE_BYTECODE_CACHE_DIR", "")
+
+    # Email outbox: messages are stored in email_outbox and sent by a worker
+    EMAIL_OUTBOX_ENABLED: bool = os.environ.get("EMAIL_OUTBOX_ENABLED", "true").lower() == "true"
+    # Run the outbox worker inside the API process (disable when running it standalone)
+    EMAIL_OUTBOX_WORKER_IN_PROCESS: bool = os.environ.get("EMAIL_OUTBOX_WORKER_IN_PROCESS", "true").lower() == "true"
+    EMAIL_OUTBOX_POLL_SECONDS: float = float(os.environ.get("EMAIL_OUTBOX_POLL_SECONDS", 2))
+    EMAIL_OUTBOX_BATCH_SIZE: int = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = int(os.environ.get("EMAIL_OUTBOX_RETRY_BASE_SECONDS", 30))
+    # Claimed messages are retried after this lease if the worker dies mid-send
+    EMAIL_OUTBOX_LEASE_SECONDS: int = int(os.environ.get("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    SMTP_POOL_SIZE: int = int(os.environ.get("SMTP_POOL_SIZE", 4))
 
     # JWT Secret Key
     JWT_SECRET: str = os.environ.get("JWT_SECRET", "649fb93ef34e4fdf4187709c84d643dd61ce730d91856418fdcf563f895ea40f")
@@ -32,9 +77,110 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 3))
     REFRESH_TOKEN_EXPIRE_MINUTES: int = int(os.environ.get("REFRESH_TOKEN_EXPIRE_MINUTES", 1440))
 
+    # Live sessions (user_tokens rows) kept per user, 0 disables the cap
+    MAX_SESSIONS_PER_USER: int = int(os.environ.get("MAX_SESSIONS_PER_USER", 10))
+
+    # Background cleanup of expired and rotated user_tokens rows
+    TOKEN_REAPER_ENABLED: bool = os.environ.get("TOKEN_REAPER_ENABLED", "true").lower() == "true"
+    TOKEN_REAPER_INTERVAL_SECONDS: int = int(os.environ.get("TOKEN_REAPER_INTERVAL_SECONDS", 300))
+    TOKEN_REAPER_RETENTION_MINUTES: int = int(os.environ.get("TOKEN_REAPER_RETENTION_MINUTES", 60))
+    TOKEN_REAPER_BATCH_SIZE: int = int(os.environ.get("TOKEN_REAPER_BATCH_SIZE", 1000))
+
+    # Trust access tokens on signature and expiry alone for read-only routes. Revocations
+    # are only known to the worker that made them, so another worker may accept a revoked
+    # token until it expires (ACCESS_TOKEN_EXPIRE_MINUTES).
+    AUTH_STATELESS_READS: bool = os.environ.get("AUTH_STATELESS_READS", "false").lower() == "true"
+    REVOCATION_FILTER_CAPACITY: int = int(os.environ.get("REVOCATION_FILTER_CAPACITY", 100000))
+
+    # Validated access-token cache
+    TOKEN_CACHE_ENABLED: bool = os.environ.get("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+    TOKEN_CACHE_MAX_SIZE: int = int(os.environ.get("TOKEN_CACHE_MAX_SIZE", 10000))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.environ.get("TOKEN_CACHE_TTL_SECONDS", 60))
+
+    # In-process user category registry, reloaded from the table after this many seconds
+    # so renames made by other workers are picked up
+    CATEGORY_REGISTRY_TTL_SECONDS: int = int(os.environ.get("CATEGORY_REGISTRY_TTL_SECONDS", 300))
+
+    # Rows validated, de-duplicated and inserted together by the bulk user import
+    USER_IMPORT_CHUNK_SIZE: int = int(os.environ.get("USER_IMPORT_CHUNK_SIZE", 500))
+
+    # In-process schedule of approved vehicle bookings, reloaded from the table after this
+    # many seconds so approvals made by other workers are picked up
+    VEHICLE_AVAILABILITY_TTL_SECONDS: int = int(os.environ.get("VEHICLE_AVAILABILITY_TTL_SECONDS", 60))
+
+    # Users in this category may use the /admin routes
+    ADMIN_CATEGORY_NAME: str = os.environ.get("ADMIN_CATEGORY_NAME", "admin")
+
+    # Rate limits of the routes doing bcrypt work, as "<scope>:<requests>/<seconds>" rules
+    # per client IP and per account (email); an empty value disables a route's limit.
+    # The memory backend counts per worker, the redis backend across all of them.
+    RATE_LIMIT_ENABLED: bool = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL: str = os.environ.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_LOGIN: str = os.environ.get("RATE_LIMIT_LOGIN", "ip:30/60,account:10/300")
+    RATE_LIMIT_REGISTER: str = os.environ.get("RATE_LIMIT_REGISTER", "ip:10/60")
+    RATE_LIMIT_VERIFY: str = os.environ.get("RATE_LIMIT_VERIFY", "ip:20/60,account:10/300")
+    RATE_LIMIT_FORGOT_PASSWORD: str = os.environ.get("RATE_LIMIT_FORGOT_PASSWORD", "ip:10/60,account:3/300")
+    RATE_LIMIT_RESET_PASSWORD: str = os.environ.get("RATE_LIMIT_RESET_PASSWORD", "ip:10/60,account:5/300")
+
+    # Dashboard change events (/events): "memory" reaches the dashboards connected to the
+    # same worker, "redis" those of every worker. A dashboard falling EVENTS_QUEUE_SIZE
+    # events behind is sent a drop notice ("drop_oldest") or disconnected ("disconnect").
+    EVENTS_BACKEND: str = os.environ.get("EVENTS_BACKEND", "memory")
+    EVENTS_REDIS_URL: str = os.environ.get("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+    EVENTS_CHANNEL: str = os.environ.get("EVENTS_CHANNEL", "fleet-events")
+    EVENTS_QUEUE_SIZE: int = int(os.environ.get("EVENTS_QUEUE_SIZE", 100))
+    EVENTS_SLOW_CONSUMER: str = os.environ.get("EVENTS_SLOW_CONSUMER", "drop_oldest")
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", 15))
+
+    # GPS telemetry ingestion (/telemetry): points are buffered in memory, up to
+    # TELEMETRY_BUFFER_CAPACITY before requests get a 429, and bulk inserted every
+    # TELEMETRY_FLUSH_SIZE points or TELEMETRY_FLUSH_SECONDS, whichever comes first.
+    TELEMETRY_BUFFER_CAPACITY: int = int(os.environ.get("TELEMETRY_BUFFER_CAPACITY", 200000))
+    TELEMETRY_FLUSH_SIZE: int = int(os.environ.get("TELEMETRY_FLUSH_SIZE", 5000))
+    TELEMETRY_FLUSH_SECONDS: float = float(os.environ.get("TELEMETRY_FLUSH_SECONDS", 1.0))
+    TELEMETRY_MAX_BATCH: int = int(os.environ.get("TELEMETRY_MAX_BATCH", 10000))
+    # Points older than this, or this far in the future, are rejected
+    TELEMETRY_MAX_AGE_SECONDS: int = int(os.environ.get("TELEMETRY_MAX_AGE_SECONDS", 7 * 24 * 3600))
+    TELEMETRY_MAX_SKEW_SECONDS: int = int(os.environ.get("TELEMETRY_MAX_SKEW_SECONDS", 300))
+    TELEMETRY_MAX_SPEED_KMH: float = float(os.environ.get("TELEMETRY_MAX_SPEED_KMH", 300))
+    # Where flushed points go: "segments" (per-vehicle, per-day columnar files under
+    # TELEMETRY_STORE_PATH, shared by the workers of a host) or "database" (telemetry_points)
+    TELEMETRY_STORAGE: str = os.environ.get("TELEMETRY_STORAGE", "segments")
+    TELEMETRY_STORE_PATH: str = os.environ.get("TELEMETRY_STORE_PATH", "data/telemetry")
+    # Segments of days older than this are downsampled to one point per TELEMETRY_DOWNSAMPLE_SECONDS
+    # (never before TELEMETRY_MAX_AGE_SECONDS, while late points can still arrive)
+    TELEMETRY_COMPACTOR_ENABLED: bool = os.environ.get("TELEMETRY_COMPACTOR_ENABLED", "true").lower() == "true"
+    TELEMETRY_COMPACT_INTERVAL_SECONDS: int = int(os.environ.get("TELEMETRY_COMPACT_INTERVAL_SECONDS", 3600))
+    TELEMETRY_DOWNSAMPLE_AFTER_DAYS: int = int(os.environ.get("TELEMETRY_DOWNSAMPLE_AFTER_DAYS", 7))
+    TELEMETRY_DOWNSAMPLE_SECONDS: int = int(os.environ.get("TELEMETRY_DOWNSAMPLE_SECONDS", 60))
+    TELEMETRY_MAX_TRACK_DAYS: int = int(os.environ.get("TELEMETRY_MAX_TRACK_DAYS", 31))
+
+    # Trip distance and ETA of vehicle requests: great-circle distance times the detour
+    # factor, driven at the speeds of the profile ("<up to km>:<km/h>,...,:<km/h>")
+    ROUTING_DETOUR_FACTOR: float = float(os.environ.get("ROUTING_DETOUR_FACTOR", 1.3))
+    ROUTING_SPEED_PROFILE: str = os.environ.get("ROUTING_SPEED_PROFILE", "5:30,50:60,:90")
+    ROUTING_CACHE_SIZE: int = int(os.environ.get("ROUTING_CACHE_SIZE", 10000))
+
+    # Password hashing pool of each server worker, sharing the cores between workers by
+    # default (0 workers runs bcrypt on the default thread pool)
+    HASH_POOL_WORKERS: int = int(os.environ.get("HASH_POOL_WORKERS",
+                                                max(1, (os.cpu_count() or 1) // int(os.environ.get("WEB_CONCURRENCY", 1)))))
+    HASH_POOL_MAX_PENDING: int = int(os.environ.get("HASH_POOL_MAX_PENDING", 256))
+
+    # Log how long each startup step of the lifespan takes, see app.config.startup
+    STARTUP_PROFILE: bool = os.environ.get("STARTUP_PROFILE", "false").lower() == "true"
+
     # App Secret Key
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "8deadce9449770680910741063cd0a3fe0acb62a8978661f421bbcbb66dc41f1")
 
+    # Account verification / password reset links ("signed" HMAC tokens or legacy "bcrypt" hashes)
+    EMAIL_TOKEN_MODE: str = os.environ.get("EMAIL_TOKEN_MODE", "signed")
+    ACCOUNT_VERIFY_TOKEN_EXPIRE_MINUTES: int = int(os.environ.get("ACCOUNT_VERIFY_TOKEN_EXPIRE_MINUTES", 2880))
+    PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = int(os.environ.get("PASSWORD_RESET_TOKEN_EXPIRE_MINUTES", 60))
+    # Keep accepting bcrypt tokens from emails sent before the switch to signed tokens
+    ACCEPT_LEGACY_EMAIL_TOKENS: bool = os.environ.get("ACCEPT_LEGACY_EMAIL_TOKENS", "true").lower() == "true"
+
 
 @lru_cache()
 def get_settings() -> Settings:
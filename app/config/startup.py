@@ -0,0 +1,37 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+# Seconds spent in each startup step of this process, in the order they ran.
+startup_timings = {}
+
+
+@contextmanager
+def startup_step(name: str):
+    """Times one initialization step of the lifespan, logged when STARTUP_PROFILE is on."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = time.perf_counter() - started
+        if settings.STARTUP_PROFILE:
+            logging.warning(f"startup: {name} took {startup_timings[name] * 1000:.1f} ms")
+
+
+def warm_up():
+    """
+    Builds the lazily created clients the request path needs, so the first request
+    does not pay for them. The mail client stays lazy: only routes sending mail, or
+    the outbox worker, load it.
+    """
+    from app.config.database import get_sessionmaker
+    from app.config.security import get_pwd_context
+
+    with startup_step("database engine"):
+        get_sessionmaker()
+    with startup_step("password context"):
+        get_pwd_context().handler().get_backend()
@@ -0,0 +1,96 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from app.config.settings import get_settings
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+settings = get_settings()
+
+TEMPLATE_FOLDER = Path(__file__).parent.parent / "templates"
+EMAIL_TEMPLATES = (
+    "user/account-verification.html",
+    "user/account-verification-confirmation.html",
+    "user/password-reset.html",
+)
+
+
+@lru_cache()
+def _deferred_undefined():
+    from jinja2 import Undefined
+
+    class _DeferredUndefined(Undefined):
+        """Renders a missing variable back as its own placeholder, so it survives pre-rendering."""
+
+        def __str__(self):
+            return "{{ %s }}" % self._undefined_name
+
+    return _DeferredUndefined
+
+
+@lru_cache()
+def get_template_env() -> "Environment":
+    # jinja2 is imported here so only processes that render mail pay for it.
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+    bytecode_cache = FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR or None)
+    return Environment(loader=FileSystemLoader(TEMPLATE_FOLDER),
+                       autoescape=select_autoescape(["html"]),
+                       bytecode_cache=bytecode_cache,
+                       auto_reload=settings.DEBUG,
+                       cache_size=-1)
+
+
+def _static_context() -> dict:
+    return {"app_name": settings.APP_NAME}
+
+
+def _prerendered_template(template_name: str) -> "Template":
+    """
+    Returns `template_name` with its static parts (currently `app_name`) rendered in.
+
+    The template is rendered once with only the static context, leaving every other
+    variable as a placeholder, and the result is compiled as the template actually
+    used for sending. Templates using more than plain `{{ var }}` substitution, or
+    static values that look like template syntax, fall back to the original.
+    """
+    env = get_template_env()
+    template = env.get_template(template_name)
+    static = _static_context()
+    if any("{" in str(value) for value in static.values()):
+        return template
+    try:
+        source = env.overlay(undefined=_deferred_undefined()).get_template(template_name).render(**static)
+        return env.from_string(source)
+    except Exception:
+        return template
+
+
+_cached_template = lru_cache(maxsize=None)(_prerendered_template)
+
+
+def get_template(template_name: str) -> "Template":
+    """
+    The pre-rendered `template_name`, compiled once per process. With DEBUG it is
+    rebuilt on every call instead, so edits to the file (reloaded by jinja's
+    `auto_reload`) show up without a restart.
+    """
+    return _prerendered_template(template_name) if settings.DEBUG else _cached_template(template_name)
+
+
+def render_template(template_name: str, context: dict) -> str:
+    return get_template(template_name).render({**_static_context(), **context})
+
+
+def render_many(template_name: str, contexts: Iterable[dict]) -> Iterator[str]:
+    """Renders one message per context with a single compiled template, e.g. for bulk invites."""
+    template = get_template(template_name)
+    static = _static_context()
+    for context in contexts:
+        yield template.render({**static, **context})
+
+
+def preload_templates():
+    for template_name in EMAIL_TEMPLATES:
+        get_template(template_name)
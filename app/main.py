@@ -1,13 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from app.config.database import dispose_engines
+from app.config.events import event_broker
+from app.config.hashing import shutdown_hashing_pool
+from app.config.metrics import MetricsMiddleware
+from app.config.replica import ReplicaPinMiddleware, dispose_replica
+from app.config.settings import get_settings
+from app.config.startup import startup_step, warm_up
+from app.config.templates import preload_templates
+from app.services.email_outbox import run_outbox_worker
+from app.services.telemetry import run_telemetry_compactor, run_telemetry_flusher
+from app.services.user_category import load_category_registry
+from app.services.user_token import run_token_reaper
+from app.services.vehicle import load_availability_index
 # Assuming your user router file is at 'app/routes/user.py'
 # and your new category router file is at 'app/routes/user_category.py'
-from app.routes import user, user_category 
+from app.routes import admin, events, metrics, telemetry, user, user_category, vehicle
+
+settings = get_settings()
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    warm_up()
+    with startup_step("templates"):
+        preload_templates()
+    with startup_step("category registry"):
+        await asyncio.to_thread(load_category_registry)
+    with startup_step("vehicle availability"):
+        await asyncio.to_thread(load_availability_index)
+    background_tasks = [asyncio.create_task(run_telemetry_flusher())]
+    if settings.TOKEN_REAPER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_token_reaper()))
+    if settings.EMAIL_OUTBOX_ENABLED and settings.EMAIL_OUTBOX_WORKER_IN_PROCESS:
+        background_tasks.append(asyncio.create_task(run_outbox_worker()))
+    if settings.TELEMETRY_STORAGE == "segments" and settings.TELEMETRY_COMPACTOR_ENABLED:
+        background_tasks.append(asyncio.create_task(run_telemetry_compactor()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await event_broker.close()
+    shutdown_hashing_pool()
+    await dispose_engines()
+    await dispose_replica()
+
 
 def create_application():
     application = FastAPI(
         title="My Professional Portal API",
         description="API for managing users and their roles.",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
     )
     
     # --- Registering Routers ---
@@ -19,7 +65,25 @@ def create_application():
     
     # 1. Register the new router for managing user categories
     application.include_router(user_category.category_router)
-    
+    application.include_router(admin.admin_router)
+
+    # Fleet vehicles and the requests to use them
+    application.include_router(vehicle.vehicle_router)
+    application.include_router(vehicle.vehicle_request_router)
+
+    # Pushed dashboard updates (SSE and WebSocket)
+    application.include_router(events.events_router)
+
+    # Batched GPS telemetry ingestion
+    application.include_router(telemetry.telemetry_router)
+
+    # Read-your-writes pinning for routes reading from the replica
+    application.add_middleware(ReplicaPinMiddleware)
+
+    # Prometheus metrics and Server-Timing headers
+    application.add_middleware(MetricsMiddleware)
+    application.include_router(metrics.metrics_router)
+
     return application
 
 
@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String, Text, func
+from app.config.database import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipients = Column(JSON, nullable=False)
+    subject = Column(String(255), nullable=False)
+    template_name = Column(String(150), nullable=False)
+    context = Column(JSON, nullable=False)
+    # pending -> sent, or failed once EMAIL_OUTBOX_MAX_ATTEMPTS is reached
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True, default=None)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True, default=None)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer
+from app.config.database import Base
+
+
+class TelemetryPoint(Base):
+    __tablename__ = "telemetry_points"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    # km/h and km; NULL when the device did not report them
+    speed = Column(Float, nullable=True, default=None)
+    odometer = Column(Float, nullable=True, default=None)
+
+    __table_args__ = (
+        # A vehicle's track over a period.
+        Index("ix_telemetry_points_vehicle_recorded", "vehicle_id", "recorded_at"),
+    )
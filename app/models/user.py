@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, func, ForeignKey
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, func, ForeignKey
 from app.config.database import Base
 from sqlalchemy.orm import mapped_column, relationship
 # Make sure to import UserCategory if it's in a different file
@@ -14,7 +14,7 @@ class User(Base):
     matricule = Column(String(25))
     email = Column(String(255), unique=True, index=True)
     password = Column(String(100))
-    user_category_id = Column(Integer, ForeignKey('user_categories.id'))
+    user_category_id = Column(Integer, ForeignKey('user_categories.id'), index=True)
     category = relationship("UserCategory", back_populates="users")
     is_active = Column(Boolean, default=False)
     verified_at = Column(DateTime, nullable=True, default=None)
@@ -23,6 +23,21 @@ class User(Base):
     
     tokens = relationship("UserToken", back_populates="user")
 
+    __table_args__ = (
+        # Keyset order of the admin user directory.
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
+    @property
+    def name(self):
+        return " ".join(part for part in (self.first_name, self.last_name) if part)
+
+    @name.setter
+    def name(self, value: str):
+        parts = (value or "").strip().split(" ", 1)
+        self.first_name = parts[0]
+        self.last_name = parts[1] if len(parts) > 1 else None
+
     def get_context_string(self, context: str):
         return f"{context}{self.password[-6:]}{self.updated_at.strftime('%m%d%Y%H%M%S')}".strip()
     
@@ -37,4 +52,11 @@ class UserToken(Base):
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     expires_at = Column(DateTime, nullable=False)
     
-    user = relationship("User", back_populates="tokens")
\ No newline at end of file
+    user = relationship("User", back_populates="tokens")
+
+    __table_args__ = (
+        # Matches the get_token_user / session cap predicates.
+        Index("ix_user_tokens_user_access_expires", "user_id", "access_key", "expires_at"),
+        # Lets the reaper find expired rows without a full scan.
+        Index("ix_user_tokens_expires_at", "expires_at"),
+    )
\ No newline at end of file
@@ -0,0 +1,61 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import relationship
+from app.config.database import Base
+
+# Lifecycle of a vehicle request: pending -> approved -> completed, or pending -> denied.
+# Pending and approved requests can be cancelled.
+PENDING = "pending"
+APPROVED = "approved"
+DENIED = "denied"
+CANCELLED = "cancelled"
+COMPLETED = "completed"
+VEHICLE_REQUEST_STATUSES = (PENDING, APPROVED, DENIED, CANCELLED, COMPLETED)
+
+
+class Vehicle(Base):
+    __tablename__ = 'vehicles'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(150), nullable=False)
+    plate_number = Column(String(20), unique=True, nullable=False)
+    seats = Column(Integer, nullable=True, default=None)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    requests = relationship("VehicleRequest", back_populates="vehicle")
+
+
+class VehicleRequest(Base):
+    __tablename__ = 'vehicle_requests'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    requester_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    # Chosen by the requester or assigned by the approver.
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), nullable=True, default=None)
+    from_location = Column(String(255), nullable=False)
+    to_location = Column(String(255), nullable=False)
+    # Coordinates of both ends, when the client geocoded them; used for distance and ETA.
+    from_latitude = Column(Float, nullable=True, default=None)
+    from_longitude = Column(Float, nullable=True, default=None)
+    to_latitude = Column(Float, nullable=True, default=None)
+    to_longitude = Column(Float, nullable=True, default=None)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+    roadmap = Column(Text, nullable=True, default=None)
+    motif = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default=PENDING)
+    reviewed_by_id = Column(Integer, ForeignKey('users.id'), nullable=True, default=None)
+    reviewed_at = Column(DateTime, nullable=True, default=None)
+    updated_at = Column(DateTime, nullable=True, default=None, onupdate=datetime.now)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    requester = relationship("User", foreign_keys=[requester_id])
+    vehicle = relationship("Vehicle", back_populates="requests")
+
+    __table_args__ = (
+        # "My requests", newest first.
+        Index("ix_vehicle_requests_requester_created_id", "requester_id", "created_at", "id"),
+        # Requests in a status by date, e.g. the pending approval queue.
+        Index("ix_vehicle_requests_status_start_id", "status", "start_at", "id"),
+        # A vehicle's schedule, also used by the overlap check on approval.
+        Index("ix_vehicle_requests_vehicle_start_id", "vehicle_id", "start_at", "id"),
+    )
@@ -0,0 +1,20 @@
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies produced while the request body is still being read.
+
+    Starlette's StreamingResponse listens for a client disconnect on `receive`, which
+    would swallow the request body chunks the generator is waiting for; this variant
+    leaves `receive` to the generator.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -14,5 +14,5 @@ class LoginResponse(BaseModel):
     access_token: str
     refresh_token: str
     expires_in: int
-    user_category: str  # Added user_category
+    user_category: Union[str, None] = None  # Added user_category
     token_type: str = "Bearer"
\ No newline at end of file
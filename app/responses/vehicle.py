@@ -0,0 +1,45 @@
+from typing import Optional, Union
+from datetime import datetime
+from app.responses.base import BaseResponse
+
+
+class VehicleResponse(BaseResponse):
+    id: int
+    name: str
+    plate_number: str
+    seats: Optional[int] = None
+    is_active: bool
+
+
+class VehicleAvailabilityResponse(BaseResponse):
+    vehicle_id: int
+    available: bool
+    # The approved request booking the vehicle in the asked period, if any.
+    conflicting_request_id: Optional[int] = None
+
+
+class VehicleRequestResponse(BaseResponse):
+    id: int
+    requester_id: int
+    vehicle_id: Optional[int] = None
+    from_location: str
+    to_location: str
+    from_latitude: Optional[float] = None
+    from_longitude: Optional[float] = None
+    to_latitude: Optional[float] = None
+    to_longitude: Optional[float] = None
+    start_at: datetime
+    end_at: datetime
+    roadmap: Optional[str] = None
+    motif: str
+    status: str
+    reviewed_by_id: Optional[int] = None
+    reviewed_at: Optional[datetime] = None
+    created_at: Union[str, None, datetime] = None
+
+
+class TripEstimateResponse(BaseResponse):
+    request_id: int
+    # None when the request has no coordinates.
+    distance_km: Optional[float] = None
+    duration_minutes: Optional[float] = None
@@ -0,0 +1,70 @@
+import json
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+
+from app.config.database import DBSession, get_session
+from app.config.replica import get_read_session
+from app.config.security import get_current_user
+from app.config.settings import get_settings
+from app.models.user import User
+from app.responses.stream import DuplexStreamingResponse
+from app.responses.user import UserResponse
+from app.services import user, user_import
+from app.services.user_category import get_category_id
+from app.services.user_import import IMPORT_FORMATS
+from app.utils.pagination import page_headers
+from app.utils.serialization import json_list_response, stream_list_response
+
+settings = get_settings()
+
+
+async def is_admin(user: User, session: DBSession) -> bool:
+    admin_category_id = await get_category_id(session, settings.ADMIN_CATEGORY_NAME)
+    return admin_category_id is not None and user.user_category_id == admin_category_id
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user), session: DBSession = Depends(get_session)):
+    if not await is_admin(current_user, session):
+        raise HTTPException(status_code=403, detail="You are not allowed to perform this action.")
+    return current_user
+
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    responses={404: {"description": "Not found"}},
+    dependencies=[Depends(get_current_admin)]
+)
+
+
+@admin_router.get("/users", status_code=status.HTTP_200_OK, response_model=List[UserResponse])
+async def list_users(cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                     include_total: bool = False, stream: Optional[Literal["ndjson", "json"]] = None,
+                     session: DBSession = Depends(get_read_session)):
+    # Pass the X-Next-Cursor header of a response as `cursor` to fetch the following page,
+    # or set `stream` to get every user after `cursor` in one streamed response.
+    if stream:
+        return stream_list_response(UserResponse, session, user.user_listing(cursor), stream)
+    users, next_cursor, total_estimate = await user.list_users(session, cursor, limit, include_total)
+    return json_list_response(UserResponse, users, headers=page_headers(next_cursor, total_estimate))
+
+
+@admin_router.post("/users/import", status_code=status.HTTP_200_OK)
+async def import_users(request: Request, background_tasks: BackgroundTasks, session: DBSession = Depends(get_session)):
+    """
+    Creates users from a CSV (`text/csv`, with a header row) or NDJSON
+    (`application/x-ndjson`) body with name, email, matricule, telephone and category
+    fields. Streams back one NDJSON line per record, then a summary line.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    content_format = IMPORT_FORMATS.get(content_type)
+    if content_format is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Send the users as text/csv or application/x-ndjson.")
+
+    async def report():
+        async for line in user_import.import_users(request.stream(), content_format, session, background_tasks):
+            yield json.dumps(line) + "\n"
+
+    return DuplexStreamingResponse(report(), media_type="application/x-ndjson")
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+
+from app.config.database import DBSession, get_session, maybe_await
+from app.config.events import Subscriber, client_event, event_broker
+from app.config.security import get_current_user, get_token_user, oauth2_scheme
+from app.config.settings import get_settings
+from app.models.user import User
+from app.routes.admin import is_admin
+
+settings = get_settings()
+
+events_router = APIRouter(
+    prefix="/events",
+    tags=["Events"],
+)
+
+
+async def _subscribe(user: User, session: DBSession) -> Subscriber:
+    subscriber = await event_broker.subscribe(user.id, await is_admin(user, session))
+    # Hand the connection back to the pool: the stream may stay open for hours.
+    await maybe_await(session.rollback())
+    return subscriber
+
+
+async def _until_disconnect(websocket: WebSocket):
+    # Clients do not send anything; reading is how a disconnect is noticed.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def _next_event(subscriber: Subscriber) -> Optional[dict]:
+    """The next event for `subscriber`, `{}` when a heartbeat is due, None once it is disconnected."""
+    try:
+        return await asyncio.wait_for(subscriber.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+    except asyncio.TimeoutError:
+        return {}
+
+
+@events_router.get("/stream", dependencies=[Depends(oauth2_scheme)])
+async def stream_events(current_user: User = Depends(get_current_user),
+                        session: DBSession = Depends(get_session)):
+    """
+    Server-sent events: vehicle request changes of the current user (every request
+    for admins) and, for admins, new registrations. An `events.dropped` event means
+    some were skipped and the dashboard should refetch.
+    """
+    subscriber = await _subscribe(current_user, session)
+
+    async def events():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                event = await _next_event(subscriber)
+                if event is None:
+                    return
+                if not event:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"id: %s\nevent: %s\ndata: %s\n\n" % (event["id"].encode(), event["type"].encode(),
+                                                            orjson.dumps(event["data"]))
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@events_router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = Query(None),
+                           session: DBSession = Depends(get_session)):
+    """
+    The same events as /events/stream over a WebSocket, one JSON message each.
+    Browsers cannot set headers on a WebSocket, so the access token may be passed
+    as the `token` query parameter instead of the Authorization header.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = token or (authorization[7:] if authorization.lower().startswith("bearer ") else None)
+    user = await get_token_user(token=token, db=session) if token else None
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    subscriber = await _subscribe(user, session)
+    await websocket.accept()
+
+    async def pump():
+        while True:
+            event = await _next_event(subscriber)
+            if event is None:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Too slow, reconnect.")
+                return
+            await websocket.send_text(orjson.dumps(client_event(event) if event else {"type": "ping"}).decode())
+
+    pump_task, drain_task = asyncio.create_task(pump()), asyncio.create_task(_until_disconnect(websocket))
+    try:
+        await asyncio.wait({pump_task, drain_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Before any await: a cancelled handler would not get past it.
+        event_broker.unsubscribe(subscriber)
+        for task in (pump_task, drain_task):
+            task.cancel()
+        await asyncio.gather(pump_task, drain_task, return_exceptions=True)
@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.config.database import get_engine
+from app.config.events import event_broker
+from app.config.hashing import hashing_stats
+from app.config.metrics import Gauge, render_metrics
+from app.config.security import token_cache
+from app.services.telemetry import telemetry_buffer
+from app.services.vehicle import route_cache
+
+metrics_router = APIRouter(
+    tags=["Metrics"],
+    include_in_schema=False,
+)
+
+
+def _pool_connections() -> dict:
+    if not get_engine.cache_info().currsize:
+        return {}
+    pool = get_engine().pool
+    return {("checked_out",): pool.checkedout(), ("size",): pool.size(), ("overflow",): pool.overflow()}
+
+
+Gauge("db_pool_connections", "Connections of the primary engine pool by state.", ("state",),
+      function=_pool_connections)
+Gauge("hash_pool_tasks", "Password hashing pool counters.", ("state",),
+      function=lambda: {(key,): value for key, value in hashing_stats().items()})
+Gauge("event_broker", "Dashboard event subscribers and counters.", ("state",),
+      function=lambda: {(key,): value for key, value in event_broker.stats().items()})
+Gauge("route_cache", "Trip distance and ETA cache counters.", ("state",),
+      function=lambda: {(key,): value for key, value in route_cache.stats().items()})
+Gauge("telemetry_buffer", "Telemetry ingestion buffer: points buffered and counters.", ("state",),
+      function=lambda: {(key,): value for key, value in telemetry_buffer.stats().items()})
+Gauge("token_cache", "Validated access-token cache counters.", ("state",),
+      function=lambda: {(key,): value for key, value in token_cache.stats().items()})
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from app.config.database import DBSession, get_session
+from app.config.replica import get_read_session
+from app.config.security import get_current_user, oauth2_scheme
+from app.config.settings import get_settings
+from app.models.user import User
+from app.routes.admin import get_current_admin
+from app.schemas.vehicle import UTCDateTime
+from app.services import telemetry as service
+from app.utils.serialization import numpy_json_response
+
+settings = get_settings()
+
+telemetry_router = APIRouter(
+    prefix="/telemetry",
+    tags=["Telemetry"],
+    dependencies=[Depends(oauth2_scheme)]
+)
+
+_FORMATS = {
+    "application/x-ndjson": service.NDJSON,
+    "application/ndjson": service.NDJSON,
+    "application/octet-stream": service.BINARY,
+}
+
+
+@telemetry_router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_telemetry(request: Request, current_user: User = Depends(get_current_user),
+                           session: DBSession = Depends(get_session)):
+    """
+    Accepts a batch of GPS points, as NDJSON (`application/x-ndjson`, one
+    `{"vehicle_id", "ts", "lat", "lon", "speed", "odometer"}` object per line) or as
+    packed 40-byte little-endian records (`application/octet-stream`, see
+    `app.utils.telemetry.point_dtype`). `ts` is in seconds since the epoch (UTC).
+
+    Valid points are written within TELEMETRY_FLUSH_SECONDS; a 429 means the buffer
+    is full and the batch should be sent again after Retry-After.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    payload_format = _FORMATS.get(content_type)
+    if payload_format is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Send application/x-ndjson or application/octet-stream.")
+    return await service.ingest_telemetry(session, await request.body(), payload_format)
+
+
+def _check_period(start_at: datetime, end_at: datetime):
+    if end_at <= start_at:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_at must be after start_at.")
+    if (end_at - start_at).total_seconds() > settings.TELEMETRY_MAX_TRACK_DAYS * 86400:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"A track spans at most {settings.TELEMETRY_MAX_TRACK_DAYS} days.")
+
+
+@telemetry_router.get("/summary", status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_admin)])
+async def summarize_telemetry(start_at: UTCDateTime, end_at: UTCDateTime, group_by: Literal["day", "vehicle"] = "day"):
+    """Distance driven in [start_at, end_at) according to the recorded tracks, per UTC day or per vehicle."""
+    _check_period(start_at, end_at)
+    return numpy_json_response(await service.summarize_driven(start_at, end_at, group_by))
+
+
+@telemetry_router.get("/{vehicle_id}/track", status_code=status.HTTP_200_OK,
+                      dependencies=[Depends(get_current_admin)])
+async def get_vehicle_track(vehicle_id: int, start_at: UTCDateTime, end_at: UTCDateTime,
+                            session: DBSession = Depends(get_read_session)):
+    """
+    The points recorded for a vehicle in [start_at, end_at), as columns:
+    `{"vehicle_id", "count", "ts", "lat", "lon", "speed", "odometer"}`. Days older
+    than TELEMETRY_DOWNSAMPLE_AFTER_DAYS come at TELEMETRY_DOWNSAMPLE_SECONDS resolution.
+    """
+    _check_period(start_at, end_at)
+    track = await service.get_vehicle_track(session, vehicle_id, start_at, end_at)
+    return numpy_json_response({"vehicle_id": vehicle_id, "count": len(track["ts"]), **track})
+
+
+@telemetry_router.get("/{vehicle_id}/replay", status_code=status.HTTP_200_OK,
+                      dependencies=[Depends(get_current_admin)])
+async def get_vehicle_replay(vehicle_id: int, start_at: UTCDateTime, end_at: UTCDateTime,
+                             step: float = Query(10, ge=1, le=3600),
+                             session: DBSession = Depends(get_read_session)):
+    """The track interpolated every `step` seconds, skipping the gaps in the recording."""
+    _check_period(start_at, end_at)
+    replay = await service.get_vehicle_replay(session, vehicle_id, start_at, end_at, step)
+    return numpy_json_response({"vehicle_id": vehicle_id, "step": step, "count": len(replay["ts"]), **replay})
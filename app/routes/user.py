@@ -4,16 +4,17 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, status, Header
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
 # Import the User model from its correct location in the models directory
 from app.models.user import User
 
-from app.config.database import get_session
+from app.config.database import DBSession, get_session
+from app.config.rate_limit import rate_limit
+from app.config.replica import get_read_session
 from app.responses.user import UserResponse, LoginResponse
 from app.schemas.user import RegisterUserRequest, ResetRequest, VerifyUserRequest, EmailRequest
 from app.services import user
-from app.config.security import get_current_user, oauth2_scheme
+from app.config.security import get_current_user_read_only, oauth2_scheme
 
 # Router for public user actions like registration
 user_router = APIRouter(
@@ -22,12 +23,13 @@ user_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Router for protected actions that require a valid token
+# Router for protected actions that require a valid token. Each route declares
+# how it authenticates: get_current_user, or get_current_user_read_only for reads.
 auth_router = APIRouter(
     prefix="/users",
     tags=["Users"],
     responses={404: {"description": "Not found"}},
-    dependencies=[Depends(oauth2_scheme), Depends(get_current_user)]
+    dependencies=[Depends(oauth2_scheme)]
 )
 
 # Router for authentication actions like login/logout
@@ -37,41 +39,52 @@ guest_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@user_router.post("", status_code=status.HTTP_201_CREATED, response_model=UserResponse)
-async def register_user(data: RegisterUserRequest, background_tasks: BackgroundTasks, session: Session = Depends(get_session)):
+@user_router.post("", status_code=status.HTTP_201_CREATED, response_model=UserResponse,
+                  dependencies=[Depends(rate_limit("register"))])
+async def register_user(data: RegisterUserRequest, background_tasks: BackgroundTasks, session: DBSession = Depends(get_session)):
     return await user.create_user_account(data, session, background_tasks)
 
-@user_router.post("/verify", status_code=status.HTTP_200_OK)
-async def verify_user_account(data: VerifyUserRequest, background_tasks: BackgroundTasks, session: Session = Depends(get_session)):
+@user_router.post("/verify", status_code=status.HTTP_200_OK, dependencies=[Depends(rate_limit("verify"))])
+async def verify_user_account(data: VerifyUserRequest, background_tasks: BackgroundTasks, session: DBSession = Depends(get_session)):
     await user.activate_user_account(data, session, background_tasks)
     return JSONResponse(content={"message": "Account is activated successfully."})
 
 # This is the route that was causing the error. It is now fixed.
 # It correctly uses the modern Pydantic/FastAPI conventions.
-@guest_router.post("/login", status_code=status.HTTP_200_OK, response_model=LoginResponse)
-async def user_login(data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
+@guest_router.post("/login", status_code=status.HTTP_200_OK, response_model=LoginResponse,
+                   dependencies=[Depends(rate_limit("login"))])
+async def user_login(data: OAuth2PasswordRequestForm = Depends(), session: DBSession = Depends(get_session)):
     return await user.get_login_token(data, session)
 
 @guest_router.post("/refresh", status_code=status.HTTP_200_OK, response_model=LoginResponse)
-async def refresh_token(refresh_token: str = Header(), session: Session = Depends(get_session)):
+async def refresh_token(refresh_token: str = Header(), session: DBSession = Depends(get_session)):
     return await user.get_refresh_token(refresh_token, session)
 
 
-@guest_router.post("/forgot-password", status_code=status.HTTP_200_OK)
-async def forgot_password(data: EmailRequest, background_tasks: BackgroundTasks, session: Session = Depends(get_session)):
+@guest_router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(token: str = Depends(oauth2_scheme), session: DBSession = Depends(get_session)):
+    await user.revoke_access_token(token, session)
+    return JSONResponse(content={"message": "You have been logged out."})
+
+
+@guest_router.post("/forgot-password", status_code=status.HTTP_200_OK,
+                   dependencies=[Depends(rate_limit("forgot_password"))])
+async def forgot_password(data: EmailRequest, background_tasks: BackgroundTasks, session: DBSession = Depends(get_session)):
     await user.email_forgot_password_link(data, background_tasks, session)
     return JSONResponse(content={"message": "If an account with that email exists, a password reset link has been sent."})
 
-@guest_router.put("/reset-password", status_code=status.HTTP_200_OK)
-async def reset_password(data: ResetRequest, session: Session = Depends(get_session)):
+@guest_router.put("/reset-password", status_code=status.HTTP_200_OK,
+                  dependencies=[Depends(rate_limit("reset_password"))])
+async def reset_password(data: ResetRequest, session: DBSession = Depends(get_session)):
     await user.reset_user_password(data, session)
     return JSONResponse(content={"message": "Your password has been updated successfully."})
 
 @auth_router.get("/me", status_code=status.HTTP_200_OK, response_model=UserResponse)
-async def fetch_user(current_user: User = Depends(get_current_user)):
+async def fetch_user(current_user: User = Depends(get_current_user_read_only)):
     return current_user
 
 
-@auth_router.get("/{pk}", status_code=status.HTTP_200_OK, response_model=UserResponse)
-async def get_user_info(pk: int, session: Session = Depends(get_session)):
+@auth_router.get("/{pk}", status_code=status.HTTP_200_OK, response_model=UserResponse,
+                 dependencies=[Depends(get_current_user_read_only)])
+async def get_user_info(pk: int, session: DBSession = Depends(get_read_session)):
     return await user.fetch_user_detail(pk, session)
\ No newline at end of file
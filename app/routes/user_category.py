@@ -1,11 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, status
 
-from app.config.database import get_session
+from app.config.database import DBSession, get_session
+from app.config.replica import get_read_session
 from app.services import user_category as service
 # CORRECTED: Import the specific Pydantic classes you need.
-from app.schemas.user_category import UserCategoryResponse, UserCategoryCreate, UserCategoryUpdate
+from app.schemas.user_category import (
+    UserCategoryResponse, UserCategoryCreate, UserCategoryStatsResponse, UserCategoryUpdate
+)
+from app.utils.pagination import page_headers
+from app.utils.serialization import json_list_response, stream_list_response
 
 category_router = APIRouter(
     prefix="/categories",
@@ -14,22 +18,37 @@ category_router = APIRouter(
 )
 
 @category_router.post("", status_code=status.HTTP_201_CREATED, response_model=UserCategoryResponse)
-async def create_new_category(category: UserCategoryCreate, db: Session = Depends(get_session)):
-    return service.create_category(db, category)
+async def create_new_category(category: UserCategoryCreate, db: DBSession = Depends(get_session)):
+    return await service.create_category(db, category)
 
 @category_router.get("", response_model=List[UserCategoryResponse])
-async def read_all_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_session)):
-    return service.get_all_categories(db, skip, limit)
+async def read_all_categories(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=500),
+                              include_total: bool = False, skip: int = Query(0, ge=0, deprecated=True),
+                              stream: Optional[Literal["ndjson", "json"]] = None,
+                              db: DBSession = Depends(get_read_session)):
+    # Pages are keyset-paginated: pass the X-Next-Cursor header of a response as `cursor`.
+    # With `stream`, every category after `cursor` is streamed instead of one page.
+    if stream:
+        return stream_list_response(UserCategoryResponse, db, service.category_listing(cursor), stream)
+    if skip:
+        return json_list_response(UserCategoryResponse, await service.get_all_categories(db, skip, limit))
+    categories, next_cursor, total_estimate = await service.get_category_page(db, cursor, limit, include_total)
+    return json_list_response(UserCategoryResponse, categories, headers=page_headers(next_cursor, total_estimate))
+
+# Declared before /{category_id} so "stats" is not parsed as an id.
+@category_router.get("/stats", response_model=List[UserCategoryStatsResponse])
+async def read_category_stats(db: DBSession = Depends(get_read_session)):
+    return json_list_response(UserCategoryStatsResponse, await service.get_category_stats(db))
 
 @category_router.get("/{category_id}", response_model=UserCategoryResponse)
-async def read_category_by_id(category_id: int, db: Session = Depends(get_session)):
-    return service.get_category_by_id(db, category_id)
+async def read_category_by_id(category_id: int, db: DBSession = Depends(get_read_session)):
+    return await service.get_category_by_id(db, category_id)
 
 @category_router.put("/{category_id}", response_model=UserCategoryResponse)
-async def update_existing_category(category_id: int, category: UserCategoryUpdate, db: Session = Depends(get_session)):
-    return service.update_category(db, category_id, category)
+async def update_existing_category(category_id: int, category: UserCategoryUpdate, db: DBSession = Depends(get_session)):
+    return await service.update_category(db, category_id, category)
 
 @category_router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_existing_category(category_id: int, db: Session = Depends(get_session)):
-    service.delete_category(db, category_id)
+async def delete_existing_category(category_id: int, db: DBSession = Depends(get_session)):
+    await service.delete_category(db, category_id)
     return None
\ No newline at end of file
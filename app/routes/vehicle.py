@@ -0,0 +1,181 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.config.database import DBSession, get_session
+from app.config.replica import get_read_session
+from app.config.security import get_current_user, get_current_user_read_only, oauth2_scheme
+from app.models.user import User
+from app.models.vehicle import PENDING
+from app.responses.vehicle import (TripEstimateResponse, VehicleAvailabilityResponse, VehicleRequestResponse,
+                                   VehicleResponse)
+from app.routes.admin import get_current_admin, is_admin
+from app.schemas.vehicle import (UTCDateTime, VehicleCreate, VehicleRequestApprove, VehicleRequestCreate,
+                                 VehicleUpdate)
+from app.services import vehicle as service
+from app.utils.pagination import page_headers
+from app.utils.serialization import json_list_response, numpy_json_response
+
+# Listings are keyset-paginated: pass the X-Next-Cursor header of a response as `cursor`.
+vehicle_router = APIRouter(
+    prefix="/vehicles",
+    tags=["Vehicles"],
+    responses={404: {"description": "Not found"}},
+    dependencies=[Depends(oauth2_scheme)]
+)
+
+vehicle_request_router = APIRouter(
+    prefix="/vehicle-requests",
+    tags=["Vehicle Requests"],
+    responses={404: {"description": "Not found"}},
+    dependencies=[Depends(oauth2_scheme)]
+)
+
+RequestStatus = Literal["pending", "approved", "denied", "cancelled", "completed"]
+
+
+def _check_period(start_at: datetime, end_at: datetime):
+    if end_at <= start_at:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_at must be after start_at.")
+
+
+@vehicle_router.post("", status_code=status.HTTP_201_CREATED, response_model=VehicleResponse,
+                     dependencies=[Depends(get_current_admin)])
+async def create_vehicle(data: VehicleCreate, session: DBSession = Depends(get_session)):
+    return await service.create_vehicle(session, data)
+
+
+@vehicle_router.get("", status_code=status.HTTP_200_OK, response_model=List[VehicleResponse],
+                    dependencies=[Depends(get_current_user_read_only)])
+async def list_vehicles(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=500),
+                        active: Optional[bool] = None, session: DBSession = Depends(get_read_session)):
+    vehicles, next_cursor = await service.list_vehicles(session, cursor, limit, active)
+    return json_list_response(VehicleResponse, vehicles, headers=page_headers(next_cursor))
+
+
+# Declared before /{vehicle_id} so "available" is not parsed as an id.
+@vehicle_router.get("/available", status_code=status.HTTP_200_OK, response_model=List[VehicleResponse],
+                    dependencies=[Depends(get_current_user_read_only)])
+async def list_available_vehicles(start_at: UTCDateTime, end_at: UTCDateTime,
+                                  session: DBSession = Depends(get_read_session)):
+    _check_period(start_at, end_at)
+    return json_list_response(VehicleResponse, await service.list_available_vehicles(session, start_at, end_at))
+
+
+@vehicle_router.get("/{vehicle_id}", status_code=status.HTTP_200_OK, response_model=VehicleResponse,
+                    dependencies=[Depends(get_current_user_read_only)])
+async def get_vehicle(vehicle_id: int, session: DBSession = Depends(get_read_session)):
+    return await service.get_vehicle(session, vehicle_id)
+
+
+@vehicle_router.get("/{vehicle_id}/availability", status_code=status.HTTP_200_OK,
+                    response_model=VehicleAvailabilityResponse, dependencies=[Depends(get_current_user_read_only)])
+async def get_vehicle_availability(vehicle_id: int, start_at: UTCDateTime, end_at: UTCDateTime,
+                                   session: DBSession = Depends(get_read_session)):
+    _check_period(start_at, end_at)
+    vehicle, conflict_id = await service.get_vehicle_availability(session, vehicle_id, start_at, end_at)
+    return VehicleAvailabilityResponse(vehicle_id=vehicle.id, available=conflict_id is None,
+                                       conflicting_request_id=conflict_id)
+
+
+@vehicle_router.patch("/{vehicle_id}", status_code=status.HTTP_200_OK, response_model=VehicleResponse,
+                      dependencies=[Depends(get_current_admin)])
+async def update_vehicle(vehicle_id: int, data: VehicleUpdate, session: DBSession = Depends(get_session)):
+    return await service.update_vehicle(session, vehicle_id, data)
+
+
+@vehicle_router.get("/{vehicle_id}/requests", status_code=status.HTTP_200_OK,
+                    response_model=List[VehicleRequestResponse], dependencies=[Depends(get_current_admin)])
+async def list_vehicle_requests(vehicle_id: int, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                                start_from: Optional[UTCDateTime] = None, start_until: Optional[UTCDateTime] = None,
+                                session: DBSession = Depends(get_read_session)):
+    requests, next_cursor = await service.list_vehicle_requests(session, vehicle_id, cursor, limit,
+                                                                start_from, start_until)
+    return json_list_response(VehicleRequestResponse, requests, headers=page_headers(next_cursor))
+
+
+@vehicle_request_router.post("", status_code=status.HTTP_201_CREATED, response_model=VehicleRequestResponse)
+async def create_vehicle_request(data: VehicleRequestCreate, current_user: User = Depends(get_current_user),
+                                 session: DBSession = Depends(get_session)):
+    return await service.create_vehicle_request(session, current_user, data)
+
+
+@vehicle_request_router.get("", status_code=status.HTTP_200_OK, response_model=List[VehicleRequestResponse],
+                            dependencies=[Depends(get_current_admin)])
+async def list_requests(request_status: RequestStatus = Query(PENDING, alias="status"),
+                        cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                        start_from: Optional[UTCDateTime] = None, start_until: Optional[UTCDateTime] = None,
+                        session: DBSession = Depends(get_read_session)):
+    # The approval queue by default: pending requests, soonest trip first.
+    requests, next_cursor = await service.list_requests_by_status(session, request_status, cursor, limit,
+                                                                  start_from, start_until)
+    return json_list_response(VehicleRequestResponse, requests, headers=page_headers(next_cursor))
+
+
+# Declared before /{request_id} so "mine" and "summary" are not parsed as ids.
+@vehicle_request_router.get("/mine", status_code=status.HTTP_200_OK, response_model=List[VehicleRequestResponse])
+async def list_my_requests(cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                           current_user: User = Depends(get_current_user_read_only),
+                           session: DBSession = Depends(get_read_session)):
+    requests, next_cursor = await service.list_my_requests(session, current_user, cursor, limit)
+    return json_list_response(VehicleRequestResponse, requests, headers=page_headers(next_cursor))
+
+
+@vehicle_request_router.get("/summary", status_code=status.HTTP_200_OK, dependencies=[Depends(get_current_admin)])
+async def summarize_requests(start_from: UTCDateTime, start_until: UTCDateTime,
+                             group_by: Literal["day", "vehicle"] = "day",
+                             request_status: List[RequestStatus] = Query(["approved", "completed"], alias="status"),
+                             session: DBSession = Depends(get_read_session)):
+    """
+    Trips starting in [start_from, start_until) per start day or per vehicle, as columns:
+    `keys`, `requests`, `located` (those with coordinates), and their estimated
+    `distance_km` and `duration_hours`.
+    """
+    _check_period(start_from, start_until)
+    summary = await service.summarize_trips(session, group_by, start_from, start_until, request_status)
+    return numpy_json_response(summary)
+
+
+@vehicle_request_router.get("/{request_id}", status_code=status.HTTP_200_OK, response_model=VehicleRequestResponse)
+async def get_vehicle_request(request_id: int, current_user: User = Depends(get_current_user),
+                              session: DBSession = Depends(get_session)):
+    owner = None if await is_admin(current_user, session) else current_user
+    return await service.get_vehicle_request(session, request_id, owner)
+
+
+@vehicle_request_router.get("/{request_id}/trip", status_code=status.HTTP_200_OK,
+                            response_model=TripEstimateResponse)
+async def get_trip_estimate(request_id: int, current_user: User = Depends(get_current_user),
+                            session: DBSession = Depends(get_session)):
+    """Estimated road distance and driving time between the coordinates of the request."""
+    owner = None if await is_admin(current_user, session) else current_user
+    return await service.get_trip_estimate(session, request_id, owner)
+
+
+@vehicle_request_router.post("/{request_id}/approve", status_code=status.HTTP_200_OK,
+                             response_model=VehicleRequestResponse)
+async def approve_vehicle_request(request_id: int, data: Optional[VehicleRequestApprove] = None,
+                                  admin: User = Depends(get_current_admin), session: DBSession = Depends(get_session)):
+    return await service.approve_vehicle_request(session, request_id, admin, data or VehicleRequestApprove())
+
+
+@vehicle_request_router.post("/{request_id}/deny", status_code=status.HTTP_200_OK,
+                             response_model=VehicleRequestResponse)
+async def deny_vehicle_request(request_id: int, admin: User = Depends(get_current_admin),
+                               session: DBSession = Depends(get_session)):
+    return await service.deny_vehicle_request(session, request_id, admin)
+
+
+@vehicle_request_router.post("/{request_id}/cancel", status_code=status.HTTP_200_OK,
+                             response_model=VehicleRequestResponse)
+async def cancel_vehicle_request(request_id: int, current_user: User = Depends(get_current_user),
+                                 session: DBSession = Depends(get_session)):
+    return await service.cancel_vehicle_request(session, request_id, current_user,
+                                                await is_admin(current_user, session))
+
+
+@vehicle_request_router.post("/{request_id}/complete", status_code=status.HTTP_200_OK,
+                             response_model=VehicleRequestResponse, dependencies=[Depends(get_current_admin)])
+async def complete_vehicle_request(request_id: int, session: DBSession = Depends(get_session)):
+    return await service.complete_vehicle_request(session, request_id)
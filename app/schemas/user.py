@@ -1,6 +1,6 @@
+from typing import Optional
 
-
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class RegisterUserRequest(BaseModel):
@@ -20,4 +20,11 @@ class ResetRequest(BaseModel):
     token: str
     email: EmailStr
     password: str
-    
\ No newline at end of file
+
+
+class ImportUserRow(BaseModel):
+    name: str = Field(min_length=1, max_length=300)
+    email: EmailStr
+    matricule: Optional[str] = Field(None, max_length=25)
+    telephone: Optional[str] = Field(None, max_length=12)
+    category: Optional[str] = None
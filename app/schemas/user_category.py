@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 # Base schema with common attributes
 class UserCategoryBase(BaseModel):
@@ -15,8 +15,11 @@ class UserCategoryUpdate(BaseModel):
 
 # Schema for reading/returning a category (includes the database ID)
 class UserCategoryResponse(UserCategoryBase):
+    # This allows Pydantic to read data from ORM models
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
 
-    class Config:
-        # This allows Pydantic to read data from ORM models
-        from_orm = True
\ No newline at end of file
+# Schema for the category listing with membership counts
+class UserCategoryStatsResponse(UserCategoryResponse):
+    user_count: int
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from typing import Annotated, Optional
+
+from pydantic import AfterValidator, BaseModel, Field, model_validator
+
+
+def naive_utc(moment: datetime) -> datetime:
+    # Bookings are stored and compared as naive UTC; an offset is applied, then dropped.
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+UTCDateTime = Annotated[datetime, AfterValidator(naive_utc)]
+
+
+class VehicleCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=150)
+    plate_number: str = Field(min_length=1, max_length=20)
+    seats: Optional[int] = Field(None, ge=1)
+
+
+class VehicleUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=150)
+    seats: Optional[int] = Field(None, ge=1)
+    is_active: Optional[bool] = None
+
+
+class VehicleRequestCreate(BaseModel):
+    vehicle_id: Optional[int] = None
+    from_location: str = Field(min_length=1, max_length=255)
+    to_location: str = Field(min_length=1, max_length=255)
+    from_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    from_longitude: Optional[float] = Field(None, ge=-180, le=180)
+    to_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    to_longitude: Optional[float] = Field(None, ge=-180, le=180)
+    start_at: UTCDateTime
+    end_at: UTCDateTime
+    roadmap: Optional[str] = None
+    motif: str = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_period(self):
+        if self.end_at <= self.start_at:
+            raise ValueError("end_at must be after start_at.")
+        return self
+
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        coordinates = (self.from_latitude, self.from_longitude, self.to_latitude, self.to_longitude)
+        if any(value is None for value in coordinates) and any(value is not None for value in coordinates):
+            raise ValueError("Give the coordinates of both ends of the trip, or none.")
+        return self
+
+
+class VehicleRequestApprove(BaseModel):
+    # Assigns (or reassigns) the vehicle; defaults to the one requested.
+    vehicle_id: Optional[int] = None
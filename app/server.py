@@ -0,0 +1,62 @@
+"""
+Production entry point:
+
+    python -m app.server --workers 4
+
+Starts WEB_CONCURRENCY uvicorn workers on uvloop and httptools. The worker count is
+exported before the workers start, so each one sizes its database and hashing pools
+to its share (see `get_pool_limits`). On SIGTERM/SIGINT the workers stop accepting
+connections, give in-flight requests SERVER_GRACEFUL_TIMEOUT seconds to finish, then
+run the lifespan shutdown, which stops background tasks and closes pooled connections.
+"""
+import argparse
+import logging
+import os
+
+import uvicorn
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=None, help="defaults to SERVER_HOST")
+    parser.add_argument("--port", type=int, default=None, help="defaults to SERVER_PORT")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = max(1, args.workers)
+    # Must be set before the settings are first read, here and in the spawned workers.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    from app.config.database import get_pool_limits
+    from app.config.settings import get_settings
+    settings = get_settings()
+
+    # Preload the application once, so import or configuration errors stop the
+    # launcher instead of every worker failing on its own.
+    from app.main import app  # noqa: F401
+
+    limits = get_pool_limits(workers)
+    connections = workers * (limits["pool_size"] + limits["max_overflow"])
+    if connections > settings.DB_MAX_CONNECTIONS:
+        logging.warning(f"{workers} workers need at least {connections} database connections, "
+                        f"more than DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS}.")
+    logging.info(f"Starting {workers} workers, each with pool_size={limits['pool_size']} "
+                 f"max_overflow={limits['max_overflow']} and {settings.HASH_POOL_WORKERS} hashing processes.")
+
+    uvicorn.run("app.main:app",
+                host=args.host or settings.SERVER_HOST,
+                port=args.port or settings.SERVER_PORT,
+                workers=workers,
+                loop="uvloop",
+                http="httptools",
+                proxy_headers=True,
+                timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+                timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,33 +1,42 @@
+from datetime import timedelta
 from fastapi import BackgroundTasks
 from app.config.settings import get_settings
 from app.models.user import User
-from app.config.email import send_email
+from app.config.email import send_email, send_emails
 from app.utils.email_context import USER_VERIFY_ACCOUNT, FORGOT_PASSWORD
 
 settings = get_settings()
 
 
-async def send_account_verification_email(user: User, background_tasks: BackgroundTasks):
-    from app.config.security import hash_password
-    string_context = user.get_context_string(context=USER_VERIFY_ACCOUNT)
-    token = hash_password(string_context)
+async def _account_verification_message(user: User) -> dict:
+    from app.config.security import create_email_token
+    expiry = timedelta(minutes=settings.ACCOUNT_VERIFY_TOKEN_EXPIRE_MINUTES)
+    token = await create_email_token(user, USER_VERIFY_ACCOUNT, expiry)
     activate_url = f"{settings.FRONTEND_HOST}/auth/account-verify?token={token}&email={user.email}"
     data = {
         'app_name': settings.APP_NAME,
         "name": user.name,
         'activate_url': activate_url
     }
-    subject = f"Account Verification - {settings.APP_NAME}"
-    await send_email(
-        recipients=[user.email],
-        subject=subject,
-        template_name="user/account-verification.html",
-        context=data,
-        background_tasks=background_tasks
-    )
+    return {
+        "recipients": [user.email],
+        "subject": f"Account Verification - {settings.APP_NAME}",
+        "template_name": "user/account-verification.html",
+        "context": data,
+    }
+
+
+async def send_account_verification_email(user: User, background_tasks: BackgroundTasks, session=None):
+    message = await _account_verification_message(user)
+    await send_email(background_tasks=background_tasks, session=session, **message)
+
+
+async def send_account_verification_emails(users: list, background_tasks: BackgroundTasks, session=None):
+    messages = [await _account_verification_message(user) for user in users]
+    await send_emails(messages, background_tasks=background_tasks, session=session)
     
     
-async def send_account_activation_confirmation_email(user: User, background_tasks: BackgroundTasks):
+async def send_account_activation_confirmation_email(user: User, background_tasks: BackgroundTasks, session=None):
     data = {
         'app_name': settings.APP_NAME,
         "name": user.name,
@@ -39,13 +48,14 @@ async def send_account_activation_confirmation_email(user: User, background_task
         subject=subject,
         template_name="user/account-verification-confirmation.html",
         context=data,
-        background_tasks=background_tasks
+        background_tasks=background_tasks,
+        session=session
     )
     
-async def send_password_reset_email(user: User, background_tasks: BackgroundTasks):
-    from app.config.security import hash_password
-    string_context = user.get_context_string(context=FORGOT_PASSWORD)
-    token = hash_password(string_context)
+async def send_password_reset_email(user: User, background_tasks: BackgroundTasks, session=None):
+    from app.config.security import create_email_token
+    expiry = timedelta(minutes=settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
+    token = await create_email_token(user, FORGOT_PASSWORD, expiry)
     reset_url = f"{settings.FRONTEND_HOST}/reset-password?token={token}&email={user.email}"
     data = {
         'app_name': settings.APP_NAME,
@@ -58,5 +68,6 @@ async def send_password_reset_email(user: User, background_tasks: BackgroundTask
         subject=subject,
         template_name="user/password-reset.html",
         context=data,
-        background_tasks=background_tasks
+        background_tasks=background_tasks,
+        session=session
     )
\ No newline at end of file
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from sqlalchemy import select, update
+
+from app.config.database import get_sessionmaker
+from app.config.email import get_fastmail
+from app.config.settings import get_settings
+from app.config.templates import render_template
+from app.models.email_outbox import EmailOutbox
+
+settings = get_settings()
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` SMTP connections open and reuses them across sends.
+
+    Connections are opened on demand, returned to the pool after every message and
+    dropped when a send fails, so a server-side disconnect only costs one retry.
+    """
+
+    def __init__(self, config=None, size: int = None, hostname: str = None, port: int = None):
+        self.config = config or get_fastmail().config
+        self.hostname = hostname or self.config.MAIL_SERVER
+        self.port = port or self.config.MAIL_PORT
+        self._idle = []
+        self._slots = asyncio.Semaphore(size or settings.SMTP_POOL_SIZE)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        use_credentials = self.config.USE_CREDENTIALS and self.config.MAIL_USERNAME
+        client = aiosmtplib.SMTP(hostname=self.hostname, port=self.port,
+                                 username=self.config.MAIL_USERNAME if use_credentials else None,
+                                 password=self.config.MAIL_PASSWORD if use_credentials else None,
+                                 use_tls=self.config.MAIL_SSL_TLS, start_tls=self.config.MAIL_STARTTLS,
+                                 validate_certs=self.config.VALIDATE_CERTS, timeout=self.config.TIMEOUT)
+        await client.connect()
+        return client
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client = self._idle.pop()
+            if client.is_connected:
+                return client
+        return await self._connect()
+
+    async def send(self, message: EmailMessage):
+        async with self._slots:
+            for attempt in (1, 2):
+                client = await self._acquire()
+                try:
+                    await client.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # An idle connection the server already dropped; retry once on a fresh one.
+                    client.close()
+                    if attempt == 2:
+                        raise
+                    continue
+                except Exception:
+                    client.close()
+                    raise
+                self._idle.append(client)
+                return
+
+    async def close(self):
+        while self._idle:
+            client = self._idle.pop()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+def build_message(recipients: list, subject: str, template_name: str, context: dict) -> EmailMessage:
+    message = EmailMessage()
+    config = get_fastmail().config
+    message["From"] = formataddr((config.MAIL_FROM_NAME or "", config.MAIL_FROM))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message.set_content(render_template(template_name, context), subtype="html")
+    return message
+
+
+def _claim_batch(session_factory, batch_size: int) -> list:
+    """
+    Leases up to `batch_size` due messages to this worker.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so several
+    workers can drain the same table. The lease pushes `next_attempt_at` forward,
+    which makes a message due again if this worker dies before recording a result.
+    """
+    session = session_factory()
+    try:
+        now = datetime.utcnow()
+        items = session.scalars(
+            select(EmailOutbox).where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        jobs = [(item.id, item.attempts, item.recipients, item.subject, item.template_name, item.context)
+                for item in items]
+        for item in items:
+            item.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+        session.commit()
+        return jobs
+    finally:
+        session.close()
+
+
+def _record_results(session_factory, results: list):
+    session = session_factory()
+    try:
+        now = datetime.utcnow()
+        sent_ids = [outbox_id for outbox_id, _, error in results if error is None]
+        if sent_ids:
+            session.execute(update(EmailOutbox).where(EmailOutbox.id.in_(sent_ids))
+                            .values(status="sent", sent_at=now, last_error=None))
+        for outbox_id, attempts, error in results:
+            if error is None:
+                continue
+            attempts += 1
+            values = {"attempts": attempts, "last_error": error[:2000]}
+            if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                values["status"] = "failed"
+            else:
+                backoff = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** min(attempts - 1, 10)
+                values["next_attempt_at"] = now + timedelta(seconds=backoff)
+            session.execute(update(EmailOutbox).where(EmailOutbox.id == outbox_id).values(**values))
+        session.commit()
+    finally:
+        session.close()
+
+
+async def _deliver(pool: SMTPConnectionPool, job: tuple) -> tuple:
+    outbox_id, attempts, recipients, subject, template_name, context = job
+    try:
+        message = build_message(recipients, subject, template_name, context)
+        if not get_fastmail().config.SUPPRESS_SEND:
+            await pool.send(message)
+    except Exception as send_exec:
+        logging.warning(f"Outbox message {outbox_id} failed: {send_exec}")
+        return outbox_id, attempts, str(send_exec) or send_exec.__class__.__name__
+    return outbox_id, attempts, None
+
+
+async def drain_outbox(pool: SMTPConnectionPool, session_factory=None, batch_size: int = None) -> int:
+    """Sends one batch of due messages over the pooled connections. Returns the batch size."""
+    session_factory = session_factory or get_sessionmaker()
+    jobs = await asyncio.to_thread(_claim_batch, session_factory, batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not jobs:
+        return 0
+    results = await asyncio.gather(*(_deliver(pool, job) for job in jobs))
+    await asyncio.to_thread(_record_results, session_factory, results)
+    return len(jobs)
+
+
+async def run_outbox_worker(session_factory=None):
+    pool = SMTPConnectionPool()
+    try:
+        while True:
+            try:
+                drained = await drain_outbox(pool, session_factory)
+            except Exception as worker_exec:
+                logging.exception(worker_exec)
+                drained = 0
+            if drained < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_SECONDS)
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_outbox_worker())
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select
+
+from app.config.database import DBSession, get_sessionmaker, maybe_await
+from app.config.settings import get_settings
+from app.models.telemetry import TelemetryPoint
+from app.models.vehicle import Vehicle
+from app.services.vehicle import get_vehicle
+from app.utils import telemetry as codec
+from app.utils.routing import path_length, totals_by
+from app.utils.telemetry_store import DAY, SegmentStore, day_name, resample
+
+settings = get_settings()
+
+NDJSON = "ndjson"
+BINARY = "binary"
+
+# Replays do not interpolate across a longer silence than this (or than their step).
+REPLAY_MAX_GAP_SECONDS = 300
+
+
+class TelemetryBuffer:
+    """
+    Bounded in-memory buffer of validated telemetry points, as structured arrays.
+
+    Requests `offer` whole batches and never wait on the database; the flusher bulk
+    inserts the buffered points every `flush_size` points or TELEMETRY_FLUSH_SECONDS.
+    Points being flushed still count against `capacity` until they are committed,
+    so a slow database turns into 429s instead of memory growth.
+    """
+
+    def __init__(self, capacity: int, flush_size: int):
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.size = 0
+        self.accepted = 0
+        self.refused = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self.wakeup = None
+
+    def offer(self, points) -> bool:
+        """Buffers `points` whole; returns False, buffering nothing, if they do not fit."""
+        with self._lock:
+            if self.size + len(points) > self.capacity:
+                self.refused += len(points)
+                return False
+            if len(points):
+                self._chunks.append(points)
+                self.size += len(points)
+                self.accepted += len(points)
+            full = self.size >= self.flush_size
+        if full and self.wakeup is not None:
+            self.wakeup.set()
+        return True
+
+    def _take(self):
+        import numpy as np
+        with self._lock:
+            chunks, taken = [], 0
+            while self._chunks and taken < self.flush_size:
+                chunks.append(self._chunks.pop(0))
+                taken += len(chunks[-1])
+        return np.concatenate(chunks) if chunks else None
+
+    def _restore(self, points):
+        with self._lock:
+            self._chunks.insert(0, points)
+
+    def _done(self, count: int):
+        with self._lock:
+            self.size -= count
+            self.flushed += count
+
+    async def flush(self, session_factory=None) -> int:
+        """Bulk inserts everything buffered, `flush_size` points per statement; returns the points written."""
+        written = 0
+        async with self._flush_lock:
+            while (points := self._take()) is not None:
+                try:
+                    await asyncio.to_thread(_store_points, points, session_factory)
+                except Exception as flush_exec:
+                    # Kept for the next flush; the capacity check holds the backlog down meanwhile.
+                    self._restore(points)
+                    self.failed_flushes += 1
+                    logging.warning(f"Could not flush {len(points)} telemetry points: {flush_exec}")
+                    break
+                self._done(len(points))
+                written += len(points)
+        return written
+
+    def clear(self):
+        with self._lock:
+            self._chunks, self.size = [], 0
+
+    def stats(self) -> dict:
+        return {"buffered": self.size, "accepted": self.accepted, "refused": self.refused,
+                "flushed": self.flushed, "failed_flushes": self.failed_flushes}
+
+
+telemetry_buffer = TelemetryBuffer(capacity=settings.TELEMETRY_BUFFER_CAPACITY,
+                                   flush_size=settings.TELEMETRY_FLUSH_SIZE)
+
+telemetry_store = SegmentStore(settings.TELEMETRY_STORE_PATH)
+
+
+def _insert_points(points, session_factory=None):
+    with (session_factory or get_sessionmaker())() as session:
+        session.execute(insert(TelemetryPoint), codec.to_rows(points))
+        session.commit()
+
+
+def _store_points(points, session_factory=None):
+    if settings.TELEMETRY_STORAGE == "database":
+        _insert_points(points, session_factory)
+    else:
+        telemetry_store.append(points)
+
+
+async def run_telemetry_flusher(session_factory=None):
+    """Flushes the buffer when it fills up or every TELEMETRY_FLUSH_SECONDS, and once more when cancelled."""
+    telemetry_buffer.wakeup = wakeup = asyncio.Event()
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.TELEMETRY_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            # Shielded so a shutdown does not lose track of the batch being inserted:
+            # the final flush below waits for it on the flush lock.
+            await asyncio.shield(telemetry_buffer.flush(session_factory))
+    finally:
+        telemetry_buffer.wakeup = None
+        await telemetry_buffer.flush(session_factory)
+
+
+def compact_telemetry_store(now: Optional[float] = None) -> int:
+    """Downsamples the segments old enough that no late point can reach them any more."""
+    age = max(settings.TELEMETRY_DOWNSAMPLE_AFTER_DAYS * DAY, settings.TELEMETRY_MAX_AGE_SECONDS)
+    return telemetry_store.compact((time.time() if now is None else now) - age, settings.TELEMETRY_DOWNSAMPLE_SECONDS)
+
+
+async def run_telemetry_compactor():
+    while True:
+        try:
+            compacted = await asyncio.to_thread(compact_telemetry_store)
+            if compacted:
+                logging.info(f"Telemetry compactor downsampled {compacted} segments.")
+        except Exception as compact_exec:
+            logging.exception(compact_exec)
+        await asyncio.sleep(settings.TELEMETRY_COMPACT_INTERVAL_SECONDS)
+
+
+def _decode(body: bytes, payload_format: str) -> dict:
+    if payload_format == BINARY:
+        try:
+            return codec.decode_binary(body)
+        except ValueError as decode_exec:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(decode_exec))
+    return codec.decode_ndjson(body)
+
+
+def _too_many_points(body: bytes, payload_format: str) -> bool:
+    if payload_format == BINARY:
+        return len(body) // codec.point_dtype().itemsize > settings.TELEMETRY_MAX_BATCH
+    # The line count bounds the points; blank lines are only told apart when it is over the limit.
+    if body.count(b"\n") < settings.TELEMETRY_MAX_BATCH:
+        return False
+    return sum(1 for line in body.split(b"\n") if line.strip()) > settings.TELEMETRY_MAX_BATCH
+
+
+async def _known_vehicles(db: DBSession, vehicle_ids) -> list:
+    if not len(vehicle_ids):
+        return []
+    query = select(Vehicle.id).where(Vehicle.id.in_(vehicle_ids.tolist()), Vehicle.is_active.is_(True))
+    return list((await maybe_await(db.scalars(query))).all())
+
+
+async def ingest_telemetry(db: DBSession, body: bytes, payload_format: str) -> dict:
+    """
+    Validates a batch of points and buffers the valid ones for the next flush.
+
+    Invalid points (out of range, too old or in the future, unknown vehicle) are
+    counted and reported by position; the rest of the batch is still accepted.
+    """
+    import numpy as np
+    # Checked before decoding, which costs far more than counting.
+    if _too_many_points(body, payload_format):
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail=f"A batch holds at most {settings.TELEMETRY_MAX_BATCH} points.")
+    columns = _decode(body, payload_format)
+    mask = codec.validate(columns, time.time(), max_age=settings.TELEMETRY_MAX_AGE_SECONDS,
+                          max_skew=settings.TELEMETRY_MAX_SKEW_SECONDS, max_speed=settings.TELEMETRY_MAX_SPEED_KMH)
+    vehicle_ids = np.unique(columns["vehicle_id"][mask]).astype(np.int64)
+    mask &= np.isin(columns["vehicle_id"], await _known_vehicles(db, vehicle_ids))
+    points = codec.pack(columns, mask)
+    if not telemetry_buffer.offer(points):
+        retry_after = max(1, math.ceil(settings.TELEMETRY_FLUSH_SECONDS))
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail="Telemetry buffer is full, retry later.",
+                            headers={"Retry-After": str(retry_after)})
+    rejected = np.flatnonzero(~mask)
+    return {"accepted": len(points), "rejected": len(rejected), "rejected_rows": rejected[:100].tolist()}
+
+
+def epoch(moment: datetime) -> float:
+    # Naive datetimes are UTC, like the `ts` of the points.
+    return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+
+async def _database_track(db: DBSession, vehicle_id: int, start: datetime, end: datetime) -> dict:
+    import numpy as np
+    query = select(TelemetryPoint.recorded_at, TelemetryPoint.latitude, TelemetryPoint.longitude,
+                   TelemetryPoint.speed, TelemetryPoint.odometer) \
+        .where(TelemetryPoint.vehicle_id == vehicle_id, TelemetryPoint.recorded_at >= start,
+               TelemetryPoint.recorded_at < end) \
+        .order_by(TelemetryPoint.recorded_at)
+    rows = (await maybe_await(db.execute(query))).all()
+    recorded_at, lat, lon, speed, odometer = zip(*rows) if rows else ((),) * 5
+    return {"ts": np.array(recorded_at, dtype="datetime64[us]").astype(np.int64) / 1e6,
+            "lat": np.array(lat, dtype=np.float64), "lon": np.array(lon, dtype=np.float64),
+            "speed": np.array(speed, dtype=np.float64), "odometer": np.array(odometer, dtype=np.float64)}
+
+
+async def get_vehicle_track(db: DBSession, vehicle_id: int, start_at: datetime, end_at: datetime) -> dict:
+    """The columns of the points `vehicle_id` recorded in [start_at, end_at), oldest first."""
+    await get_vehicle(db, vehicle_id)
+    if settings.TELEMETRY_STORAGE == "database":
+        start, end = (datetime.fromtimestamp(epoch(moment), timezone.utc).replace(tzinfo=None)
+                      for moment in (start_at, end_at))
+        return await _database_track(db, vehicle_id, start, end)
+    return await asyncio.to_thread(telemetry_store.track, vehicle_id, epoch(start_at), epoch(end_at))
+
+
+async def get_vehicle_replay(db: DBSession, vehicle_id: int, start_at: datetime, end_at: datetime,
+                             step: float) -> dict:
+    """The track of `vehicle_id` interpolated every `step` seconds, for playback at a steady pace."""
+    track = await get_vehicle_track(db, vehicle_id, start_at, end_at)
+    return resample(track, step, max_gap=max(step, REPLAY_MAX_GAP_SECONDS))
+
+
+def _driven(start: float, end: float) -> tuple:
+    import numpy as np
+    vehicles, days, distances, points = [], [], [], []
+    # One vectorized pass per segment; a segment holds a vehicle's day.
+    for vehicle_id in telemetry_store.vehicle_ids():
+        for day, columns in telemetry_store.daily(vehicle_id, start, end):
+            vehicles.append(vehicle_id)
+            days.append(day)
+            distances.append(path_length(columns["lat"], columns["lon"]))
+            points.append(len(columns["ts"]))
+    return (np.array(vehicles, dtype=np.int64), np.array(days, dtype=np.int64),
+            np.array(distances, dtype=np.float64), np.array(points, dtype=np.int64))
+
+
+async def summarize_driven(start_at: datetime, end_at: datetime, group_by: str) -> dict:
+    """Distance driven according to the tracks of the segment store, per UTC day or per vehicle, as columns."""
+    vehicles, days, distances, points = await asyncio.to_thread(_driven, epoch(start_at), epoch(end_at))
+    keys, _, sums = totals_by(vehicles if group_by == "vehicle" else days, distance_km=distances, points=points)
+    return {"group_by": group_by,
+            "keys": keys.tolist() if group_by == "vehicle" else [day_name(day) for day in keys.tolist()],
+            "distance_km": sums["distance_km"].round(3), "points": sums["points"].astype(points.dtype)}
@@ -2,6 +2,7 @@
 
 from datetime import datetime, timedelta
 import logging
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload, Session
 from fastapi import HTTPException, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
@@ -13,61 +14,72 @@ from app.schemas.user import RegisterUserRequest, VerifyUserRequest, EmailReques
 
 # Import your models
 from app.models.user import User, UserToken
-from app.models.user_category import UserCategory 
 
 # Import your project's helper functions and settings
 from app.config.security import (
-    generate_token, get_token_payload, hash_password,
-    is_password_strong_enough, load_user, str_decode,
-    verify_password
+    generate_token, get_token_payload, invalidate_token_cache,
+    is_password_strong_enough, load_user, str_decode, str_encode,
+    verify_email_token
 )
+from app.config.hashing import hash_password_async, verify_password_async
+from app.services.user_category import get_category_id, get_category_name
+from app.services.user_token import evict_expired_sessions, expire_excess_sessions
 from app.services.email import (
     send_account_activation_confirmation_email,
     send_account_verification_email, send_password_reset_email
 )
+from app.utils.pagination import estimate_count, keyset_page, keyset_select
 from app.utils.email_context import FORGOT_PASSWORD, USER_VERIFY_ACCOUNT
 from app.utils.string import unique_string
+from app.config.database import DBSession, maybe_await, run_sync
+from app.config.events import event_broker
+from app.responses.user import UserResponse
 from app.config.settings import get_settings
 
 settings = get_settings()
 
 # --- CORRECTED SIGNATURE ---
-async def create_user_account(data: RegisterUserRequest, session: Session, background_tasks: BackgroundTasks):
-    user_exist = session.query(User).filter(User.email == data.email).first()
+async def create_user_account(data: RegisterUserRequest, session: DBSession, background_tasks: BackgroundTasks):
+    user_exist = await maybe_await(session.scalar(select(User).where(User.email == data.email)))
     if user_exist:
         raise HTTPException(status_code=400, detail="Email is already exists.")
     
     if not is_password_strong_enough(data.password):
         raise HTTPException(status_code=400, detail="Please provide a strong password.")
     
-    default_category = session.query(UserCategory).filter(UserCategory.name == "simple").first()
-    if not default_category:
+    default_category_id = await get_category_id(session, "simple")
+    if not default_category_id:
         raise HTTPException(status_code=500, detail="Default user category not configured. Please contact support.")
     
     user = User(
         name=data.name,
         email=data.email,
-        password=hash_password(data.password),
+        password=await hash_password_async(data.password),
         is_active=False,
-        user_category_id=default_category.id,
-        updated_at=datetime.utcnow()
+        user_category_id=default_category_id,
+        # Whole seconds: the verification token signs it, and MySQL rounds fractions away.
+        updated_at=datetime.utcnow().replace(microsecond=0)
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
-    
-    await send_account_verification_email(user, background_tasks=background_tasks)
+    await maybe_await(session.flush())
+    # Committed with the user: an account is never left without its verification email.
+    await send_account_verification_email(user, background_tasks=background_tasks, session=session)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(user))
+    await event_broker.publish("user.registered", UserResponse.model_validate(user).model_dump(mode="json"),
+                               admins=True)
     return user
     
 # --- CORRECTED SIGNATURE ---
-async def activate_user_account(data: VerifyUserRequest, session: Session, background_tasks: BackgroundTasks):
-    user = session.query(User).filter(User.email == data.email).first()
+async def activate_user_account(data: VerifyUserRequest, session: DBSession, background_tasks: BackgroundTasks):
+    user = await maybe_await(session.scalar(select(User).where(User.email == data.email)))
     if not user:
         raise HTTPException(status_code=400, detail="This link is not valid.")
     
-    user_token = user.get_context_string(context=USER_VERIFY_ACCOUNT)
     try:
-        token_valid = verify_password(user_token, data.token)
+        token_valid = await verify_email_token(data.token, user, USER_VERIFY_ACCOUNT)
+    except HTTPException:
+        raise
     except Exception as verify_exec:
         logging.exception(verify_exec)
         token_valid = False
@@ -78,18 +90,18 @@ async def activate_user_account(data: VerifyUserRequest, session: Session, backg
     user.updated_at = datetime.utcnow()
     user.verified_at = datetime.utcnow()
     session.add(user)
-    session.commit()
-    session.refresh(user)
-    await send_account_activation_confirmation_email(user, background_tasks)
+    await send_account_activation_confirmation_email(user, background_tasks, session=session)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(user))
     return user
 
 # --- CORRECTED SIGNATURE ---
-async def get_login_token(data: OAuth2PasswordRequestForm, session: Session):
+async def get_login_token(data: OAuth2PasswordRequestForm, session: DBSession):
     user = await load_user(data.username, session)
     if not user:
         raise HTTPException(status_code=400, detail="Email is not registered with us.")
     
-    if not verify_password(data.password, user.password):
+    if not await verify_password_async(data.password, user.password):
         raise HTTPException(status_code=400, detail="Incorrect email or password.")
     
     if not user.verified_at:
@@ -98,30 +110,39 @@ async def get_login_token(data: OAuth2PasswordRequestForm, session: Session):
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Your account has been deactivated. Please contact support.")
         
-    return _generate_tokens(user, session)
+    return await _issue_tokens(user, session)
 
 
-async def get_refresh_token(refresh_token: str, session: Session):
+async def get_refresh_token(refresh_token: str, session: DBSession):
     token_payload = get_token_payload(refresh_token, settings.SECRET_KEY, settings.JWT_ALGORITHM)
     if not token_payload:
         raise HTTPException(status_code=400, detail="Invalid Request.")
     
     refresh_key, access_key, user_id = token_payload.get('t'), token_payload.get('a'), str_decode(token_payload.get('sub'))
-    user_token = session.query(UserToken).options(
-        joinedload(UserToken.user).joinedload(User.category)
-    ).filter(
-        UserToken.refresh_key == refresh_key, UserToken.access_key == access_key,
-        UserToken.user_id == user_id, UserToken.expires_at > datetime.utcnow()
-    ).first()
+    user_token = await maybe_await(session.scalar(
+        select(UserToken).options(
+            joinedload(UserToken.user)
+        ).where(
+            UserToken.refresh_key == refresh_key, UserToken.access_key == access_key,
+            UserToken.user_id == user_id, UserToken.expires_at > datetime.utcnow()
+        )
+    ))
     
     if not user_token:
         raise HTTPException(status_code=400, detail="Invalid Request.")
     
+    rotated_token_id = user_token.id
     user_token.expires_at = datetime.utcnow()
     session.add(user_token)
-    session.commit()
+    await maybe_await(session.commit())
+    invalidate_token_cache(access_key, rotated_token_id)
     
-    return _generate_tokens(user_token.user, session)
+    return await _issue_tokens(user_token.user, session)
+
+
+async def _issue_tokens(user: User, session: DBSession):
+    # _generate_tokens stays synchronous; on an AsyncSession it runs through run_sync.
+    return await run_sync(session, lambda sync_session: _generate_tokens(user, sync_session))
 
 
 def _generate_tokens(user: User, session: Session):
@@ -134,11 +155,18 @@ def _generate_tokens(user: User, session: Session):
         access_key=access_key, expires_at=datetime.utcnow() + rt_expires
     )
     session.add(user_token)
+    expired_sessions = []
+    if settings.MAX_SESSIONS_PER_USER > 0:
+        session.flush()
+        expired_sessions = expire_excess_sessions(user.id, session, keep=settings.MAX_SESSIONS_PER_USER)
     session.commit()
+    evict_expired_sessions(expired_sessions)
 
+    category_name = get_category_name(session, user.user_category_id)
     at_payload = {
         "sub": str_encode(str(user.id)), 'a': access_key, 'r': str_encode(str(user_token.id)),
-        'n': str_encode(f"{user.name}"), 'cat': user.category.name if user.category else None
+        'n': str_encode(f"{user.name}"), 'cat': category_name,
+        'e': user.email, 'c': user.created_at.isoformat() if user.created_at else None
     }
     at_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = generate_token(at_payload, settings.JWT_SECRET, settings.JWT_ALGORITHM, at_expires)
@@ -148,36 +176,69 @@ def _generate_tokens(user: User, session: Session):
     
     return {
         "access_token": access_token, "refresh_token": refresh_token,
-        "expires_in": at_expires.seconds, "user_category": user.category.name if user.category else None
+        "expires_in": at_expires.seconds, "user_category": category_name
     }
 
+async def revoke_access_token(token: str, session: DBSession):
+    token_payload = get_token_payload(token, settings.JWT_SECRET, settings.JWT_ALGORITHM)
+    if not token_payload:
+        raise HTTPException(status_code=401, detail="Not authorised.")
+
+    access_key, user_token_id = token_payload.get('a'), str_decode(token_payload.get('r'))
+    user_token = await maybe_await(session.scalar(
+        select(UserToken).where(UserToken.id == user_token_id, UserToken.access_key == access_key,
+                                UserToken.expires_at > datetime.utcnow())
+    ))
+    if user_token:
+        user_token.expires_at = datetime.utcnow()
+        session.add(user_token)
+        await maybe_await(session.commit())
+    invalidate_token_cache(access_key, user_token_id)
+
 # --- CORRECTED SIGNATURE ---
-async def email_forgot_password_link(data: EmailRequest, background_tasks: BackgroundTasks, session: Session):
+async def email_forgot_password_link(data: EmailRequest, background_tasks: BackgroundTasks, session: DBSession):
     user = await load_user(data.email, session)
     if user and user.is_active and user.verified_at:
-        await send_password_reset_email(user, background_tasks)
+        await send_password_reset_email(user, background_tasks, session=session)
+        await maybe_await(session.commit())
     
 # --- CORRECTED SIGNATURE ---
-async def reset_user_password(data: ResetRequest, session: Session):
+async def reset_user_password(data: ResetRequest, session: DBSession):
     user = await load_user(data.email, session)
     if not user or not user.verified_at or not user.is_active:
         raise HTTPException(status_code=400, detail="Invalid request")
     
-    user_token = user.get_context_string(context=FORGOT_PASSWORD)
     try:
-        token_valid = verify_password(user_token, data.token)
+        token_valid = await verify_email_token(data.token, user, FORGOT_PASSWORD)
+    except HTTPException:
+        raise
     except Exception:
         token_valid = False
     if not token_valid:
         raise HTTPException(status_code=400, detail="Invalid window.")
     
-    user.password = hash_password(data.password)
+    user.password = await hash_password_async(data.password)
     user.updated_at = datetime.now()
     session.add(user)
-    session.commit()
+    await maybe_await(session.commit())
     
-async def fetch_user_detail(pk: int, session: Session):
-    user = session.query(User).filter(User.id == pk).first()
+async def fetch_user_detail(pk: int, session: DBSession):
+    user = await maybe_await(session.get(User, pk))
     if user:
         return user
-    raise HTTPException(status_code=404, detail="User does not exist.")
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="User does not exist.")
+
+
+async def list_users(session: DBSession, cursor: str = None, limit: int = 50, include_total: bool = False):
+    """
+    Returns `(users, next_cursor, total_estimate)` for the admin user directory, newest
+    last, keyset-paginated on `(created_at, id)`.
+    """
+    users, next_cursor = await keyset_page(session, select(User), [User.created_at, User.id], cursor, limit)
+    total_estimate = await estimate_count(session, User) if include_total else None
+    return users, next_cursor, total_estimate
+
+
+def user_listing(cursor: str = None):
+    """Statement for streaming the admin user directory after `cursor`, in page order."""
+    return keyset_select(select(User), [User.created_at, User.id], cursor)
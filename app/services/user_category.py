@@ -1,16 +1,73 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from app.config.database import DBSession, get_sessionmaker, maybe_await
+from app.config.settings import get_settings
+from app.models.user import User
 from app.models.user_category import UserCategory
 # CORRECTED: Import the specific Pydantic classes you need.
 from app.schemas.user_category import UserCategoryCreate, UserCategoryUpdate
+from app.utils.pagination import estimate_count, keyset_page, keyset_select
+from app.utils.registry import CategoryRegistry
+
+settings = get_settings()
+
+category_registry = CategoryRegistry(ttl=settings.CATEGORY_REGISTRY_TTL_SECONDS)
+
+_CATEGORY_COLUMNS = select(UserCategory.id, UserCategory.name)
+
+
+def load_category_registry(session_factory=None):
+    """Warms the registry at startup; lookups reload it lazily if the database is not reachable yet."""
+    try:
+        with (session_factory or get_sessionmaker())() as session:
+            category_registry.replace(session.execute(_CATEGORY_COLUMNS).all())
+    except Exception as load_exec:
+        logging.warning(f"Could not load user categories at startup: {load_exec}")
+
+
+async def get_category_id(db: DBSession, name: str) -> Optional[int]:
+    """
+    Returns the id of the category called `name` from the registry.
+
+    Only a stale registry, or a name this process has not seen yet, reads the table.
+    """
+    if category_registry.is_stale():
+        category_registry.replace((await maybe_await(db.execute(_CATEGORY_COLUMNS))).all())
+    category_id = category_registry.id_for(name)
+    if category_id is None:
+        row = (await maybe_await(db.execute(_CATEGORY_COLUMNS.where(UserCategory.name == name)))).first()
+        if row:
+            category_registry.put(row.id, row.name)
+            category_id = row.id
+    return category_id
+
+
+def get_category_name(db: Session, category_id: Optional[int]) -> Optional[str]:
+    """Synchronous counterpart of `get_category_id`, used while issuing tokens."""
+    if category_id is None:
+        return None
+    if category_registry.is_stale():
+        category_registry.replace(db.execute(_CATEGORY_COLUMNS).all())
+    name = category_registry.name_for(category_id)
+    if name is None:
+        row = db.execute(_CATEGORY_COLUMNS.where(UserCategory.id == category_id)).first()
+        if row:
+            category_registry.put(row.id, row.name)
+            name = row.name
+    return name
+
 
 # The rest of the file uses these classes directly
-def create_category(db: Session, category: UserCategoryCreate):
+async def create_category(db: DBSession, category: UserCategoryCreate):
     """
     Creates a new user category in the database.
     """
-    existing_category = db.query(UserCategory).filter(UserCategory.name == category.name).first()
+    existing_category = await maybe_await(db.scalar(select(UserCategory).where(UserCategory.name == category.name)))
     if existing_category:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -18,15 +75,16 @@ def create_category(db: Session, category: UserCategoryCreate):
         )
     db_category = UserCategory(name=category.name)
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(db_category))
+    category_registry.put(db_category.id, db_category.name)
     return db_category
 
-def get_category_by_id(db: Session, category_id: int):
+async def get_category_by_id(db: DBSession, category_id: int):
     """
     Fetches a single user category by its ID.
     """
-    db_category = db.query(UserCategory).filter(UserCategory.id == category_id).first()
+    db_category = await maybe_await(db.get(UserCategory, category_id))
     if not db_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -34,40 +92,71 @@ def get_category_by_id(db: Session, category_id: int):
         )
     return db_category
 
-def get_all_categories(db: Session, skip: int = 0, limit: int = 100):
+async def get_all_categories(db: DBSession, skip: int = 0, limit: int = 100):
+    """
+    Fetches all user categories with offset pagination. Kept for clients still sending `skip`.
+    """
+    result = await maybe_await(db.execute(select(UserCategory).order_by(UserCategory.id).offset(skip).limit(limit)))
+    return result.scalars().all()
+
+async def get_category_page(db: DBSession, cursor: Optional[str] = None, limit: int = 100,
+                            include_total: bool = False):
+    """
+    Fetches the page of categories after `cursor`, ordered by id.
+    Returns `(categories, next_cursor, total_estimate)`.
     """
-    Fetches all user categories with pagination.
+    categories, next_cursor = await keyset_page(db, select(UserCategory), [UserCategory.id], cursor, limit)
+    total_estimate = await estimate_count(db, UserCategory) if include_total else None
+    return categories, next_cursor, total_estimate
+
+async def get_category_stats(db: DBSession):
     """
-    return db.query(UserCategory).offset(skip).limit(limit).all()
+    Fetches every category with its number of users, counted by the database in a
+    single GROUP BY over the users.user_category_id index.
+    """
+    result = await maybe_await(db.execute(
+        select(UserCategory.id, UserCategory.name, func.count(User.id).label("user_count"))
+        .outerjoin(User, User.user_category_id == UserCategory.id)
+        .group_by(UserCategory.id, UserCategory.name)
+        .order_by(UserCategory.id)
+    ))
+    return result.all()
+
+def category_listing(cursor: Optional[str] = None):
+    """Statement for streaming every category after `cursor`, in page order."""
+    return keyset_select(select(UserCategory), [UserCategory.id], cursor)
 
-def update_category(db: Session, category_id: int, category: UserCategoryUpdate):
+async def update_category(db: DBSession, category_id: int, category: UserCategoryUpdate):
     """
     Updates an existing user category.
     """
-    db_category = get_category_by_id(db, category_id)
-    if category.name and db.query(UserCategory).filter(UserCategory.name == category.name, UserCategory.id != category_id).first():
+    db_category = await get_category_by_id(db, category_id)
+    if category.name and await maybe_await(db.scalar(
+            select(UserCategory).where(UserCategory.name == category.name, UserCategory.id != category_id))):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Category with name '{category.name}' already exists."
         )
-    update_data = category.dict(exclude_unset=True)
+    update_data = category.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_category, key, value)
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(db_category))
+    category_registry.put(db_category.id, db_category.name)
     return db_category
 
-def delete_category(db: Session, category_id: int):
+async def delete_category(db: DBSession, category_id: int):
     """
     Deletes a user category.
     """
-    db_category = get_category_by_id(db, category_id)
-    if db_category.users:
+    db_category = await get_category_by_id(db, category_id)
+    if await maybe_await(db.scalar(select(exists().where(User.user_category_id == category_id)))):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category. It is currently assigned to one or more users."
         )
-    db.delete(db_category)
-    db.commit()
+    await maybe_await(db.delete(db_category))
+    await maybe_await(db.commit())
+    category_registry.discard(category_id)
     return {"message": "Category deleted successfully."}
\ No newline at end of file
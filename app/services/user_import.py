@@ -0,0 +1,204 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi import BackgroundTasks
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.config.database import DBSession, maybe_await
+from app.config.hashing import hash_passwords_async
+from app.config.settings import get_settings
+from app.models.user import User
+from app.schemas.user import ImportUserRow
+from app.services.email import send_account_verification_emails
+from app.services.user_category import get_category_id
+from app.utils.string import unique_string
+
+settings = get_settings()
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a streamed body into lines without holding more than one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], content_format: str) -> AsyncIterator[tuple]:
+    """
+    Yields `(row, data, error)` for every record of a CSV (header first, one record
+    per line) or NDJSON body. Blank lines are skipped but still counted.
+    """
+    header = None
+    row = 0
+    async for line in lines:
+        row += 1
+        if not line.strip():
+            continue
+        if content_format == "ndjson":
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield row, None, "Invalid JSON."
+                continue
+            if not isinstance(data, dict):
+                yield row, None, "Each line must be a JSON object."
+                continue
+            yield row, data, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            continue
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}."
+            continue
+        yield row, dict(zip(header, values)), None
+
+
+def _validate(data: dict) -> tuple:
+    cleaned = {key: value.strip() if isinstance(value, str) else value for key, value in data.items()}
+    cleaned = {key: value for key, value in cleaned.items() if value not in ("", None)}
+    try:
+        return ImportUserRow.model_validate(cleaned), None
+    except ValidationError as validation_exec:
+        error = validation_exec.errors()[0]
+        return None, f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+
+
+async def _existing_emails(session: DBSession, emails: list) -> set:
+    """
+    The `emails` already registered, lowercased. The IN query follows the column's
+    collation (case-insensitive on MySQL) and keeps to the index; callers compare
+    lowercased emails so case variants count as duplicates before the unique index says so.
+    """
+    if not emails:
+        return set()
+    result = await maybe_await(session.scalars(select(User.email).where(User.email.in_(emails))))
+    return {email.lower() for email in result.all()}
+
+
+async def _insert_users(session: DBSession, users: list) -> list:
+    """Inserts `users` with one executemany, left for the caller to commit, and returns those actually created."""
+    for attempt in (1, 2):
+        try:
+            await maybe_await(session.execute(insert(User), [
+                {"first_name": user.first_name, "last_name": user.last_name, "email": user.email,
+                 "password": user.password, "matricule": user.matricule, "telephone": user.telephone,
+                 "user_category_id": user.user_category_id, "is_active": False, "updated_at": user.updated_at}
+                for user in users
+            ]))
+            break
+        except IntegrityError:
+            # Someone registered one of these emails since the duplicate check; drop them and retry.
+            await maybe_await(session.rollback())
+            if attempt == 2:
+                raise
+            taken = await _existing_emails(session, [user.email for user in users])
+            users = [user for user in users if user.email.lower() not in taken]
+            if not users:
+                return []
+
+    result = await maybe_await(session.execute(
+        select(User.email, User.id).where(User.email.in_([user.email for user in users]))
+    ))
+    ids = dict(result.all())
+    for user in users:
+        user.id = ids[user.email]
+    return users
+
+
+async def import_chunk(records: list, session: DBSession, background_tasks: BackgroundTasks) -> list:
+    """
+    Imports one chunk of `(row, data, error)` records and returns their report lines.
+
+    Emails are checked against `users` with a single IN query, generated passwords are
+    hashed across the hashing pool, new users are inserted with one executemany and
+    committed with their verification emails.
+    """
+    report = {}
+    candidates = []
+    for row, data, error in records:
+        record = None
+        if error is None:
+            record, error = _validate(data)
+        if record is not None:
+            category_id = await get_category_id(session, record.category or "simple")
+            if category_id is None:
+                error = f"Unknown category '{record.category or 'simple'}'."
+            else:
+                candidates.append((row, record, category_id))
+        if error is not None:
+            report[row] = {"row": row, "status": "invalid", "error": error}
+
+    existing = await _existing_emails(session, [record.email for _, record, _ in candidates])
+    new_rows = []
+    for row, record, category_id in candidates:
+        if record.email.lower() in existing:
+            report[row] = {"row": row, "email": record.email, "status": "duplicate"}
+            continue
+        existing.add(record.email.lower())
+        new_rows.append((row, record, category_id))
+
+    passwords = await hash_passwords_async([unique_string(16) for _ in new_rows])
+    updated_at = datetime.utcnow().replace(microsecond=0)
+    users = [User(name=record.name, email=record.email, matricule=record.matricule, telephone=record.telephone,
+                  user_category_id=category_id, password=password, updated_at=updated_at)
+             for (_, record, category_id), password in zip(new_rows, passwords)]
+    created = {user.email: user for user in (await _insert_users(session, users) if users else [])}
+    if created:
+        await send_account_verification_emails(list(created.values()), background_tasks, session=session)
+        # The users and their verification emails in one transaction.
+        await maybe_await(session.commit())
+
+    for row, record, _ in new_rows:
+        user: Optional[User] = created.get(record.email)
+        report[row] = ({"row": row, "email": record.email, "status": "created", "id": user.id} if user else
+                       {"row": row, "email": record.email, "status": "duplicate"})
+    return [report[row] for row in sorted(report)]
+
+
+async def import_users(chunks: AsyncIterator[bytes], content_format: str, session: DBSession,
+                       background_tasks: BackgroundTasks) -> AsyncIterator[dict]:
+    """
+    Streams a bulk user import, yielding one report line per record and a final summary.
+
+    Records are processed USER_IMPORT_CHUNK_SIZE at a time, so memory stays flat
+    whatever the size of the upload.
+    """
+    summary = {"created": 0, "duplicate": 0, "invalid": 0}
+    batch = []
+
+    async def flush():
+        for line in await import_chunk(batch, session, background_tasks):
+            summary[line["status"]] += 1
+            yield line
+        batch.clear()
+
+    async for record in iter_records(iter_lines(chunks), content_format):
+        batch.append(record)
+        if len(batch) >= settings.USER_IMPORT_CHUNK_SIZE:
+            async for line in flush():
+                yield line
+    if batch:
+        async for line in flush():
+            yield line
+    yield {"summary": summary}
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.config.database import get_sessionmaker
+from app.config.security import invalidate_token_cache
+from app.config.settings import get_settings
+from app.models.user import UserToken
+
+settings = get_settings()
+
+
+def expire_excess_sessions(user_id: int, session: Session, keep: int) -> list:
+    """
+    Expires the oldest live tokens of a user beyond the newest `keep` ones.
+
+    Must run after the new token has been flushed. Returns the expired
+    `(access_key, id)` pairs so the caller can evict them from the token cache
+    once the transaction is committed.
+    """
+    now = datetime.utcnow()
+    excess = session.scalars(
+        select(UserToken).where(UserToken.user_id == user_id, UserToken.expires_at > now)
+        .order_by(UserToken.id.desc()).offset(keep)
+    ).all()
+    for user_token in excess:
+        user_token.expires_at = now
+    return [(user_token.access_key, user_token.id) for user_token in excess]
+
+
+def evict_expired_sessions(expired: list):
+    for access_key, user_token_id in expired:
+        invalidate_token_cache(access_key, user_token_id)
+
+
+def purge_expired_tokens(session: Session, retention: timedelta, batch_size: int) -> int:
+    """
+    Deletes tokens that expired (or were rotated) more than `retention` ago.
+
+    Works in batches of `batch_size` rows, each in its own transaction, so the
+    table is never locked for long.
+    """
+    cutoff = datetime.utcnow() - retention
+    deleted = 0
+    while True:
+        ids = session.scalars(
+            select(UserToken.id).where(UserToken.expires_at < cutoff).order_by(UserToken.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        session.execute(delete(UserToken).where(UserToken.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def _purge_once() -> int:
+    session = get_sessionmaker()()
+    try:
+        return purge_expired_tokens(session,
+                                    retention=timedelta(minutes=settings.TOKEN_REAPER_RETENTION_MINUTES),
+                                    batch_size=settings.TOKEN_REAPER_BATCH_SIZE)
+    finally:
+        session.close()
+
+
+async def run_token_reaper():
+    while True:
+        try:
+            deleted = await asyncio.to_thread(_purge_once)
+            if deleted:
+                logging.info(f"Token reaper removed {deleted} expired user tokens.")
+        except Exception as reaper_exec:
+            logging.exception(reaper_exec)
+        await asyncio.sleep(settings.TOKEN_REAPER_INTERVAL_SECONDS)
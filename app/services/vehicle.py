@@ -0,0 +1,318 @@
+import logging
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from app.config.database import DBSession, get_sessionmaker, maybe_await
+from app.config.events import event_broker
+from app.config.settings import get_settings
+from app.models.user import User
+from app.models.vehicle import APPROVED, CANCELLED, COMPLETED, DENIED, PENDING, Vehicle, VehicleRequest
+from app.responses.vehicle import TripEstimateResponse, VehicleRequestResponse
+from app.schemas.vehicle import VehicleCreate, VehicleRequestApprove, VehicleRequestCreate, VehicleUpdate
+from app.utils.intervals import AvailabilityIndex
+from app.utils.pagination import keyset_page
+from app.utils.routing import RouteCache, totals_by
+
+settings = get_settings()
+
+availability_index = AvailabilityIndex(ttl=settings.VEHICLE_AVAILABILITY_TTL_SECONDS)
+
+route_cache = RouteCache(maxsize=settings.ROUTING_CACHE_SIZE, detour=settings.ROUTING_DETOUR_FACTOR,
+                         speed_profile=settings.ROUTING_SPEED_PROFILE)
+
+_BY_ID = [Vehicle.id]
+_BY_CREATED = [VehicleRequest.created_at, VehicleRequest.id]
+_BY_START = [VehicleRequest.start_at, VehicleRequest.id]
+_COORDINATES = (VehicleRequest.from_latitude, VehicleRequest.from_longitude,
+                VehicleRequest.to_latitude, VehicleRequest.to_longitude)
+
+
+def _bookings():
+    # Bookings still running or ahead; booking times are naive UTC, see app.schemas.vehicle.
+    return select(VehicleRequest.id, VehicleRequest.vehicle_id, VehicleRequest.start_at, VehicleRequest.end_at) \
+        .where(VehicleRequest.status == APPROVED, VehicleRequest.end_at > datetime.utcnow())
+
+
+def load_availability_index(session_factory=None):
+    """Warms the index at startup; queries reload it lazily if the database is not reachable yet."""
+    try:
+        with (session_factory or get_sessionmaker())() as session:
+            availability_index.replace(session.execute(_bookings()).all())
+    except Exception as load_exec:
+        logging.warning(f"Could not load vehicle bookings at startup: {load_exec}")
+
+
+async def _fresh_availability_index(db: DBSession) -> AvailabilityIndex:
+    if availability_index.is_stale():
+        availability_index.replace((await maybe_await(db.execute(_bookings()))).all())
+    return availability_index
+
+
+async def create_vehicle(db: DBSession, data: VehicleCreate):
+    if await maybe_await(db.scalar(select(Vehicle.id).where(Vehicle.plate_number == data.plate_number))):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Vehicle with plate number '{data.plate_number}' already exists.")
+    vehicle = Vehicle(**data.model_dump())
+    db.add(vehicle)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle))
+    return vehicle
+
+
+async def get_vehicle(db: DBSession, vehicle_id: int):
+    vehicle = await maybe_await(db.get(Vehicle, vehicle_id))
+    if not vehicle:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Vehicle with ID {vehicle_id} not found.")
+    return vehicle
+
+
+async def update_vehicle(db: DBSession, vehicle_id: int, data: VehicleUpdate):
+    vehicle = await get_vehicle(db, vehicle_id)
+    for key, value in data.model_dump(exclude_unset=True).items():
+        setattr(vehicle, key, value)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle))
+    return vehicle
+
+
+async def list_vehicles(db: DBSession, cursor: Optional[str] = None, limit: int = 100, active: Optional[bool] = None):
+    stmt = select(Vehicle)
+    if active is not None:
+        stmt = stmt.where(Vehicle.is_active == active)
+    return await keyset_page(db, stmt, _BY_ID, cursor, limit)
+
+
+async def create_vehicle_request(db: DBSession, requester: User, data: VehicleRequestCreate):
+    if data.vehicle_id is not None:
+        await _get_active_vehicle(db, data.vehicle_id)
+    vehicle_request = VehicleRequest(requester_id=requester.id, status=PENDING, **data.model_dump())
+    db.add(vehicle_request)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle_request))
+    await _publish_change(vehicle_request, "vehicle_request.created")
+    return vehicle_request
+
+
+async def get_vehicle_request(db: DBSession, request_id: int, user: Optional[User] = None, lock: bool = False):
+    """
+    Fetches a request; when `user` is given, only if they made it (others get a 404).
+
+    With `lock`, the row is read with FOR UPDATE, for status transitions: a concurrent
+    one waits for this transaction and then sees its outcome instead of overwriting it.
+    """
+    if lock:
+        stmt = select(VehicleRequest).where(VehicleRequest.id == request_id).with_for_update() \
+            .execution_options(populate_existing=True)
+        vehicle_request = await maybe_await(db.scalar(stmt))
+    else:
+        vehicle_request = await maybe_await(db.get(VehicleRequest, request_id))
+    if not vehicle_request or (user is not None and vehicle_request.requester_id != user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Vehicle request with ID {request_id} not found.")
+    return vehicle_request
+
+
+async def list_my_requests(db: DBSession, user: User, cursor: Optional[str] = None, limit: int = 50):
+    """The requests made by `user`, newest first, over the (requester_id, created_at, id) index."""
+    stmt = select(VehicleRequest).where(VehicleRequest.requester_id == user.id)
+    return await keyset_page(db, stmt, _BY_CREATED, cursor, limit, descending=True)
+
+
+def _in_period(stmt, start_from: Optional[datetime], start_until: Optional[datetime]):
+    if start_from is not None:
+        stmt = stmt.where(VehicleRequest.start_at >= start_from)
+    if start_until is not None:
+        stmt = stmt.where(VehicleRequest.start_at < start_until)
+    return stmt
+
+
+async def list_requests_by_status(db: DBSession, request_status: str = PENDING, cursor: Optional[str] = None,
+                                  limit: int = 50, start_from: Optional[datetime] = None,
+                                  start_until: Optional[datetime] = None):
+    """Requests in `request_status` by start date, over the (status, start_at, id) index."""
+    stmt = _in_period(select(VehicleRequest).where(VehicleRequest.status == request_status), start_from, start_until)
+    return await keyset_page(db, stmt, _BY_START, cursor, limit)
+
+
+async def list_vehicle_requests(db: DBSession, vehicle_id: int, cursor: Optional[str] = None, limit: int = 50,
+                                start_from: Optional[datetime] = None, start_until: Optional[datetime] = None):
+    """A vehicle's requests by start date, over the (vehicle_id, start_at, id) index."""
+    await get_vehicle(db, vehicle_id)
+    stmt = _in_period(select(VehicleRequest).where(VehicleRequest.vehicle_id == vehicle_id), start_from, start_until)
+    return await keyset_page(db, stmt, _BY_START, cursor, limit)
+
+
+async def _get_active_vehicle(db: DBSession, vehicle_id: int, lock: bool = False):
+    stmt = select(Vehicle).where(Vehicle.id == vehicle_id)
+    if lock:
+        stmt = stmt.with_for_update()
+    vehicle = await maybe_await(db.scalar(stmt))
+    if not vehicle or not vehicle.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Vehicle with ID {vehicle_id} is not available.")
+    return vehicle
+
+
+async def find_conflict(db: DBSession, vehicle_id: int, start_at: datetime, end_at: datetime,
+                        exclude_id: Optional[int] = None) -> Optional[int]:
+    """
+    Returns the id of an approved request booking `vehicle_id` within [start_at, end_at), if any.
+
+    Approved bookings of a vehicle never overlap, so only the last one starting before
+    `end_at` can reach past `start_at`: a backwards seek on the (vehicle_id, start_at, id)
+    index instead of a scan over the vehicle's whole history.
+
+    A locking read: under REPEATABLE READ a plain SELECT would answer from the snapshot
+    the transaction took at its first read, missing approvals committed since.
+    """
+    stmt = select(VehicleRequest.id, VehicleRequest.end_at).where(VehicleRequest.vehicle_id == vehicle_id,
+                                                                 VehicleRequest.status == APPROVED,
+                                                                 VehicleRequest.start_at < end_at)
+    if exclude_id is not None:
+        stmt = stmt.where(VehicleRequest.id != exclude_id)
+    row = (await maybe_await(db.execute(
+        stmt.order_by(VehicleRequest.start_at.desc(), VehicleRequest.id.desc()).limit(1).with_for_update()
+    ))).first()
+    return row.id if row is not None and row.end_at > start_at else None
+
+
+async def get_vehicle_availability(db: DBSession, vehicle_id: int, start_at: datetime, end_at: datetime):
+    """Returns `(vehicle, conflicting_request_id)` for [start_at, end_at) from the availability index."""
+    vehicle = await get_vehicle(db, vehicle_id)
+    index = await _fresh_availability_index(db)
+    return vehicle, index.conflict(vehicle_id, start_at, end_at)
+
+
+async def list_available_vehicles(db: DBSession, start_at: datetime, end_at: datetime):
+    """The active vehicles with no approved booking in [start_at, end_at)."""
+    index = await _fresh_availability_index(db)
+    result = await maybe_await(db.execute(select(Vehicle).where(Vehicle.is_active.is_(True)).order_by(Vehicle.id)))
+    vehicles = result.scalars().all()
+    free_ids = set(index.free_vehicles((vehicle.id for vehicle in vehicles), start_at, end_at))
+    return [vehicle for vehicle in vehicles if vehicle.id in free_ids]
+
+
+async def _publish_change(vehicle_request: VehicleRequest, event_type: str = "vehicle_request.updated"):
+    # Pushed to the requester's and the admins' dashboards, see app.routes.events.
+    await event_broker.publish(event_type,
+                               VehicleRequestResponse.model_validate(vehicle_request).model_dump(mode="json"),
+                               users=[vehicle_request.requester_id], admins=True)
+
+
+def _check_status(vehicle_request: VehicleRequest, *allowed: str):
+    if vehicle_request.status not in allowed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Vehicle request is {vehicle_request.status}.")
+
+
+def _review(vehicle_request: VehicleRequest, reviewer: User, new_status: str):
+    vehicle_request.status = new_status
+    vehicle_request.reviewed_by_id = reviewer.id
+    vehicle_request.reviewed_at = datetime.utcnow()
+
+
+async def approve_vehicle_request(db: DBSession, request_id: int, reviewer: User, data: VehicleRequestApprove):
+    """
+    Approves a pending request for its requested vehicle or `data.vehicle_id`.
+
+    The request and vehicle rows are locked for the checks, so two approvals of
+    overlapping trips for the same vehicle cannot both pass them, nor an approval
+    overwrite a cancellation.
+    """
+    vehicle_request = await get_vehicle_request(db, request_id, lock=True)
+    _check_status(vehicle_request, PENDING)
+    vehicle_id = data.vehicle_id or vehicle_request.vehicle_id
+    if vehicle_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Assign a vehicle to approve the request.")
+    await _get_active_vehicle(db, vehicle_id, lock=True)
+    conflict_id = await find_conflict(db, vehicle_id, vehicle_request.start_at, vehicle_request.end_at,
+                                      exclude_id=vehicle_request.id)
+    if conflict_id is not None:
+        await maybe_await(db.rollback())
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Vehicle is already booked by request {conflict_id} in that period.")
+    vehicle_request.vehicle_id = vehicle_id
+    _review(vehicle_request, reviewer, APPROVED)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle_request))
+    if not availability_index.add(vehicle_request.id, vehicle_id, vehicle_request.start_at, vehicle_request.end_at):
+        # The index missed a cancellation made by another worker; the database just ruled.
+        availability_index.clear()
+    await _publish_change(vehicle_request)
+    return vehicle_request
+
+
+async def deny_vehicle_request(db: DBSession, request_id: int, reviewer: User):
+    vehicle_request = await get_vehicle_request(db, request_id, lock=True)
+    _check_status(vehicle_request, PENDING)
+    _review(vehicle_request, reviewer, DENIED)
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle_request))
+    await _publish_change(vehicle_request)
+    return vehicle_request
+
+
+async def cancel_vehicle_request(db: DBSession, request_id: int, user: User, is_admin: bool = False):
+    """Cancels a pending or approved request; only its requester or an admin may."""
+    vehicle_request = await get_vehicle_request(db, request_id, None if is_admin else user, lock=True)
+    _check_status(vehicle_request, PENDING, APPROVED)
+    vehicle_request.status = CANCELLED
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle_request))
+    availability_index.discard(vehicle_request.id)
+    await _publish_change(vehicle_request)
+    return vehicle_request
+
+
+async def complete_vehicle_request(db: DBSession, request_id: int):
+    vehicle_request = await get_vehicle_request(db, request_id, lock=True)
+    _check_status(vehicle_request, APPROVED)
+    vehicle_request.status = COMPLETED
+    await maybe_await(db.commit())
+    await maybe_await(db.refresh(vehicle_request))
+    availability_index.discard(vehicle_request.id)
+    await _publish_change(vehicle_request)
+    return vehicle_request
+
+
+async def get_trip_estimate(db: DBSession, request_id: int, user: Optional[User] = None) -> TripEstimateResponse:
+    vehicle_request = await get_vehicle_request(db, request_id, user)
+    distance, duration = route_cache.trip(*(getattr(vehicle_request, column.key) for column in _COORDINATES))
+    if distance is None:
+        return TripEstimateResponse(request_id=vehicle_request.id)
+    return TripEstimateResponse(request_id=vehicle_request.id, distance_km=round(distance, 3),
+                                duration_minutes=round(duration / 60, 3))
+
+
+async def summarize_trips(db: DBSession, group_by: str, start_from: datetime, start_until: datetime,
+                          statuses: Sequence[str]) -> dict:
+    """
+    Requests, estimated distance and driving time per start day or per vehicle, as
+    columns. The rows are fetched as tuples and turned into arrays: the estimates
+    take one vectorized pass and the totals one `bincount` per measure.
+    """
+    import numpy as np
+    stmt = _in_period(select(VehicleRequest.vehicle_id, VehicleRequest.start_at, *_COORDINATES)
+                      .where(VehicleRequest.status.in_(statuses)), start_from, start_until)
+    if group_by == "vehicle":
+        stmt = stmt.where(VehicleRequest.vehicle_id.is_not(None))
+    rows = (await maybe_await(db.execute(stmt))).all()
+    if not rows:
+        return {"group_by": group_by, "keys": [], "requests": [], "located": [], "distance_km": [],
+                "duration_hours": []}
+    vehicle_id, start_at, *coordinates = zip(*rows)
+    coordinates = np.array(coordinates, dtype=np.float64)
+    distance, duration = route_cache.estimate(*coordinates)
+    if group_by == "vehicle":
+        keys = np.array(vehicle_id, dtype=np.int64)
+    else:
+        keys = np.array(start_at, dtype="datetime64[D]")
+    distinct, requests, sums = totals_by(keys, distance_km=distance, duration_hours=duration / 3600,
+                                         located=~np.isnan(distance))
+    return {"group_by": group_by,
+            "keys": distinct.tolist() if group_by == "vehicle" else np.datetime_as_string(distinct).tolist(),
+            "requests": requests, "located": sums["located"].astype(np.int64),
+            "distance_km": sums["distance_km"].round(3), "duration_hours": sums["duration_hours"].round(3)}
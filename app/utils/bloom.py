@@ -0,0 +1,64 @@
+import hashlib
+import math
+import threading
+import time
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings using double hashing on blake2b."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RotatingBloomFilter:
+    """
+    Two Bloom filter generations swapped every `window` seconds.
+
+    A key stays visible for at least `window` seconds after it was added, which is
+    all a revocation list needs when `window` is the lifetime of what is revoked.
+    """
+
+    def __init__(self, capacity: int, window: float, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.window = window
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._previous = BloomFilter(self.capacity, self.error_rate)
+            self._rotated_at = time.monotonic()
+
+    def _rotate(self):
+        if time.monotonic() - self._rotated_at >= self.window:
+            with self._lock:
+                if time.monotonic() - self._rotated_at >= self.window:
+                    self._previous = self._current
+                    self._current = BloomFilter(self.capacity, self.error_rate)
+                    self._rotated_at = time.monotonic()
+
+    def add(self, key: str):
+        self._rotate()
+        self._current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._rotate()
+        return key in self._current or key in self._previous
@@ -0,0 +1,111 @@
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+
+class _Schedule:
+    """One vehicle's bookings sorted by start, as parallel lists."""
+
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts, self.ends, self.ids = [], [], []
+
+    def conflict(self, start: datetime, end: datetime) -> Optional[int]:
+        # Bookings never overlap, so their ends are sorted too: only the last booking
+        # starting before `end` can reach past `start`.
+        index = bisect.bisect_left(self.starts, end)
+        if index and self.ends[index - 1] > start:
+            return self.ids[index - 1]
+        return None
+
+    def insert(self, request_id: int, start: datetime, end: datetime):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.ids.insert(index, request_id)
+
+    def remove(self, request_id: int, start: datetime):
+        index = bisect.bisect_left(self.starts, start)
+        while index < len(self.ids) and self.starts[index] == start:
+            if self.ids[index] == request_id:
+                del self.starts[index], self.ends[index], self.ids[index]
+                return
+            index += 1
+
+
+class AvailabilityIndex:
+    """
+    In-process schedule of the approved bookings of every vehicle.
+
+    Answers "is vehicle V free in [start, end)" with one bisect, and "which of these
+    vehicles are free" with one per vehicle, without reading vehicle_requests. The
+    vehicle service writes through on every approve, cancel and complete made by this
+    process; bookings made by other workers are picked up when the index goes stale
+    after `ttl` seconds and is reloaded. The database check on approval stays the
+    final word.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._schedules = {}
+        self._bookings = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def replace(self, bookings: Iterable[Tuple[int, int, datetime, datetime]]):
+        """Loads `(request_id, vehicle_id, start, end)` bookings, dropping any that overlap an earlier one."""
+        schedules, by_request = {}, {}
+        for request_id, vehicle_id, start, end in sorted(bookings, key=lambda booking: booking[2]):
+            schedule = schedules.setdefault(vehicle_id, _Schedule())
+            conflict_id = schedule.conflict(start, end)
+            if conflict_id is not None:
+                logging.warning(f"Vehicle request {request_id} overlaps approved request {conflict_id}, not indexed.")
+                continue
+            schedule.insert(request_id, start, end)
+            by_request[request_id] = (vehicle_id, start)
+        with self._lock:
+            self._schedules, self._bookings = schedules, by_request
+            self._loaded_at = time.monotonic()
+
+    def add(self, request_id: int, vehicle_id: int, start: datetime, end: datetime) -> bool:
+        """Books [start, end) on `vehicle_id`; returns False, booking nothing, if it overlaps a booking."""
+        with self._lock:
+            self._discard(request_id)
+            schedule = self._schedules.setdefault(vehicle_id, _Schedule())
+            if schedule.conflict(start, end) is not None:
+                return False
+            schedule.insert(request_id, start, end)
+            self._bookings[request_id] = (vehicle_id, start)
+            return True
+
+    def _discard(self, request_id: int):
+        booking = self._bookings.pop(request_id, None)
+        if booking is not None:
+            vehicle_id, start = booking
+            self._schedules[vehicle_id].remove(request_id, start)
+
+    def discard(self, request_id: int):
+        with self._lock:
+            self._discard(request_id)
+
+    def clear(self):
+        with self._lock:
+            self._schedules, self._bookings, self._loaded_at = {}, {}, None
+
+    def conflict(self, vehicle_id: int, start: datetime, end: datetime) -> Optional[int]:
+        """Returns the request booking `vehicle_id` within [start, end), if any."""
+        schedule = self._schedules.get(vehicle_id)
+        return schedule.conflict(start, end) if schedule is not None else None
+
+    def is_free(self, vehicle_id: int, start: datetime, end: datetime) -> bool:
+        return self.conflict(vehicle_id, start, end) is None
+
+    def free_vehicles(self, vehicle_ids: Iterable[int], start: datetime, end: datetime) -> List[int]:
+        return [vehicle_id for vehicle_id in vehicle_ids if self.conflict(vehicle_id, start, end) is None]
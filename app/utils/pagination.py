@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, func, or_, select, text
+
+from app.config.database import DBSession, maybe_await
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Estimate"
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values],
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """Decodes a cursor made by `encode_cursor` back into values comparable with `columns`."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(value) if column.type.python_type is datetime else value
+                for column, value in zip(columns, values)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _after(columns: Sequence, values: Sequence, descending: bool = False):
+    # (a, b) > (x, y) spelled out, so every backend can seek on the composite index.
+    clauses = []
+    for index, column in enumerate(columns):
+        equal = [columns[i] == values[i] for i in range(index)]
+        clauses.append(and_(*equal, column < values[index] if descending else column > values[index]))
+    return or_(*clauses)
+
+
+def keyset_select(stmt: Select, columns: Sequence, cursor: Optional[str], descending: bool = False) -> Select:
+    """Orders `stmt` by `columns`, descending if asked, and starts it after `cursor`, if given."""
+    if cursor:
+        stmt = stmt.where(_after(columns, decode_cursor(cursor, columns), descending))
+    return stmt.order_by(*(column.desc() for column in columns) if descending else columns)
+
+
+async def keyset_page(db: DBSession, stmt: Select, columns: Sequence, cursor: Optional[str], limit: int,
+                      descending: bool = False):
+    """
+    Returns `(rows, next_cursor)` for the page of `stmt` that follows `cursor`.
+
+    Rows are ordered by `columns`, which must end with a unique column, and the page
+    seeks past the last row of the previous one instead of using OFFSET, so every page
+    costs the same index range scan as the first. `next_cursor` is None on the last page.
+    With `descending`, the index is walked backwards (newest first).
+    """
+    stmt = keyset_select(stmt, columns, cursor, descending)
+    result = await maybe_await(db.execute(stmt.limit(limit + 1)))
+    rows = result.scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+
+async def estimate_count(db: DBSession, model) -> int:
+    """
+    Returns the approximate row count of `model`'s table.
+
+    On MySQL this is the optimizer statistic from information_schema, which costs
+    nothing regardless of the table size; other backends fall back to COUNT(*).
+    """
+    bind = db.get_bind()
+    if bind.dialect.name == "mysql":
+        estimate = await maybe_await(db.scalar(text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+        ), {"table": model.__tablename__}))
+        return int(estimate or 0)
+    return await maybe_await(db.scalar(select(func.count()).select_from(model)))
+
+
+def page_headers(next_cursor: Optional[str], total_estimate: Optional[int] = None) -> dict:
+    headers = {}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total_estimate is not None:
+        headers[TOTAL_ESTIMATE_HEADER] = str(total_estimate)
+    return headers
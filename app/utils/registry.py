@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+
+class CategoryRegistry:
+    """
+    In-process map of user categories, by id and by name.
+
+    Categories almost never change, so login and registration read them from here
+    instead of the user_categories table. The category service writes through on
+    every change made by this process; changes made by other workers are picked up
+    when the registry goes stale after `ttl` seconds and is reloaded.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._names = {}
+        self._ids = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def replace(self, categories: Iterable[Tuple[int, str]]):
+        names = {category_id: name for category_id, name in categories}
+        with self._lock:
+            self._names = names
+            self._ids = {name: category_id for category_id, name in names.items()}
+            self._loaded_at = time.monotonic()
+
+    def put(self, category_id: int, name: str):
+        with self._lock:
+            previous = self._names.get(category_id)
+            if previous is not None:
+                self._ids.pop(previous, None)
+            self._names[category_id] = name
+            self._ids[name] = category_id
+
+    def discard(self, category_id: int):
+        with self._lock:
+            name = self._names.pop(category_id, None)
+            if name is not None:
+                self._ids.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._names, self._ids, self._loaded_at = {}, {}, None
+
+    def name_for(self, category_id: int) -> Optional[str]:
+        return self._names.get(category_id)
+
+    def id_for(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
@@ -0,0 +1,77 @@
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import DBSession
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model) -> TypeAdapter:
+    # Built once per response model; building a TypeAdapter compiles its validator and serializer.
+    return TypeAdapter(List[model])
+
+
+def json_list_response(model, items: list, headers: Optional[dict] = None) -> Response:
+    """
+    Serializes `items` (ORM objects) as a JSON list of `model` in one pass of the
+    precompiled pydantic core, skipping FastAPI's per-item validation and
+    `jsonable_encoder` walk.
+    """
+    adapter = list_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def numpy_json_response(content: dict) -> Response:
+    """Serializes `content` with orjson, NumPy arrays straight from their buffers (NaN becomes null)."""
+    return Response(orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
+
+
+async def iter_partitions(db: DBSession, stmt: Select, batch_size: int) -> AsyncIterator[list]:
+    """Yields the ORM rows of `stmt` in lists of `batch_size`, fetched from a server-side cursor."""
+    stmt = stmt.execution_options(yield_per=batch_size)
+    if isinstance(db, AsyncSession):
+        result = await db.stream_scalars(stmt)
+        async for partition in result.partitions():
+            yield partition
+        return
+    for partition in db.scalars(stmt).partitions():
+        yield partition
+
+
+async def _encode(model, partitions: AsyncIterator[list], stream_format: str) -> AsyncIterator[bytes]:
+    adapter = list_adapter(model)
+    first = True
+    if stream_format == "json":
+        yield b"["
+    async for partition in partitions:
+        items = adapter.validate_python(partition, from_attributes=True)
+        if stream_format == "json":
+            # Strip the list brackets so the partitions join into a single array.
+            yield (b"" if first else b",") + adapter.dump_json(items)[1:-1]
+        else:
+            yield b"".join(model.__pydantic_serializer__.to_json(item) + b"\n" for item in items)
+        first = False
+    if stream_format == "json":
+        yield b"]"
+
+
+def stream_list_response(model, db: DBSession, stmt: Select, stream_format: str,
+                         batch_size: int = 500) -> StreamingResponse:
+    """
+    Streams every row of `stmt` as NDJSON or as one JSON array, serializing each
+    batch as it is fetched instead of materializing the whole collection.
+    """
+    return StreamingResponse(_encode(model, iter_partitions(db, stmt, batch_size), stream_format),
+                             media_type=STREAM_FORMATS[stream_format])
@@ -0,0 +1,111 @@
+"""
+Wire formats and vectorized validation of GPS telemetry batches.
+
+A batch is decoded into one NumPy column per field and validated with array
+operations over the whole batch, instead of building a pydantic model per point.
+numpy is imported on first use, so it does not weigh on the app's import time.
+"""
+from functools import lru_cache
+
+import orjson
+
+FIELDS = ("vehicle_id", "ts", "lat", "lon", "speed", "odometer")
+
+
+@lru_cache()
+def point_dtype():
+    """
+    One point of the binary format: little-endian, packed, 40 bytes.
+
+    `ts` is seconds since the epoch (UTC), `speed` km/h and `odometer` km; NaN
+    marks a speed or odometer the device did not report.
+    """
+    import numpy as np
+    return np.dtype([("vehicle_id", "<u4"), ("ts", "<f8"), ("lat", "<f8"), ("lon", "<f8"),
+                     ("speed", "<f4"), ("odometer", "<f8")])
+
+
+def decode_binary(body: bytes) -> dict:
+    """Columns of a binary batch, as views on `body` (no copy). Raises ValueError if it is truncated."""
+    import numpy as np
+    dtype = point_dtype()
+    if len(body) % dtype.itemsize:
+        raise ValueError(f"Binary telemetry must be a whole number of {dtype.itemsize}-byte points.")
+    points = np.frombuffer(body, dtype=dtype)
+    return {field: points[field] for field in FIELDS}
+
+
+def _floats(values: list):
+    import numpy as np
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Slow path for a batch with malformed values: those rows become NaN and fail validation.
+        column = np.full(len(values), np.nan)
+        for index, value in enumerate(values):
+            try:
+                column[index] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                pass
+        return column
+
+
+def _parse_line(line: bytes):
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def decode_ndjson(body: bytes) -> dict:
+    """
+    Columns of an NDJSON batch, one `{"vehicle_id", "ts", "lat", "lon", "speed",
+    "odometer"}` object per line. Lines that are not JSON objects become NaN rows.
+    """
+    lines = [line for line in body.split(b"\n") if line.strip()]
+    try:
+        records = orjson.loads(b"[" + b",".join(lines) + b"]")
+    except orjson.JSONDecodeError:
+        records = None
+    if records is None or len(records) != len(lines):
+        # Slow path: a malformed line, or one like `1,2` that split into several values once joined.
+        records = [_parse_line(line) for line in lines]
+    records = [record if isinstance(record, dict) else {} for record in records]
+    return {field: _floats([record.get(field) for record in records]) for field in FIELDS}
+
+
+def validate(columns: dict, now: float, max_age: float, max_skew: float, max_speed: float):
+    """Boolean mask of the plausible points: known ranges, recent timestamps, optional fields NaN or sane."""
+    import numpy as np
+    vehicle_id, ts = columns["vehicle_id"], columns["ts"]
+    lat, lon, speed, odometer = columns["lat"], columns["lon"], columns["speed"], columns["odometer"]
+    with np.errstate(invalid="ignore"):
+        mask = np.isfinite(vehicle_id) & (vehicle_id > 0) & (vehicle_id == np.floor(vehicle_id))
+        mask &= (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+        mask &= (ts >= now - max_age) & (ts <= now + max_skew)
+        mask &= np.isnan(speed) | ((speed >= 0) & (speed <= max_speed))
+        mask &= np.isnan(odometer) | (odometer >= 0)
+    return mask
+
+
+def pack(columns: dict, mask):
+    """The points selected by `mask`, as one structured array of `point_dtype()`."""
+    import numpy as np
+    points = np.empty(int(mask.sum()), dtype=point_dtype())
+    for field in FIELDS:
+        points[field] = columns[field][mask]
+    return points
+
+
+def to_rows(points) -> list:
+    """`telemetry_points` insert parameters for `points`, converted column by column."""
+    import numpy as np
+    recorded_at = (points["ts"] * 1e6).astype("datetime64[us]").tolist()
+    speed = points["speed"].astype(np.float64)
+    speed = np.where(np.isnan(speed), None, speed).tolist()
+    odometer = np.where(np.isnan(points["odometer"]), None, points["odometer"]).tolist()
+    return [{"vehicle_id": vehicle_id, "recorded_at": at, "latitude": lat, "longitude": lon,
+             "speed": speed_kmh, "odometer": odometer_km}
+            for vehicle_id, at, lat, lon, speed_kmh, odometer_km in zip(points["vehicle_id"].tolist(), recorded_at,
+                                                                         points["lat"].tolist(),
+                                                                         points["lon"].tolist(), speed, odometer)]
@@ -0,0 +1,238 @@
+"""
+Columnar, memory-mapped store of GPS telemetry.
+
+Points are partitioned per vehicle and per UTC day into segments, one directory
+holding one flat little-endian file per column:
+
+    <root>/<vehicle_id>/<YYYY-MM-DD>/{ts,lat,lon,speed,odometer}.col
+
+Writers append whole batches under an flock on the segment, so the workers of a
+server can share a root. Readers memory-map the columns and slice a time range
+out of them without copying. A segment stays sorted by time unless a late batch
+lands in it, which marks it `unsorted` and sends its reads through a sort.
+
+Compaction rewrites the segments of days before a cutoff sorted and downsampled
+to one point per `resolution` seconds, as `<YYYY-MM-DD>.<resolution>s`, which
+readers use instead of the raw segment.
+"""
+import fcntl
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+COLUMNS = (("ts", "<f8"), ("lat", "<f8"), ("lon", "<f8"), ("speed", "<f4"), ("odometer", "<f8"))
+DAY = 86400
+UNSORTED = "unsorted"
+_EPOCH = date(1970, 1, 1)
+
+
+def day_name(day: int) -> str:
+    return (_EPOCH + timedelta(days=day)).isoformat()
+
+
+def _day_number(name: str) -> Optional[int]:
+    try:
+        return (date.fromisoformat(name) - _EPOCH).days
+    except ValueError:
+        return None
+
+
+def empty_columns() -> dict:
+    import numpy as np
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+
+def _read(path: str) -> dict:
+    """Read-only memory maps of the columns of the segment at `path`, cut to their common length."""
+    import numpy as np
+    columns, count = {}, None
+    for name, dtype in COLUMNS:
+        file = os.path.join(path, f"{name}.col")
+        length = os.path.getsize(file) // np.dtype(dtype).itemsize if os.path.exists(file) else 0
+        columns[name] = np.memmap(file, dtype=dtype, mode="r", shape=(length,)) if length else np.empty(0, dtype)
+        count = length if count is None else min(count, length)
+    # Views as plain ndarrays, still backed by the mapping.
+    return {name: column[:count].view(np.ndarray) for name, column in columns.items()}
+
+
+def _write(path: str, columns: dict):
+    import numpy as np
+    os.makedirs(path)
+    for name, dtype in COLUMNS:
+        np.ascontiguousarray(columns[name], dtype=dtype).tofile(os.path.join(path, f"{name}.col"))
+
+
+def _sort(columns: dict) -> dict:
+    import numpy as np
+    order = np.argsort(columns["ts"], kind="stable")
+    return {name: column[order] for name, column in columns.items()}
+
+
+def downsample(columns: dict, resolution: int) -> dict:
+    """
+    One point per `resolution` seconds: the last position and odometer reading of
+    each interval, with the mean of the speeds reported in it.
+    """
+    import numpy as np
+    columns = _sort(columns)
+    if not len(columns["ts"]):
+        return columns
+    bucket = np.floor(columns["ts"] / resolution).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    lasts = np.r_[starts[1:], len(bucket)] - 1
+    result = {name: column[lasts] for name, column in columns.items()}
+    speed = columns["speed"]
+    reported = ~np.isnan(speed)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["speed"] = (np.add.reduceat(np.where(reported, speed, 0), starts, dtype=np.float64)
+                           / np.add.reduceat(reported, starts, dtype=np.int64)).astype(speed.dtype)
+    return result
+
+
+def resample(columns: dict, step: float, max_gap: float) -> dict:
+    """
+    Positions and speeds interpolated every `step` seconds over the span of a sorted
+    track, leaving out the instants that fall in a gap longer than `max_gap`.
+    """
+    import numpy as np
+    ts = columns["ts"]
+    if len(ts) < 2:
+        return {name: np.array(columns[name][:len(ts)], dtype=np.float64) for name in ("ts", "lat", "lon", "speed")}
+    times = np.arange(np.ceil(ts[0] / step) * step, np.floor(ts[-1] / step) * step + step / 2, step)
+    after = np.clip(np.searchsorted(ts, times), 1, len(ts) - 1)
+    times = times[(ts[after] - ts[after - 1] <= max_gap) | np.isin(times, ts)]
+    return {"ts": times, **{name: np.interp(times, ts, columns[name]) for name in ("lat", "lon", "speed")}}
+
+
+@contextmanager
+def _locked(path: str):
+    descriptor = os.open(os.path.join(path, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(descriptor)
+
+
+class SegmentStore:
+    """Per-vehicle, per-day columnar telemetry segments under `root`."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _vehicle_dir(self, vehicle_id: int) -> str:
+        return os.path.join(self.root, str(vehicle_id))
+
+    def append(self, points):
+        """Appends `points`, a structured array of `app.utils.telemetry.point_dtype()`, to their segments."""
+        import numpy as np
+        if not len(points):
+            return
+        day = (points["ts"] // DAY).astype(np.int64)
+        order = np.lexsort((points["ts"], day, points["vehicle_id"]))
+        points, day = points[order], day[order]
+        vehicle_id = points["vehicle_id"].astype(np.int64)
+        boundaries = np.flatnonzero((np.diff(vehicle_id) != 0) | (np.diff(day) != 0)) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(points)]):
+            self._append_segment(int(vehicle_id[start]), int(day[start]), points[start:end])
+
+    def _append_segment(self, vehicle_id: int, day: int, points):
+        import numpy as np
+        path = os.path.join(self._vehicle_dir(vehicle_id), day_name(day))
+        os.makedirs(path, exist_ok=True)
+        with _locked(path):
+            existing = _read(path)
+            count = len(existing["ts"])
+            if count and points["ts"][0] < existing["ts"][-1]:
+                open(os.path.join(path, UNSORTED), "a").close()
+            for name, dtype in COLUMNS:
+                file = os.path.join(path, f"{name}.col")
+                with open(file, "ab") as column:
+                    # Drops the tail of an append that died halfway, realigning the columns.
+                    column.truncate(count * np.dtype(dtype).itemsize)
+                    column.write(np.ascontiguousarray(points[name], dtype=dtype).tobytes())
+
+    def _segments(self, vehicle_id: int, first_day: int, last_day: int) -> List[Tuple[int, str]]:
+        """`(day, path)` of the segments between two days, the downsampled one wherever a day has both."""
+        vehicle_dir = self._vehicle_dir(vehicle_id)
+        if not os.path.isdir(vehicle_dir):
+            return []
+        chosen = {}
+        for name in os.listdir(vehicle_dir):
+            day = _day_number(name.split(".")[0])
+            if day is None or not first_day <= day <= last_day or name.endswith(".tmp"):
+                continue
+            if "." in name or day not in chosen:
+                chosen[day] = os.path.join(vehicle_dir, name)
+        return sorted(chosen.items())
+
+    def vehicle_ids(self) -> List[int]:
+        return sorted(int(name) for name in os.listdir(self.root) if name.isdigit()) \
+            if os.path.isdir(self.root) else []
+
+    def daily(self, vehicle_id: int, start: float, end: float) -> Iterator[Tuple[int, dict]]:
+        """
+        `(day, columns)` of `vehicle_id`'s points in [start, end) (epoch seconds), for
+        each day, oldest first. Sorted segments are sliced out of the mapping without a copy.
+        """
+        import numpy as np
+        for day, path in self._segments(vehicle_id, int(start // DAY), int(end // DAY)):
+            columns = _read(path)
+            if os.path.exists(os.path.join(path, UNSORTED)):
+                columns = _sort(columns)
+            first, last = np.searchsorted(columns["ts"], [start, end])
+            if last > first:
+                yield day, {name: column[first:last] for name, column in columns.items()}
+
+    def segments(self, vehicle_id: int, start: float, end: float) -> Iterator[dict]:
+        return (columns for _, columns in self.daily(vehicle_id, start, end))
+
+    def track(self, vehicle_id: int, start: float, end: float) -> dict:
+        """The columns of `vehicle_id`'s points in [start, end); zero-copy when they all come from one segment."""
+        import numpy as np
+        parts = list(self.segments(vehicle_id, start, end))
+        if not parts:
+            return empty_columns()
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name, _ in COLUMNS}
+
+    def compact(self, cutoff: float, resolution: int) -> int:
+        """Downsamples the raw segments of the days that ended before `cutoff`; returns how many it rewrote."""
+        if not os.path.isdir(self.root):
+            return 0
+        compacted = 0
+        for vehicle in os.listdir(self.root):
+            vehicle_dir = os.path.join(self.root, vehicle)
+            if not vehicle.isdigit() or not os.path.isdir(vehicle_dir):
+                continue
+            for name in os.listdir(vehicle_dir):
+                day = _day_number(name)
+                if day is not None and (day + 1) * DAY <= cutoff:
+                    try:
+                        compacted += self._compact_segment(os.path.join(vehicle_dir, name), resolution)
+                    except FileNotFoundError:
+                        # Removed by another worker's compaction since it was listed.
+                        pass
+        return compacted
+
+    def _compact_segment(self, path: str, resolution: int) -> int:
+        target = f"{path}.{resolution}s"
+        with _locked(path):
+            if not os.path.exists(target):
+                staging = f"{target}.tmp"
+                shutil.rmtree(staging, ignore_errors=True)
+                _write(staging, downsample(_read(path), resolution))
+                try:
+                    os.rename(staging, target)
+                except OSError as rename_exec:
+                    # Another worker compacted the segment first.
+                    logging.info(f"Telemetry segment {path} already compacted: {rename_exec}")
+                    shutil.rmtree(staging, ignore_errors=True)
+                    return 0
+            # Open mappings of the raw segment stay readable until they are released.
+            shutil.rmtree(path, ignore_errors=True)
+        return 1
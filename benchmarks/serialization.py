@@ -0,0 +1,64 @@
+"""
+CPU cost of serializing list responses: FastAPI's default path (response_model
+validation, jsonable_encoder, JSONResponse) against the precompiled TypeAdapter
+path used by the list routes.
+
+    python -m benchmarks.serialization --rows 500 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.user import User
+from app.responses.user import UserResponse
+from app.utils.serialization import json_list_response
+
+
+def make_users(rows: int) -> list:
+    now = datetime.utcnow()
+    return [User(id=i, first_name="Bench", last_name=f"User {i}", email=f"bench{i}@example.com",
+                 is_active=True, created_at=now) for i in range(rows)]
+
+
+async def fastapi_default(field, users, response_class):
+    content = await serialize_response(field=field, response_content=users)
+    return response_class(jsonable_encoder(content)).body
+
+
+async def type_adapter(field, users, response_class):
+    return json_list_response(UserResponse, users).body
+
+
+async def measure(fn, field, users, response_class, repeat: int) -> float:
+    await fn(field, users, response_class)
+    started = time.process_time()
+    for _ in range(repeat):
+        await fn(field, users, response_class)
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def main(args):
+    users = make_users(args.rows)
+    field = create_model_field(name="Response", type_=List[UserResponse], mode="serialization")
+    for label, fn, response_class in (("default + JSONResponse", fastapi_default, JSONResponse),
+                                      ("default + ORJSONResponse", fastapi_default, ORJSONResponse),
+                                      ("TypeAdapter", type_adapter, None)):
+        print(f"{label:<26}{await measure(fn, field, users, response_class, args.repeat):>10.3f} ms CPU / response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""
+Cold start profile: import time of `app.main` per module (from `python -X importtime`),
+the lifespan's initialization steps and the time to the first response, each measured
+in a fresh interpreter.
+
+    python -m benchmarks.startup --top 20
+
+Set STARTUP_PROFILE=true to have a running server log its lifespan steps as well.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from starlette.testclient import TestClient
+from app.config.startup import startup_timings
+with TestClient(app.main.app) as client:
+    client.get("/")
+    first = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_response": first - started, "steps": startup_timings}))
+"""
+
+
+def run_python(*args) -> subprocess.CompletedProcess:
+    env = {**os.environ, "TOKEN_REAPER_ENABLED": "false", "EMAIL_OUTBOX_WORKER_IN_PROCESS": "false"}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times() -> list:
+    """Returns `(module, self_us, cumulative_us)` for every module `import app.main` loads."""
+    stderr = run_python("-X", "importtime", "-c", "import app.main").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(args):
+    rows = import_times()
+    total = next(cumulative for module, _, cumulative in rows if module == "app.main")
+    print(f"import app.main: {total / 1000:.1f} ms ({len(rows)} modules)\n")
+
+    print(f"{'module':<48}{'self ms':>10}{'cumul. ms':>12}")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{module:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+    packages = defaultdict(int)
+    for module, self_us, _ in rows:
+        packages[module.split(".")[0]] += self_us
+    print(f"\n{'package':<48}{'self ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<48}{self_us / 1000:>10.1f}")
+
+    runs = [json.loads(run_python("-c", FIRST_REQUEST).stdout.splitlines()[-1]) for _ in range(args.repeat)]
+    print(f"\n{'startup (median of %d)' % args.repeat:<48}{'ms':>10}")
+    print(f"{'import app.main':<48}{statistics.median(run['import'] for run in runs) * 1000:>10.1f}")
+    for step in runs[0]["steps"]:
+        print(f"{'  lifespan: ' + step:<48}{statistics.median(run['steps'][step] for run in runs) * 1000:>10.1f}")
+    print(f"{'first response':<48}{statistics.median(run['first_response'] for run in runs) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="modules and packages to list")
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts measured for the first response")
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+CPU cost of trip distances and ETAs, with trips repeating between a few hundred
+places:
+
+- totals over a batch: a Python loop over the requests with `math` against the
+  vectorized path of `app.utils.routing`;
+- one trip at a time, as the trip estimate endpoint does: computed every time
+  against the origin-destination cache.
+
+    python -m benchmarks.trip_metrics --trips 100000 --places 300
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.utils.routing import EARTH_RADIUS_KM, RouteCache, eta_seconds, haversine, parse_speed_profile, totals_by
+
+PROFILE = "5:30,50:60,:90"
+DETOUR = 1.3
+
+
+def make_trips(trips: int, places: int):
+    rng = np.random.default_rng(3)
+    lat, lon = rng.uniform(43, 50, places), rng.uniform(-1, 7, places)
+    origin, destination = rng.integers(0, places, trips), rng.integers(0, places, trips)
+    vehicle = rng.integers(1, 200, trips)
+    return lat[origin], lon[origin], lat[destination], lon[destination], vehicle
+
+
+def per_row(from_lat, from_lon, to_lat, to_lon, vehicle):
+    bands = [(0, 5, 30), (5, 50, 60), (50, math.inf, 90)]
+    totals = {}
+    for row in zip(from_lat.tolist(), from_lon.tolist(), to_lat.tolist(), to_lon.tolist(), vehicle.tolist()):
+        lat1, lon1, lat2, lon2 = map(math.radians, row[:4])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)) * DETOUR
+        hours = sum(min(max(distance - low, 0), high - low) / speed for low, high, speed in bands)
+        total = totals.setdefault(row[4], [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += distance
+        total[2] += hours
+    return len(totals)
+
+
+def vectorized(from_lat, from_lon, to_lat, to_lon, vehicle):
+    bounds, speeds = parse_speed_profile(PROFILE)
+    distance = haversine(from_lat, from_lon, to_lat, to_lon) * DETOUR
+    keys, _, _ = totals_by(vehicle, distance_km=distance, duration_hours=eta_seconds(distance, bounds, speeds) / 3600)
+    return len(keys)
+
+
+def main(args):
+    trips = make_trips(args.trips, args.places)
+    print(f"{args.trips:,} trips between {args.places} places, totals per vehicle")
+    for label, fn in (("Python loop over rows", per_row), ("vectorized", vectorized)):
+        started = time.process_time()
+        fn(*trips)
+        print(f"  {label:<30}{(time.process_time() - started) * 1000:>10.1f} ms CPU")
+
+    print(f"\n{args.single:,} single-trip estimates")
+    single = [tuple(value[index] for value in trips[:4]) for index in range(args.single)]
+    cache = RouteCache(maxsize=args.cache_size, detour=DETOUR, speed_profile=PROFILE)
+    for label, fn in (("computed", cache._estimate_one), ("cache (cold)", cache.trip), ("cache (warm)", cache.trip)):
+        started = time.process_time()
+        for pair in single:
+            fn(*pair)
+        print(f"  {label:<30}{(time.process_time() - started) / len(single) * 1e6:>10.1f} us CPU / trip")
+    print(f"  cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trips", type=int, default=100000)
+    parser.add_argument("--places", type=int, default=300)
+    parser.add_argument("--single", type=int, default=10000, help="trips estimated one at a time")
+    parser.add_argument("--cache-size", type=int, default=100000)
+    main(parser.parse_args())
@@ -1,11 +1,14 @@
+from contextlib import contextmanager
 from datetime import datetime
 import sys
 import os
 from typing import Generator
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from starlette.testclient import TestClient
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,17 +16,44 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.main import app
 from app.config.email import fm
 from app.config.database import Base, get_session
+from app.config.metrics import instrument_engine
 from app.models.user import User
-from app.config.security import hash_password
+from app.models.user_category import UserCategory
+from app.models.vehicle import Vehicle
+from app.config.events import MemoryBackend as EventsMemoryBackend, event_broker
+from app.config.rate_limit import MemoryBackend, rate_limiter
+from app.config.security import hash_password, revocation_filter, token_cache
 from app.services.user import _generate_tokens
+from app.services.telemetry import telemetry_buffer
+from app.services.user_category import category_registry
+from app.services.vehicle import availability_index, route_cache
 
 USER_NAME = "Keshari Nandan"
 USER_EMAIL = "keshari@describly.com"
 USER_PASSWORD = "123#Describly"
 
-engine = create_engine("sqlite:///./fastapi.db")
+engine = instrument_engine(create_engine("sqlite:///./fastapi.db"))
 SessionTesting = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs every request on a fresh event loop, so async connections must not be pooled.
+async_engine = create_async_engine("sqlite+aiosqlite:///./fastapi.db", poolclass=NullPool)
+AsyncSessionTesting = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+@contextmanager
+def captured_statements(bind):
+    """Collects the SQL run on `bind` (pass `test_session.get_bind()`) inside the block."""
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _capture)
+
 
 @pytest.fixture(scope="function")
 def test_session() -> Generator:
@@ -37,6 +67,15 @@ def test_session() -> Generator:
 @pytest.fixture(scope="function")
 def app_test():
     Base.metadata.create_all(bind=engine)
+    token_cache.clear()
+    revocation_filter.clear()
+    category_registry.clear()
+    availability_index.clear()
+    route_cache.clear()
+    telemetry_buffer.clear()
+    rate_limiter.backend = MemoryBackend()
+    event_broker.backend = EventsMemoryBackend()
+    event_broker.clear()
     yield app
     Base.metadata.drop_all(bind=engine)
 
@@ -53,6 +92,16 @@ def client(app_test, test_session):
     fm.config.SUPPRESS_SEND = 1
     return TestClient(app_test)
 
+@pytest.fixture(scope="function")
+def async_client(app_test):
+    async def _test_db():
+        async with AsyncSessionTesting() as session:
+            yield session
+
+    app_test.dependency_overrides[get_session] = _test_db
+    fm.config.SUPPRESS_SEND = 1
+    return TestClient(app_test)
+
 @pytest.fixture(scope="function")
 def auth_client(app_test, test_session, user):
     def _test_db():
@@ -107,4 +156,24 @@ def unverified_user(test_session):
     test_session.add(model)
     test_session.commit()
     test_session.refresh(model)
-    return model
\ No newline at end of file
+    return model
+
+
+@pytest.fixture(scope="function")
+def admin_client(auth_client, user, test_session):
+    # "simple" is the category new users get.
+    admin = UserCategory(name="admin")
+    test_session.add_all([admin, UserCategory(name="simple")])
+    test_session.flush()
+    user.user_category_id = admin.id
+    test_session.commit()
+    return auth_client
+
+
+@pytest.fixture(scope="function")
+def vehicles(test_session):
+    models = [Vehicle(name="Toyota Camry", plate_number="ABC-123", seats=4),
+              Vehicle(name="Ford Transit", plate_number="XYZ-789", seats=9)]
+    test_session.add_all(models)
+    test_session.commit()
+    return models
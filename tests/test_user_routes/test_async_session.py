@@ -0,0 +1,41 @@
+"""
+1. User should be able to login when requests are served from an AsyncSession
+2. Token issued on the async path should authenticate /users/me
+3. User should be able to rotate the refresh token on the async path
+4. Category CRUD should work on the async path
+"""
+
+from tests.conftest import USER_PASSWORD
+
+
+def _login(async_client, user):
+    response = async_client.post('/auth/login', data={'username': user.email, 'password': USER_PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_async_user_login_and_fetch_me(async_client, user):
+    tokens = _login(async_client, user)
+    response = async_client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+    assert response.json()['email'] == user.email
+    assert response.json()['name'] == user.name
+
+
+def test_async_refresh_token(async_client, user):
+    tokens = _login(async_client, user)
+    response = async_client.post("/auth/refresh", json={}, headers={"refresh-token": tokens['refresh_token']})
+    assert response.status_code == 200
+    assert response.json()['access_token'] != tokens['access_token']
+
+
+def test_async_category_crud(async_client):
+    response = async_client.post("/categories", json={"name": "driver"})
+    assert response.status_code == 201
+    category_id = response.json()['id']
+    response = async_client.put(f"/categories/{category_id}", json={"name": "chauffeur"})
+    assert response.status_code == 200
+    assert response.json()['name'] == "chauffeur"
+    assert [c['name'] for c in async_client.get("/categories").json()] == ["chauffeur"]
+    assert async_client.delete(f"/categories/{category_id}").status_code == 204
+    assert async_client.get(f"/categories/{category_id}").status_code == 404
@@ -0,0 +1,47 @@
+"""
+1. Registration and login should not query user_categories once the registry is warm.
+2. Category changes through the API should be written through to the registry.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.user import User
+from app.services.user_category import category_registry, load_category_registry
+from tests.conftest import USER_EMAIL, USER_NAME, USER_PASSWORD, captured_statements
+
+
+def test_register_and_login_skip_category_table(client, test_session):
+    category_id = client.post("/categories", json={"name": "simple"}).json()["id"]
+    assert category_registry.id_for("simple") == category_id
+    # Warmed as at startup; the test engine is not the app's.
+    load_category_registry(sessionmaker(bind=test_session.get_bind()))
+
+    with captured_statements(test_session.get_bind()) as statements:
+        response = client.post("/users", json={"name": USER_NAME, "email": USER_EMAIL, "password": USER_PASSWORD})
+    assert response.status_code == 201
+    assert statements and not any("user_categories" in statement for statement in statements)
+
+    user = test_session.scalar(select(User).where(User.email == USER_EMAIL))
+    user.is_active, user.verified_at = True, datetime.utcnow()
+    test_session.commit()
+
+    with captured_statements(test_session.get_bind()) as statements:
+        response = client.post("/auth/login", data={"username": USER_EMAIL, "password": USER_PASSWORD})
+    assert response.status_code == 200
+    assert response.json()["user_category"] == "simple"
+    assert statements and not any("user_categories" in statement for statement in statements)
+
+
+def test_category_changes_write_through(client):
+    category_id = client.post("/categories", json={"name": "driver"}).json()["id"]
+    assert category_registry.name_for(category_id) == "driver"
+
+    client.put(f"/categories/{category_id}", json={"name": "chauffeur"})
+    assert category_registry.name_for(category_id) == "chauffeur"
+    assert category_registry.id_for("driver") is None
+
+    assert client.delete(f"/categories/{category_id}").status_code == 204
+    assert category_registry.name_for(category_id) is None
+    assert category_registry.id_for("chauffeur") is None
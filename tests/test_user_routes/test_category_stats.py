@@ -0,0 +1,31 @@
+"""
+1. /categories/stats should return every category with its member count.
+2. A category with users should not be deleted; an empty one should.
+"""
+from app.models.user_category import UserCategory
+
+
+def test_category_stats(client, user, test_session):
+    drivers, staff = UserCategory(name="driver"), UserCategory(name="staff")
+    test_session.add_all([drivers, staff])
+    test_session.flush()
+    user.user_category_id = drivers.id
+    test_session.commit()
+
+    response = client.get("/categories/stats")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": drivers.id, "name": "driver", "user_count": 1},
+        {"id": staff.id, "name": "staff", "user_count": 0},
+    ]
+
+
+def test_delete_category_in_use(client, user, test_session):
+    drivers, staff = UserCategory(name="driver"), UserCategory(name="staff")
+    test_session.add_all([drivers, staff])
+    test_session.flush()
+    user.user_category_id = drivers.id
+    test_session.commit()
+
+    assert client.delete(f"/categories/{drivers.id}").status_code == 400
+    assert client.delete(f"/categories/{staff.id}").status_code == 204
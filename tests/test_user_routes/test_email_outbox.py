@@ -0,0 +1,118 @@
+"""
+1. Forgot password requests should queue the email in the outbox instead of sending it inline
+2. The outbox worker should deliver queued emails through the pooled SMTP connections
+3. Failed deliveries should be retried with backoff and eventually marked as failed
+4. A registration should commit the user and its verification email together, or neither
+"""
+import asyncio
+import socket
+from datetime import datetime
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from app.config.email import fm
+from app.config.settings import get_settings
+from app.models.email_outbox import EmailOutbox
+from app.models.user import User
+from app.models.user_category import UserCategory
+from app.services.email_outbox import SMTPConnectionPool, drain_outbox
+from tests.conftest import USER_PASSWORD, SessionTesting
+
+
+class RecordingHandler(Sink):
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+@pytest.fixture
+def sending(monkeypatch):
+    monkeypatch.setattr(fm.config, 'SUPPRESS_SEND', 0)
+    monkeypatch.setattr(fm.config, 'USE_CREDENTIALS', False)
+
+
+def _drain(port):
+    async def _run():
+        pool = SMTPConnectionPool(hostname="127.0.0.1", port=port, size=2)
+        try:
+            return await drain_outbox(pool, session_factory=SessionTesting)
+        finally:
+            await pool.close()
+    return asyncio.run(_run())
+
+
+def test_forgot_password_queues_email(client, user, test_session):
+    response = client.post('/auth/forgot-password', json={'email': user.email})
+    assert response.status_code == 200
+    queued = test_session.query(EmailOutbox).all()
+    assert len(queued) == 1
+    assert queued[0].recipients == [user.email]
+    assert queued[0].status == "pending"
+
+
+def test_outbox_worker_delivers_queued_emails(client, user, test_session, smtp_server, sending):
+    handler, port = smtp_server
+    for _ in range(3):
+        assert client.post('/auth/forgot-password', json={'email': user.email}).status_code == 200
+
+    assert _drain(port) == 3
+    assert len(handler.messages) == 3
+    assert handler.messages[0].rcpt_tos == [user.email]
+    test_session.expire_all()
+    assert {item.status for item in test_session.query(EmailOutbox)} == {"sent"}
+    assert _drain(port) == 0
+
+
+def test_outbox_worker_retries_with_backoff(client, user, test_session, sending, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'EMAIL_OUTBOX_MAX_ATTEMPTS', 2)
+    assert client.post('/auth/forgot-password', json={'email': user.email}).status_code == 200
+
+    assert _drain(port=1) == 1
+    test_session.expire_all()
+    item = test_session.query(EmailOutbox).one()
+    assert item.status == "pending"
+    assert item.attempts == 1
+    assert item.next_attempt_at > datetime.utcnow()
+
+    item.next_attempt_at = datetime.utcnow()
+    test_session.commit()
+    assert _drain(port=1) == 1
+    test_session.expire_all()
+    assert test_session.query(EmailOutbox).one().status == "failed"
+
+
+def test_registration_commits_user_with_email(client, test_session, monkeypatch):
+    test_session.add(UserCategory(name="simple"))
+    test_session.commit()
+    data = {"name": "New Driver", "email": "driver@describly.com", "password": USER_PASSWORD}
+    assert client.post("/users", json=data).status_code == 201
+    queued = test_session.query(EmailOutbox).all()
+    assert [message.recipients for message in queued] == [["driver@describly.com"]]
+
+    async def failing(*args, **kwargs):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr("app.services.user.send_account_verification_email", failing)
+    with pytest.raises(RuntimeError):
+        client.post("/users", json={**data, "email": "other@describly.com"})
+    test_session.rollback()
+    with SessionTesting() as session:
+        assert session.query(User).filter_by(email="other@describly.com").first() is None
+        assert session.query(EmailOutbox).count() == 1
@@ -0,0 +1,49 @@
+"""
+1. Pre-rendered templates should produce the same output as rendering the original template
+2. Bulk rendering should personalise every message from one compiled template
+3. User supplied values should be HTML escaped
+4. With DEBUG on, edited templates should be picked up without a restart
+"""
+import os
+
+from jinja2 import Environment, FileSystemLoader
+
+from app.config import templates
+from app.config.settings import get_settings
+from app.config.templates import get_template_env, render_many, render_template
+
+TEMPLATE = "user/account-verification.html"
+
+
+def test_pre_rendered_template_matches_original():
+    context = {"name": "Keshari Nandan", "activate_url": "http://localhost/verify?token=abc"}
+    expected = get_template_env().get_template(TEMPLATE).render(app_name=get_settings().APP_NAME, **context)
+    assert render_template(TEMPLATE, context) == expected
+
+
+def test_render_many_personalises_each_message():
+    contexts = [{"name": f"Driver {i}", "activate_url": f"http://localhost/verify?token={i}"} for i in range(3)]
+    messages = list(render_many(TEMPLATE, contexts))
+    assert len(messages) == 3
+    for i, message in enumerate(messages):
+        assert f"Dear Driver {i}," in message
+        assert get_settings().APP_NAME in message
+
+
+def test_template_values_are_escaped():
+    message = render_template(TEMPLATE, {"name": "<script>", "activate_url": "http://localhost/?a=1&b=2"})
+    assert "<script>" not in message
+    assert "a=1&amp;b=2" in message
+
+
+def test_debug_reloads_edited_templates(tmp_path, monkeypatch):
+    template = tmp_path / "greeting.html"
+    template.write_text("Hello {{ name }} from {{ app_name }}")
+    env = Environment(loader=FileSystemLoader(tmp_path), auto_reload=True)
+    monkeypatch.setattr(templates, "get_template_env", lambda: env)
+    monkeypatch.setattr(get_settings(), "DEBUG", True)
+    assert render_template("greeting.html", {"name": "Keshari"}).startswith("Hello Keshari")
+
+    template.write_text("Goodbye {{ name }}")
+    os.utime(template, (template.stat().st_atime, template.stat().st_mtime + 10))
+    assert render_template("greeting.html", {"name": "Keshari"}) == "Goodbye Keshari"
@@ -0,0 +1,163 @@
+"""
+1. Events should only reach the subscribers they are addressed to.
+2. Slow subscribers should get a drop notice, or be disconnected, instead of holding up publishers.
+3. The Redis backend should carry events between workers.
+4. Dashboards should receive vehicle request changes and registrations over the WebSocket.
+5. The WebSocket and SSE channels should reject missing or invalid tokens.
+6. A subscriber whose event loop has closed should be dropped without holding up delivery to the others.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import fakeredis
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.config.events import DROPPED, EventBroker, MemoryBackend, RedisBackend, event_broker
+from app.config.settings import get_settings
+from app.routes.events import stream_events
+from tests.conftest import USER_PASSWORD
+
+
+def _token(client) -> str:
+    return client.headers["Authorization"].split(" ", 1)[1]
+
+
+def _wait_for_unsubscribe(timeout: float = 5.0) -> bool:
+    # The server side unsubscribes in its own thread, after the client has closed.
+    deadline = time.monotonic() + timeout
+    while event_broker.stats()["subscribers"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return event_broker.stats()["subscribers"] == 0
+
+
+def test_events_are_addressed():
+    async def scenario():
+        broker = EventBroker(MemoryBackend())
+        admin, owner, other = [await broker.subscribe(1, True), await broker.subscribe(2, False),
+                               await broker.subscribe(3, False)]
+        await broker.publish("vehicle_request.updated", {"id": 7}, users=[2], admins=True)
+        await broker.publish("user.registered", {"id": 9}, admins=True)
+        assert [(await admin.get())["type"], (await admin.get())["type"]] == \
+            ["vehicle_request.updated", "user.registered"]
+        assert (await owner.get())["data"] == {"id": 7}
+        assert owner.queue.empty() and other.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_drop_notice(monkeypatch):
+    monkeypatch.setattr(get_settings(), "EVENTS_QUEUE_SIZE", 2)
+
+    async def scenario():
+        broker = EventBroker(MemoryBackend())
+        subscriber = await broker.subscribe(1, True)
+        for number in range(5):
+            await broker.publish("tick", {"n": number}, admins=True)
+        notice = await subscriber.get()
+        assert notice["type"] == DROPPED and notice["data"] == {"count": 3}
+        assert [(await subscriber.get())["data"]["n"] for _ in range(2)] == [3, 4]
+        assert broker.stats()["dropped"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_disconnected(monkeypatch):
+    monkeypatch.setattr(get_settings(), "EVENTS_QUEUE_SIZE", 2)
+    monkeypatch.setattr(get_settings(), "EVENTS_SLOW_CONSUMER", "disconnect")
+
+    async def scenario():
+        broker = EventBroker(MemoryBackend())
+        subscriber = await broker.subscribe(1, True)
+        for number in range(3):
+            await broker.publish("tick", {"n": number}, admins=True)
+        assert await subscriber.get() is None
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_another_thread():
+    async def scenario():
+        broker = EventBroker(MemoryBackend())
+        subscriber = await broker.subscribe(1, False)
+        thread = threading.Thread(target=lambda: asyncio.run(broker.publish("tick", {}, users=[1])))
+        thread.start()
+        event = await asyncio.wait_for(subscriber.get(), timeout=2)
+        thread.join()
+        assert event["type"] == "tick"
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_between_workers():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        publisher = EventBroker(RedisBackend(fakeredis.FakeAsyncRedis(server=server), "events"))
+        listener = EventBroker(RedisBackend(fakeredis.FakeAsyncRedis(server=server), "events"))
+        subscriber = await listener.subscribe(2, False)
+        await publisher.publish("vehicle_request.updated", {"id": 7}, users=[2])
+        event = await asyncio.wait_for(subscriber.get(), timeout=2)
+        assert event["data"] == {"id": 7}
+        await publisher.close()
+        await listener.close()
+
+    asyncio.run(scenario())
+
+
+def test_closed_loop_subscriber_is_dropped():
+    broker = EventBroker(MemoryBackend())
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(broker.subscribe(1, True))
+    loop.close()
+
+    async def scenario():
+        live = await broker.subscribe(2, True)
+        broker.deliver({"id": "1", "type": "user.registered", "data": {}, "users": [], "admins": True})
+        assert (await live.get())["type"] == "user.registered"
+        assert broker.stats()["subscribers"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_websocket_pushes_changes(admin_client, user):
+    with admin_client.websocket_connect(f"/events/ws?token={_token(admin_client)}") as websocket:
+        response = admin_client.post("/vehicle-requests", json={
+            "from_location": "Office", "to_location": "Airport", "motif": "Pick up",
+            "start_at": "2030-11-05T09:00:00", "end_at": "2030-11-05T10:00:00"})
+        event = json.loads(websocket.receive_text())
+        assert event["type"] == "vehicle_request.created"
+        assert event["data"]["id"] == response.json()["id"]
+
+        admin_client.post(f"/vehicle-requests/{response.json()['id']}/deny")
+        event = json.loads(websocket.receive_text())
+        assert (event["type"], event["data"]["status"]) == ("vehicle_request.updated", "denied")
+
+        admin_client.post("/users", json={"name": "New Driver", "email": "driver@describly.com",
+                                          "password": USER_PASSWORD})
+        event = json.loads(websocket.receive_text())
+        assert (event["type"], event["data"]["email"]) == ("user.registered", "driver@describly.com")
+    assert _wait_for_unsubscribe()
+
+
+def test_websocket_rejects_invalid_token(client):
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        with client.websocket_connect("/events/ws?token=invalid"):
+            pass
+    assert disconnect.value.code == 1008
+    assert client.get("/events/stream").status_code == 401
+
+
+def test_server_sent_events(app_test, user, test_session):
+    async def scenario():
+        response = await stream_events(current_user=user, session=test_session)
+        body = response.body_iterator
+        assert await body.__anext__() == b"retry: 5000\n\n"
+        await event_broker.publish("vehicle_request.updated", {"id": 7}, users=[user.id])
+        chunk = await body.__anext__()
+        assert chunk.startswith(b"id: ") and b"event: vehicle_request.updated\ndata: {\"id\":7}\n\n" in chunk
+        await body.aclose()
+        assert event_broker.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
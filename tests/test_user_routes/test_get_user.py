@@ -1,9 +1,13 @@
 """
 1. Only authenticated user should be able to fetch the user details
 2. A request with invalid token should not be entertained.
+3. Deactivated users should be evicted from the token cache, however they were deactivated.
 /users/me
 """
+from sqlalchemy import update
 
+from app.config.security import token_cache
+from app.models.user import User
 from app.services.user import _generate_tokens
 
 
@@ -30,4 +34,45 @@ def test_fetch_me_invalid_token(client, user, test_session):
 def test_fetch_user_detail_by_id(auth_client, user):
     response = auth_client.get(f"/users/{user.id}")
     assert response.status_code == 200
-    assert response.json()['email'] == user.email
\ No newline at end of file
+    assert response.json()['email'] == user.email
+
+def test_fetch_me_served_from_token_cache(auth_client, user):
+    response = auth_client.get("/users/me")
+    assert response.status_code == 200
+    hits = token_cache.hits
+    response = auth_client.get("/users/me")
+    assert response.status_code == 200
+    assert response.json()['email'] == user.email
+    assert token_cache.hits == hits + 1
+
+
+def test_deactivated_user_is_evicted_from_token_cache(auth_client, user, test_session):
+    auth_client.get("/users/me")
+    assert len(token_cache) == 1
+    user.is_active = False
+    test_session.commit()
+    assert len(token_cache) == 0
+
+
+def test_deactivated_unloaded_user_is_evicted(auth_client, user, test_session):
+    auth_client.get("/users/me")
+    assert len(token_cache) == 1
+    test_session.expire(user, ["is_active"])
+    user.is_active = False
+    assert len(token_cache) == 0
+
+
+def test_bulk_deactivation_evicts_users(auth_client, user, test_session):
+    auth_client.get("/users/me")
+    test_session.execute(update(User).where(User.email == "nobody@describly.com").values(is_active=False))
+    test_session.execute(update(User).where(User.id == user.id).values(first_name="Renamed"))
+    assert len(token_cache) == 1
+    test_session.execute(update(User).where(User.email == user.email).values(is_active=False))
+    assert len(token_cache) == 0
+
+    test_session.rollback()
+    assert auth_client.get("/users/me").status_code == 200
+    assert len(token_cache) == 1
+    test_session.execute(update(User), [{"id": user.id, "is_active": False}])
+    assert len(token_cache) == 0
+    test_session.rollback()
@@ -0,0 +1,44 @@
+"""
+1. Responses should carry a Server-Timing header with DB time and query count.
+2. /metrics should expose route-labelled request and query metrics.
+3. Pool checkout timeouts should be counted as exhaustion.
+"""
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.config.metrics import InstrumentedQueuePool, db_pool_timeouts_total
+from app.services.user import _generate_tokens
+
+
+def test_server_timing_header(client, user, test_session):
+    data = _generate_tokens(user, test_session)
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert "total;dur=" in timing
+    assert "db;dur=" in timing
+    assert "queries" in timing
+
+
+def test_metrics_endpoint(client, user):
+    client.post("/auth/login", data={"username": user.email, "password": "wrong-password"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/auth/login",status="400"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/login"}' in body
+    assert 'db_queries_total{route="/auth/login"}' in body
+    assert "db_pool_connections" in body
+    assert "token_cache" in body
+
+
+def test_pool_exhaustion_counted():
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0,
+                           pool_timeout=0.01)
+    before = db_pool_timeouts_total._values.get((), 0)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert db_pool_timeouts_total._values.get((), 0) == before + 1
+    engine.dispose()
@@ -0,0 +1,78 @@
+"""
+1. /categories should page with an opaque cursor and keep the offset fallback.
+2. An invalid cursor should be rejected.
+3. /admin/users should be limited to admins and page on (created_at, id).
+4. Both listings should stream as NDJSON or a JSON array on request.
+"""
+import json
+from datetime import datetime
+
+from app.models.user import User
+from app.models.user_category import UserCategory
+from app.utils.pagination import NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER
+
+
+def _walk(client, url, limit):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return seen
+
+
+def test_categories_cursor_pages(client):
+    ids = [client.post("/categories", json={"name": f"category-{i}"}).json()["id"] for i in range(5)]
+    assert _walk(client, "/categories", limit=2) == ids
+
+    response = client.get("/categories", params={"limit": 2, "include_total": True})
+    assert response.headers[TOTAL_ESTIMATE_HEADER] == "5"
+    assert [item["id"] for item in client.get("/categories", params={"skip": 3}).json()] == ids[3:]
+
+
+def test_categories_invalid_cursor(client):
+    response = client.get("/categories", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_admin_users_requires_admin(auth_client):
+    assert auth_client.get("/admin/users").status_code == 403
+
+
+def test_admin_users_cursor_pages(auth_client, user, test_session):
+    admin_category = UserCategory(name="admin")
+    test_session.add(admin_category)
+    test_session.flush()
+    user.user_category_id = admin_category.id
+    now = datetime.utcnow()
+    test_session.add_all(User(first_name="Driver", last_name=str(i), email=f"driver{i}@describly.com",
+                              updated_at=now, created_at=now) for i in range(6))
+    test_session.commit()
+
+    ids = _walk(auth_client, "/admin/users", limit=3)
+    expected = [row.id for row in test_session.query(User).order_by(User.created_at, User.id)]
+    assert ids == expected
+    assert len(ids) == 7
+
+
+def test_categories_stream(client):
+    ids = [client.post("/categories", json={"name": f"category-{i}"}).json()["id"] for i in range(3)]
+
+    response = client.get("/categories", params={"stream": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids
+
+    response = client.get("/categories", params={"stream": "json"})
+    assert [item["id"] for item in response.json()] == ids
+
+    cursor = client.get("/categories", params={"limit": 1}).headers[NEXT_CURSOR_HEADER]
+    response = client.get("/categories", params={"stream": "json", "cursor": cursor})
+    assert [item["id"] for item in response.json()] == ids[1:]
+
+
+def test_empty_stream(client):
+    assert client.get("/categories", params={"stream": "json"}).json() == []
+    assert client.get("/categories", params={"stream": "ndjson"}).text == ""
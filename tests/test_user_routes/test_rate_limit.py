@@ -0,0 +1,77 @@
+"""
+1. Login should be limited per account and per IP, with 429 and Retry-After.
+2. Rejected requests should not reach bcrypt.
+3. Limits should be configurable per route.
+4. The Redis backend should apply the same sliding window.
+"""
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app.config.hashing import hashing_stats
+from app.config.rate_limit import MemoryBackend, RateLimiter, RedisBackend, rate_limiter
+from app.config.settings import get_settings
+from tests.conftest import USER_PASSWORD
+
+
+def test_login_limited_per_account(client, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_LOGIN", "ip:100/60,account:2/60")
+    for _ in range(2):
+        response = client.post("/auth/login", data={"username": user.email, "password": "wrong-password"})
+        assert response.status_code == 400
+
+    submitted = hashing_stats()["submitted"]
+    response = client.post("/auth/login", data={"username": user.email.upper(), "password": USER_PASSWORD})
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 60
+    assert hashing_stats()["submitted"] == submitted
+
+    response = client.post("/auth/login", data={"username": "other@describly.com", "password": USER_PASSWORD})
+    assert response.status_code == 400
+
+
+def test_limits_per_ip_and_route(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_FORGOT_PASSWORD", "ip:1/60")
+    assert client.post("/auth/forgot-password", json={"email": "a@describly.com"}).status_code == 200
+    assert client.post("/auth/forgot-password", json={"email": "b@describly.com"}).status_code == 429
+    # Other routes have their own limits.
+    assert client.post("/auth/login", data={"username": "a@describly.com", "password": "x"}).status_code == 400
+
+
+def test_rate_limit_disabled(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_FORGOT_PASSWORD", "ip:1/60")
+    for _ in range(3):
+        assert client.post("/auth/forgot-password", json={"email": "a@describly.com"}).status_code == 200
+
+
+@pytest.mark.parametrize("backend", [MemoryBackend, lambda: RedisBackend(fakeredis.FakeAsyncRedis())])
+def test_sliding_window(backend, monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_LOGIN", "account:2/0.2")
+    limiter = RateLimiter(backend())
+
+    async def scenario():
+        await limiter.check("login", {"account": "a"})
+        await limiter.check("login", {"account": "a"})
+        with pytest.raises(HTTPException) as rejected:
+            await limiter.check("login", {"account": "a"})
+        assert rejected.value.status_code == 429
+        await limiter.check("login", {"account": "b"})
+        await asyncio.sleep(0.25)
+        await limiter.check("login", {"account": "a"})
+        await limiter.reset()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_shared_by_workers(client, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_LOGIN", "account:1/60")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(rate_limiter, "backend", RedisBackend(fakeredis.FakeAsyncRedis(server=server)))
+    assert client.post("/auth/login", data={"username": user.email, "password": "x"}).status_code == 400
+
+    # Another worker with its own connection to the same Redis sees the hit.
+    monkeypatch.setattr(rate_limiter, "backend", RedisBackend(fakeredis.FakeAsyncRedis(server=server)))
+    assert client.post("/auth/login", data={"username": user.email, "password": "x"}).status_code == 429
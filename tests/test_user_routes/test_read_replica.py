@@ -0,0 +1,60 @@
+"""
+1. Read-only routes should read from the replica when one is configured.
+2. A client that wrote should be pinned to the primary for a while.
+3. A lagging replica should not be used.
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app.config.database import Base
+from app.config.replica import PIN_COOKIE, get_replica_sessionmaker, replica_lag
+from app.config.settings import get_settings
+from app.models.user_category import UserCategory
+
+
+@pytest.fixture
+def replica(client, test_session, tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/replica.db"
+    replica_engine = create_engine(url)
+    Base.metadata.create_all(bind=replica_engine)
+    with replica_engine.begin() as connection:
+        connection.execute(UserCategory.__table__.insert(), [{"name": "replica-only"}])
+    replica_engine.dispose()
+    test_session.add(UserCategory(name="primary-only"))
+    test_session.commit()
+
+    monkeypatch.setattr(get_settings(), "REPLICA_DATABASE_URI", url)
+    get_replica_sessionmaker.cache_clear()
+    replica_lag.reset()
+    yield client
+    get_replica_sessionmaker().kw["bind"].dispose()
+    get_replica_sessionmaker.cache_clear()
+    replica_lag.reset()
+
+
+def _names(response):
+    return [category["name"] for category in response.json()]
+
+
+def test_reads_go_to_replica(replica):
+    assert _names(replica.get("/categories")) == ["replica-only"]
+    assert replica.get("/categories/1").json()["name"] == "replica-only"
+
+
+def test_writes_pin_client_to_primary(replica):
+    response = replica.post("/categories", json={"name": "fresh"})
+    assert response.status_code == 201
+    assert PIN_COOKIE in response.cookies
+    assert _names(replica.get("/categories")) == ["primary-only", "fresh"]
+
+    replica.cookies.clear()
+    assert _names(replica.get("/categories")) == ["replica-only"]
+
+
+def test_lagging_replica_is_skipped(replica, monkeypatch):
+    async def _lagging(session):
+        return 60.0
+
+    monkeypatch.setattr(get_settings(), "REPLICA_MAX_LAG_SECONDS", 5)
+    monkeypatch.setattr(replica_lag, "_measure", _lagging)
+    assert _names(replica.get("/categories")) == ["primary-only"]
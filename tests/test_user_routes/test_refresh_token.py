@@ -26,4 +26,12 @@ def test_refresh_token_with_invalid_token(client, user, test_session):
     response = client.post("/auth/refresh", json={}, headers=header)
     assert response.status_code == 400
     assert 'access_token' not in response.json()
-    assert 'refresh_token' not in response.json()
\ No newline at end of file
+    assert 'refresh_token' not in response.json()
+
+def test_refresh_token_evicts_cached_access_token(client, user, test_session):
+    data = _generate_tokens(user, test_session)
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    assert client.get("/users/me", headers=headers).status_code == 200
+    response = client.post("/auth/refresh", json={}, headers={"refresh-token": data['refresh_token']})
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=headers).status_code == 401
@@ -5,7 +5,8 @@
 4. User can not reset password with any email and valid token
 """
 
-from app.config.security import hash_password
+from datetime import timedelta
+from app.config.security import generate_signed_token, hash_password
 from app.utils.email_context import FORGOT_PASSWORD
 
 
@@ -70,3 +71,18 @@ def test_reset_password_invalid_email(client, user):
     data['username'] = user.email
     login_resp = client.post("/auth/login", data=data)
     assert login_resp.status_code != 200
+
+
+def test_reset_password_with_signed_token(client, user):
+    data = {
+        "token": generate_signed_token(user, FORGOT_PASSWORD, timedelta(minutes=10)),
+        "email": user.email,
+        "password": NEW_PASSWORD
+    }
+    response = client.put("/auth/reset-password", json=data)
+    assert response.status_code == 200
+    login_resp = client.post("/auth/login", data={"username": user.email, "password": NEW_PASSWORD})
+    assert login_resp.status_code == 200
+    # The password change rotates the fingerprint, so the link is single use.
+    response = client.put("/auth/reset-password", json=data)
+    assert response.status_code == 400
@@ -0,0 +1,35 @@
+"""
+1. The database connection budget should be split across server workers.
+2. The launcher should start uvicorn with the production worker settings.
+"""
+from app import server
+from app.config.database import get_pool_limits
+from app.config.settings import get_settings
+
+
+def test_pool_limits_share_the_connection_budget(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 100)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 5)
+
+    assert get_pool_limits(1)["pool_size"] == 20
+    assert get_pool_limits(8)["pool_size"] + get_pool_limits(8)["max_overflow"] == 12
+    for workers in (1, 3, 8, 16, 40):
+        limits = get_pool_limits(workers)
+        assert workers * (limits["pool_size"] + limits["max_overflow"]) <= 100
+
+
+def test_launcher_runs_uvicorn_workers(monkeypatch):
+    calls = []
+    monkeypatch.setattr(server.uvicorn, "run", lambda app, **options: calls.append((app, options)))
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+
+    server.main(["--workers", "3", "--port", "9000"])
+
+    app, options = calls[0]
+    assert app == "app.main:app"
+    assert options["workers"] == 3
+    assert options["port"] == 9000
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+    assert options["timeout_graceful_shutdown"] == get_settings().SERVER_GRACEFUL_TIMEOUT
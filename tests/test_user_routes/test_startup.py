@@ -0,0 +1,33 @@
+"""
+1. Importing the app should not build the engine, the mail client or the password context.
+2. The lifespan should time its startup steps and warm the request path.
+"""
+import os
+import subprocess
+import sys
+
+from app.config.startup import startup_timings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_import_is_lazy():
+    code = ("import sys, app.main\n"
+            "from app.config.database import get_engine\n"
+            "from app.config.email import get_fastmail\n"
+            "from app.config.security import get_pwd_context\n"
+            "print(get_engine.cache_info().currsize, get_fastmail.cache_info().currsize,"
+            " get_pwd_context.cache_info().currsize)\n"
+            "print(*sorted(m for m in ('fastapi_mail', 'passlib', 'jinja2') if m in sys.modules))\n")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    built, loaded = output.stdout.splitlines()
+    assert built == "0 0 0"
+    assert loaded == ""
+
+
+def test_lifespan_records_startup_steps(client):
+    startup_timings.clear()
+    with client:
+        assert client.get("/").status_code == 200
+    assert {"database engine", "password context", "templates", "category registry"} <= set(startup_timings)
+    assert all(seconds >= 0 for seconds in startup_timings.values())
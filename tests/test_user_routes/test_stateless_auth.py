@@ -0,0 +1,51 @@
+"""
+1. With AUTH_STATELESS_READS on, /users/me should be served from the token claims
+2. A logged out token should be rejected in stateless mode
+3. A token rotated by /auth/refresh should be rejected in stateless mode
+4. Logout should revoke the token in the default mode too
+"""
+import pytest
+
+from app.config.settings import get_settings
+from app.models.user import UserToken
+from app.services.user import _generate_tokens
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(get_settings(), 'AUTH_STATELESS_READS', True)
+
+
+def _headers(data):
+    return {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def test_stateless_fetch_me_skips_token_lookup(client, user, test_session, stateless):
+    data = _generate_tokens(user, test_session)
+    test_session.query(UserToken).delete()
+    test_session.commit()
+    response = client.get("/users/me", headers=_headers(data))
+    assert response.status_code == 200
+    assert response.json()['email'] == user.email
+    assert response.json()['id'] == user.id
+
+
+def test_stateless_rejects_logged_out_token(client, user, test_session, stateless):
+    data = _generate_tokens(user, test_session)
+    assert client.post("/auth/logout", headers=_headers(data)).status_code == 200
+    assert client.get("/users/me", headers=_headers(data)).status_code == 401
+
+
+def test_stateless_rejects_rotated_token(client, user, test_session, stateless):
+    data = _generate_tokens(user, test_session)
+    response = client.post("/auth/refresh", json={}, headers={"refresh-token": data['refresh_token']})
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=_headers(data)).status_code == 401
+    assert client.get("/users/me", headers=_headers(response.json())).status_code == 200
+
+
+def test_logout_revokes_token(client, user, test_session):
+    data = _generate_tokens(user, test_session)
+    assert client.get("/users/me", headers=_headers(data)).status_code == 200
+    assert client.post("/auth/logout", headers=_headers(data)).status_code == 200
+    assert client.get("/users/me", headers=_headers(data)).status_code == 401
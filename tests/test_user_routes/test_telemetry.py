@@ -0,0 +1,118 @@
+"""
+1. NDJSON and binary batches should be validated per point and buffered.
+2. Invalid points should be rejected by position without failing the batch, one position per NDJSON line.
+3. Unsupported content types, truncated binary and oversized batches should be refused, the latter before decoding.
+4. A full buffer should answer 429 with Retry-After.
+5. Flushing should bulk insert the buffered points and keep them on failure.
+6. Track and summary periods may mix times with and without a UTC offset.
+"""
+import asyncio
+import time
+
+import numpy as np
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config.settings import get_settings
+from app.models.telemetry import TelemetryPoint
+from app.services.telemetry import telemetry_buffer, telemetry_store
+from app.utils import telemetry as codec
+from app.utils.telemetry import point_dtype
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+BINARY = {"Content-Type": "application/octet-stream"}
+
+
+def _ndjson(points) -> bytes:
+    return b"\n".join(orjson.dumps(point) for point in points)
+
+
+def _point(vehicle_id, **fields) -> dict:
+    return {"vehicle_id": vehicle_id, "ts": time.time() - 5, "lat": 48.85, "lon": 2.35, "speed": 42.0,
+            "odometer": 1200.5, **fields}
+
+
+def test_ingest_ndjson(auth_client, vehicles):
+    body = _ndjson([_point(vehicles[0].id), _point(vehicles[1].id, speed=None), _point(vehicles[0].id, lat=91),
+                    _point(9999), _point(vehicles[1].id, ts=time.time() + 3600)])
+    response = auth_client.post("/telemetry", content=body + b"\nnot json\n", headers=NDJSON)
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2, "rejected": 4, "rejected_rows": [2, 3, 4, 5]}
+    assert telemetry_buffer.stats()["buffered"] == 2
+
+
+def test_ingest_ndjson_line_of_values(auth_client, vehicles):
+    body = b"\n".join([orjson.dumps(_point(vehicles[0].id)), b"1,2", orjson.dumps(_point(vehicles[1].id))])
+    response = auth_client.post("/telemetry", content=body, headers=NDJSON)
+    assert response.json() == {"accepted": 2, "rejected": 1, "rejected_rows": [1]}
+
+
+def test_ingest_binary(auth_client, vehicles):
+    points = np.zeros(3, dtype=point_dtype())
+    points["vehicle_id"] = vehicles[0].id
+    points["ts"] = time.time() - np.array([30, 20, 10])
+    points["lat"], points["lon"] = 48.85, 2.35
+    points["speed"] = [50, np.nan, -1]
+    points["odometer"] = np.nan
+    response = auth_client.post("/telemetry", content=points.tobytes(), headers=BINARY)
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2, "rejected": 1, "rejected_rows": [2]}
+
+
+def test_ingest_refused(auth_client, client, vehicles, monkeypatch):
+    assert client.post("/telemetry", content=_ndjson([_point(vehicles[0].id)]), headers=NDJSON).status_code == 401
+    assert auth_client.post("/telemetry", json=[_point(vehicles[0].id)]).status_code == 415
+    assert auth_client.post("/telemetry", content=b"\0" * 41, headers=BINARY).status_code == 400
+
+    monkeypatch.setattr(get_settings(), "TELEMETRY_MAX_BATCH", 2)
+    body = _ndjson([_point(vehicles[0].id)] * 2)
+    assert auth_client.post("/telemetry", content=b"\n\n" + body + b"\n\n", headers=NDJSON).status_code == 202
+
+    def undecoded(body):
+        raise AssertionError("decoded an oversized batch")
+
+    monkeypatch.setattr(codec, "decode_ndjson", undecoded)
+    body = _ndjson([_point(vehicles[0].id)] * 3)
+    assert auth_client.post("/telemetry", content=body, headers=NDJSON).status_code == 413
+    points = np.zeros(3, dtype=point_dtype())
+    assert auth_client.post("/telemetry", content=points.tobytes(), headers=BINARY).status_code == 413
+
+
+def test_ingest_backpressure(auth_client, vehicles, monkeypatch):
+    monkeypatch.setattr(telemetry_buffer, "capacity", 3)
+    body = _ndjson([_point(vehicles[0].id)] * 2)
+    assert auth_client.post("/telemetry", content=body, headers=NDJSON).status_code == 202
+    response = auth_client.post("/telemetry", content=body, headers=NDJSON)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert telemetry_buffer.stats()["buffered"] == 2
+
+
+def test_flush(auth_client, vehicles, test_session, monkeypatch):
+    monkeypatch.setattr(get_settings(), "TELEMETRY_STORAGE", "database")
+    monkeypatch.setattr(telemetry_buffer, "flush_size", 2)
+    body = _ndjson([_point(vehicles[0].id, speed=None)] + [_point(vehicles[1].id)] * 2)
+    assert auth_client.post("/telemetry", content=body, headers=NDJSON).json()["accepted"] == 3
+
+    def broken_factory():
+        raise RuntimeError("database is down")
+
+    assert asyncio.run(telemetry_buffer.flush(broken_factory)) == 0
+    assert telemetry_buffer.stats()["buffered"] == 3
+
+    assert asyncio.run(telemetry_buffer.flush(sessionmaker(bind=test_session.get_bind()))) == 3
+    assert telemetry_buffer.stats()["buffered"] == 0
+    assert test_session.scalar(select(func.count()).select_from(TelemetryPoint)) == 3
+    first = test_session.scalars(select(TelemetryPoint).order_by(TelemetryPoint.id)).first()
+    assert first.vehicle_id == vehicles[0].id and first.speed is None and first.odometer == 1200.5
+
+
+def test_period_with_offset(admin_client, vehicles, tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry_store, "root", str(tmp_path))
+    period = {"start_at": "2030-11-05T01:00:00+01:00", "end_at": "2030-11-05T02:00:00"}
+    response = admin_client.get(f"/telemetry/{vehicles[0].id}/track", params=period)
+    assert response.status_code == 200 and response.json()["count"] == 0
+    assert admin_client.get("/telemetry/summary", params=period).json()["keys"] == []
+    reversed_period = {"start_at": "2030-11-05T02:00:00Z", "end_at": "2030-11-05T02:00:00"}
+    assert admin_client.get("/telemetry/summary", params=reversed_period).status_code == 400
@@ -0,0 +1,116 @@
+"""
+1. Appended points should be partitioned per vehicle and day and read back by time range.
+2. Late batches should mark a segment unsorted without breaking range reads.
+3. Compaction should downsample the old days only, and reads should switch to them.
+4. Replays should interpolate at a steady step and skip the gaps.
+5. The track and replay endpoints should serve flushed points to admins, for periods given with or without an offset.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.vehicle import Vehicle
+from app.services.telemetry import compact_telemetry_store, telemetry_buffer, telemetry_store
+from app.utils.telemetry import point_dtype
+from app.utils.telemetry_store import DAY, UNSORTED, day_name, resample
+
+# 2030-11-05 00:00 UTC
+MIDNIGHT = 1920067200.0
+
+
+def _points(vehicle_id, ts, speed=50.0):
+    points = np.zeros(len(ts), dtype=point_dtype())
+    points["vehicle_id"] = vehicle_id
+    points["ts"] = ts
+    points["lat"] = 48.85 + np.arange(len(ts)) * 1e-3
+    points["lon"] = 2.35
+    points["speed"] = speed
+    points["odometer"] = np.arange(len(ts), dtype=float)
+    return points
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry_store, "root", str(tmp_path))
+    return telemetry_store
+
+
+def test_append_and_read(store):
+    store.append(np.concatenate([_points(2, MIDNIGHT + np.arange(0, 200, 10)),
+                                 _points(1, MIDNIGHT - 30 + np.arange(0, 60, 10))]))
+    assert sorted(os.listdir(os.path.join(store.root, "1"))) == [day_name(int(MIDNIGHT // DAY) - 1),
+                                                                  day_name(int(MIDNIGHT // DAY))]
+
+    track = store.track(2, MIDNIGHT + 50, MIDNIGHT + 100)
+    assert track["ts"].tolist() == [MIDNIGHT + 50, MIDNIGHT + 60, MIDNIGHT + 70, MIDNIGHT + 80, MIDNIGHT + 90]
+    assert not track["ts"].flags.owndata
+    assert store.track(1, MIDNIGHT - 60, MIDNIGHT + 60)["ts"].tolist() == (MIDNIGHT - 30 + np.arange(0, 60, 10)).tolist()
+    assert len(store.track(3, MIDNIGHT, MIDNIGHT + DAY)["ts"]) == 0
+
+
+def test_late_batch(store):
+    store.append(_points(1, MIDNIGHT + np.array([100.0, 200.0])))
+    store.append(_points(1, MIDNIGHT + np.array([150.0, 300.0])))
+    segment = os.path.join(store.root, "1", day_name(int(MIDNIGHT // DAY)))
+    assert os.path.exists(os.path.join(segment, UNSORTED))
+    assert store.track(1, MIDNIGHT + 120, MIDNIGHT + 400)["ts"].tolist() == [MIDNIGHT + 150, MIDNIGHT + 200,
+                                                                             MIDNIGHT + 300]
+
+
+def test_compaction(store):
+    old = MIDNIGHT - 10 * DAY
+    speed = np.where(np.arange(12) == 1, np.nan, 60.0)
+    store.append(_points(1, np.r_[old + np.arange(0, 120, 10), MIDNIGHT + np.arange(0, 120, 10)],
+                         speed=np.r_[speed, speed]))
+
+    assert compact_telemetry_store(now=MIDNIGHT + 3600) == 1
+    assert compact_telemetry_store(now=MIDNIGHT + 3600) == 0
+    names = sorted(os.listdir(os.path.join(store.root, "1")))
+    assert names == [f"{day_name(int(old // DAY))}.60s", day_name(int(MIDNIGHT // DAY))]
+
+    history = store.track(1, old, old + DAY)
+    assert history["ts"].tolist() == [old + 50, old + 110]
+    assert history["odometer"].tolist() == [5, 11]
+    assert history["speed"].tolist() == [60, 60]
+    assert len(store.track(1, MIDNIGHT, MIDNIGHT + DAY)["ts"]) == 12
+
+
+def test_resample():
+    track = {"ts": np.array([0.0, 10, 20, 1000, 1010]), "lat": np.array([0.0, 1, 2, 3, 4]),
+             "lon": np.zeros(5), "speed": np.full(5, 30.0)}
+    replay = resample(track, step=5, max_gap=300)
+    assert replay["ts"].tolist() == [0, 5, 10, 15, 20, 1000, 1005, 1010]
+    assert replay["lat"].tolist() == [0, 0.5, 1, 1.5, 2, 3, 3.5, 4]
+
+
+def test_track_endpoints(admin_client, auth_client, test_session, store):
+    vehicle = Vehicle(name="Toyota Camry", plate_number="ABC-123")
+    test_session.add(vehicle)
+    test_session.commit()
+    telemetry_buffer.offer(_points(vehicle.id, MIDNIGHT + np.arange(0, 60, 20)))
+    assert asyncio.run(telemetry_buffer.flush()) == 3
+
+    start = datetime(2030, 11, 5)
+    params = {"start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat()}
+    response = admin_client.get(f"/telemetry/{vehicle.id}/track", params=params)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3 and body["ts"] == [MIDNIGHT, MIDNIGHT + 20, MIDNIGHT + 40]
+    assert body["odometer"] == [0, 1, 2] and body["speed"] == [50, 50, 50]
+
+    replay = admin_client.get(f"/telemetry/{vehicle.id}/replay", params={**params, "step": 10}).json()
+    assert replay["ts"] == [MIDNIGHT + offset for offset in (0, 10, 20, 30, 40)]
+    offset = {"start_at": "2030-11-05T01:00:00+01:00", "end_at": params["end_at"], "step": 10}
+    assert admin_client.get(f"/telemetry/{vehicle.id}/replay", params=offset).json()["ts"] == replay["ts"]
+
+    too_long = {**params, "end_at": (start + timedelta(days=60)).isoformat()}
+    assert admin_client.get(f"/telemetry/{vehicle.id}/track", params=too_long).status_code == 400
+    assert admin_client.get("/telemetry/9999/track", params=params).status_code == 404
+
+
+def test_track_requires_admin(auth_client, store):
+    params = {"start_at": "2030-11-05T00:00:00", "end_at": "2030-11-05T01:00:00"}
+    assert auth_client.get("/telemetry/1/track", params=params).status_code == 403
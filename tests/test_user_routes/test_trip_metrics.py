@@ -0,0 +1,128 @@
+"""
+1. Distances and speed-profile ETAs should be computed over whole arrays.
+2. The route cache should compute each distinct origin-destination pair once.
+3. Requests with coordinates should get a trip estimate, others none.
+4. Admins should get trip totals per day and per vehicle, and driven distance from telemetry.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.vehicle import APPROVED, COMPLETED, PENDING, VehicleRequest
+from app.services.telemetry import telemetry_store
+from app.utils.routing import RouteCache, eta_seconds, haversine, parse_speed_profile, path_length
+from app.utils.telemetry import point_dtype
+
+START = datetime(2030, 11, 5, 9, 0)
+PARIS = (48.8566, 2.3522)
+LONDON = (51.5074, -0.1278)
+LYON = (45.7640, 4.8357)
+
+
+def _trip(user, vehicle, start, origin=None, destination=None, status=APPROVED):
+    coordinates = {}
+    if origin:
+        coordinates = {"from_latitude": origin[0], "from_longitude": origin[1],
+                       "to_latitude": destination[0], "to_longitude": destination[1]}
+    return VehicleRequest(requester_id=user.id, vehicle_id=vehicle.id, from_location="Office", to_location="Client",
+                          start_at=start, end_at=start + timedelta(hours=2), motif="Visit", status=status,
+                          **coordinates)
+
+
+def test_distances_and_eta():
+    distance = haversine([PARIS[0], PARIS[0]], [PARIS[1], PARIS[1]], [LONDON[0], PARIS[0]], [LONDON[1], PARIS[1]])
+    assert distance[0] == pytest.approx(343.5, abs=1) and distance[1] == 0
+    assert path_length(np.array([PARIS[0], LYON[0], PARIS[0]]), np.array([PARIS[1], LYON[1], PARIS[1]])) == \
+        pytest.approx(2 * haversine(*PARIS, *LYON))
+
+    bounds, speeds = parse_speed_profile("5:30,50:60,:90")
+    hours = eta_seconds([0, 5, 100], bounds, speeds) / 3600
+    assert hours.tolist() == pytest.approx([0, 5 / 30, 5 / 30 + 45 / 60 + 50 / 90])
+    with pytest.raises(ValueError):
+        parse_speed_profile("50:60,5:30")
+
+
+def test_route_cache():
+    cache = RouteCache(maxsize=2, detour=1.0, speed_profile=":60")
+    distance, duration = cache.estimate([PARIS[0], np.nan], [PARIS[1], 0], [LYON[0], 0], [LYON[1], 0])
+    assert distance[0] == pytest.approx(haversine(*PARIS, *LYON))
+    assert duration[0] == pytest.approx(distance[0] / 60 * 3600)
+    assert np.isnan(distance[1]) and np.isnan(duration[1])
+
+    assert cache.trip(*PARIS, *LYON) == pytest.approx((distance[0], duration[0]), rel=1e-4)
+    assert cache.trip(PARIS[0] + 1e-6, PARIS[1], *LYON) == cache.trip(*PARIS, *LYON)
+    assert cache.trip(None, PARIS[1], *LYON) == (None, None)
+    cache.trip(*LYON, *PARIS)
+    cache.trip(*PARIS, *LONDON)
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 3}
+
+
+def test_trip_estimate(auth_client, user, vehicles, test_session):
+    located, unlocated = _trip(user, vehicles[0], START, PARIS, LYON), _trip(user, vehicles[0], START)
+    test_session.add_all([located, unlocated])
+    test_session.commit()
+
+    estimate = auth_client.get(f"/vehicle-requests/{located.id}/trip").json()
+    assert estimate["distance_km"] == pytest.approx(haversine(*PARIS, *LYON) * 1.3, abs=0.01)
+    assert estimate["duration_minutes"] > 60
+    assert auth_client.get(f"/vehicle-requests/{unlocated.id}/trip").json() == \
+        {"request_id": unlocated.id, "distance_km": None, "duration_minutes": None}
+
+
+def test_request_coordinates_are_validated(auth_client):
+    request = {"from_location": "Office", "to_location": "Client", "start_at": START.isoformat(),
+               "end_at": (START + timedelta(hours=1)).isoformat(), "motif": "Visit", "from_latitude": PARIS[0]}
+    assert auth_client.post("/vehicle-requests", json=request).status_code == 422
+    request.update(from_longitude=PARIS[1], to_latitude=LYON[0], to_longitude=LYON[1])
+    response = auth_client.post("/vehicle-requests", json=request)
+    assert response.status_code == 201 and response.json()["to_latitude"] == LYON[0]
+
+
+def test_trip_summary(admin_client, user, vehicles, test_session):
+    test_session.add_all([_trip(user, vehicles[0], START, PARIS, LYON),
+                          _trip(user, vehicles[1], START + timedelta(hours=3), PARIS, LYON, status=COMPLETED),
+                          _trip(user, vehicles[0], START + timedelta(days=1), LYON, PARIS),
+                          _trip(user, vehicles[1], START + timedelta(days=1)),
+                          _trip(user, vehicles[0], START, PARIS, LONDON, status=PENDING)])
+    test_session.commit()
+    period = {"start_from": START.date().isoformat(), "start_until": (START + timedelta(days=7)).isoformat()}
+    leg = haversine(*PARIS, *LYON) * 1.3
+
+    by_day = admin_client.get("/vehicle-requests/summary", params=period)
+    assert by_day.status_code == 200
+    body = by_day.json()
+    assert body["keys"] == ["2030-11-05", "2030-11-06"]
+    assert body["requests"] == [2, 2] and body["located"] == [2, 1]
+    assert body["distance_km"] == pytest.approx([2 * leg, leg], abs=0.01)
+
+    by_vehicle = admin_client.get("/vehicle-requests/summary", params={**period, "group_by": "vehicle"}).json()
+    assert by_vehicle["keys"] == [vehicles[0].id, vehicles[1].id]
+    assert by_vehicle["distance_km"] == pytest.approx([2 * leg, leg], abs=0.01)
+
+    pending = admin_client.get("/vehicle-requests/summary", params={**period, "status": "pending"}).json()
+    assert pending["requests"] == [1]
+
+
+def test_summaries_require_admin(auth_client):
+    period = {"start_from": START.isoformat(), "start_until": (START + timedelta(days=1)).isoformat()}
+    assert auth_client.get("/vehicle-requests/summary", params=period).status_code == 403
+
+
+def test_driven_summary(admin_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry_store, "root", str(tmp_path))
+    midnight = (START.replace(hour=0) - datetime(1970, 1, 1)).total_seconds()
+    points = np.zeros(6, dtype=point_dtype())
+    points["vehicle_id"] = [1, 1, 1, 2, 2, 1]
+    points["ts"] = midnight + np.array([0, 60, 120, 0, 60, 86400])
+    points["lat"] = [PARIS[0], LYON[0], PARIS[0], PARIS[0], PARIS[0], LYON[0]]
+    points["lon"] = [PARIS[1], LYON[1], PARIS[1], PARIS[1], PARIS[1], LYON[1]]
+    telemetry_store.append(points)
+
+    period = {"start_at": START.date().isoformat(), "end_at": (START + timedelta(days=2)).isoformat()}
+    by_day = admin_client.get("/telemetry/summary", params=period).json()
+    assert by_day["keys"] == ["2030-11-05", "2030-11-06"]
+    assert by_day["distance_km"] == pytest.approx([2 * haversine(*PARIS, *LYON), 0], abs=0.01)
+    assert by_day["points"] == [5, 1]
+    by_vehicle = admin_client.get("/telemetry/summary", params={**period, "group_by": "vehicle"}).json()
+    assert by_vehicle["keys"] == [1, 2] and by_vehicle["points"] == [4, 2]
@@ -0,0 +1,74 @@
+"""
+1. Admins should be able to bulk import users from CSV and NDJSON.
+2. Existing emails, repeated emails (whatever their case) and invalid rows should be reported per row.
+3. Imported users should get a verification email.
+4. Unsupported content types should be rejected.
+"""
+import json
+
+from sqlalchemy import func, select
+
+from app.config.settings import get_settings
+from app.models.email_outbox import EmailOutbox
+from app.models.user import User
+from app.models.user_category import UserCategory
+
+
+def _report(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_import_csv(admin_client, user, test_session, monkeypatch):
+    monkeypatch.setattr(get_settings(), "USER_IMPORT_CHUNK_SIZE", 2)
+    test_session.add(UserCategory(name="driver"))
+    test_session.commit()
+    body = "\n".join([
+        "name,email,matricule,telephone,category",
+        "Jane Driver,jane@describly.com,M-1,0700000001,driver",
+        f"Existing User,{user.email},,,",
+        "John Staff,john@describly.com,,,",
+        "Jane Again,jane@describly.com,,,",
+        "Bad Email,not-an-email,,,",
+        "Ghost,ghost@describly.com,,,unknown",
+    ])
+    response = admin_client.post("/admin/users/import", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    lines = _report(response)
+    assert [line.get("status") for line in lines[:-1]] == \
+        ["created", "duplicate", "created", "duplicate", "invalid", "invalid"]
+    assert lines[-1] == {"summary": {"created": 2, "duplicate": 2, "invalid": 2}}
+
+    jane = test_session.scalar(select(User).where(User.email == "jane@describly.com"))
+    assert jane.id == lines[0]["id"]
+    assert (jane.first_name, jane.last_name, jane.matricule) == ("Jane", "Driver", "M-1")
+    assert jane.category.name == "driver"
+    assert not jane.is_active
+    assert jane.password.startswith("$2")
+    assert test_session.scalar(select(func.count()).select_from(EmailOutbox)) == 2
+
+
+def test_import_ndjson(admin_client, test_session):
+    body = "\n".join([
+        json.dumps({"name": "Nd Json", "email": "nd@describly.com"}),
+        "not json",
+        json.dumps(["not", "an", "object"]),
+    ])
+    response = admin_client.post("/admin/users/import", content=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+    lines = _report(response)
+    assert [line.get("status") for line in lines[:-1]] == ["created", "invalid", "invalid"]
+    assert test_session.scalar(select(User).where(User.email == "nd@describly.com")) is not None
+
+
+def test_import_case_variants(admin_client, test_session):
+    body = "\n".join(json.dumps({"name": "Case Variant", "email": email})
+                     for email in ("Case@describly.com", "case@describly.com", "CASE@describly.com"))
+    response = admin_client.post("/admin/users/import", content=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+    assert [line.get("status") for line in _report(response)[:-1]] == ["created", "duplicate", "duplicate"]
+    assert test_session.scalar(select(func.count()).select_from(User)) == 2
+
+
+def test_import_unsupported_type(admin_client):
+    response = admin_client.post("/admin/users/import", content="{}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 415
@@ -6,6 +6,8 @@
 .....
 """
 
+from app.config.hashing import hashing_stats
+from app.config.settings import get_settings
 from tests.conftest import USER_PASSWORD
 
 
@@ -36,4 +38,17 @@ def test_user_login_inactive_account(client, inactive_user):
 
 def test_user_login_unverified(client, unverified_user):
     response = client.post('/auth/login', data={'username': unverified_user.email, 'password': USER_PASSWORD})
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+def test_user_login_hashes_off_the_event_loop(client, user):
+    completed = hashing_stats()['completed']
+    response = client.post('/auth/login', data={'username': user.email, 'password': USER_PASSWORD})
+    assert response.status_code == 200
+    assert hashing_stats()['completed'] == completed + 1
+
+
+def test_user_login_rejected_when_hashing_queue_is_full(client, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'HASH_POOL_MAX_PENDING', 0)
+    response = client.post('/auth/login', data={'username': user.email, 'password': USER_PASSWORD})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,46 @@
+"""
+1. Logins beyond MAX_SESSIONS_PER_USER should expire the oldest sessions
+2. The reaper should delete expired and rotated tokens past the retention window in batches
+3. The reaper should keep live tokens and recently expired ones
+"""
+from datetime import datetime, timedelta
+
+from app.config.settings import get_settings
+from app.models.user import UserToken
+from app.services.user import _generate_tokens
+from app.services.user_token import purge_expired_tokens
+
+
+def _live_tokens(test_session, user):
+    return test_session.query(UserToken).filter(UserToken.user_id == user.id,
+                                                UserToken.expires_at > datetime.utcnow()).count()
+
+
+def test_session_cap_expires_oldest_tokens(client, user, test_session, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'MAX_SESSIONS_PER_USER', 2)
+    first = _generate_tokens(user, test_session)
+    _generate_tokens(user, test_session)
+    _generate_tokens(user, test_session)
+    assert _live_tokens(test_session, user) == 2
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {first['access_token']}"})
+    assert response.status_code == 401
+
+
+def test_reaper_purges_expired_tokens_in_batches(client, user, test_session):
+    for _ in range(5):
+        _generate_tokens(user, test_session)
+    test_session.query(UserToken).update({UserToken.expires_at: datetime.utcnow() - timedelta(hours=2)})
+    test_session.commit()
+    _generate_tokens(user, test_session)
+
+    deleted = purge_expired_tokens(test_session, retention=timedelta(hours=1), batch_size=2)
+    assert deleted == 5
+    assert test_session.query(UserToken).count() == 1
+
+
+def test_reaper_keeps_tokens_inside_retention(client, user, test_session):
+    _generate_tokens(user, test_session)
+    test_session.query(UserToken).update({UserToken.expires_at: datetime.utcnow() - timedelta(minutes=5)})
+    test_session.commit()
+    assert purge_expired_tokens(test_session, retention=timedelta(hours=1), batch_size=100) == 0
+    assert test_session.query(UserToken).count() == 1
@@ -5,7 +5,9 @@
 4 - Test activation is not allowining invalid email
 """
 import time
-from app.config.security import hash_password
+from datetime import timedelta
+from app.config.security import generate_signed_token, hash_password
+from app.config.settings import get_settings
 from app.models.user import User
 from app.utils.email_context import USER_VERIFY_ACCOUNT
 
@@ -64,4 +66,26 @@ def test_user_invalid_email_does_not_work(client, inactive_user, test_session):
     assert activated_user.is_active is False
     assert activated_user.verified_at is None
 
-    
\ No newline at end of file
+    
+
+def test_user_account_verification_with_signed_token(client, inactive_user, test_session):
+    token = generate_signed_token(inactive_user, USER_VERIFY_ACCOUNT, timedelta(minutes=10))
+    response = client.post('/users/verify', json={"email": inactive_user.email, "token": token})
+    assert response.status_code == 200
+    activated_user = test_session.query(User).filter(User.email == inactive_user.email).first()
+    assert activated_user.is_active is True
+
+
+def test_user_expired_signed_token_does_not_work(client, inactive_user, test_session):
+    token = generate_signed_token(inactive_user, USER_VERIFY_ACCOUNT, timedelta(minutes=-1))
+    response = client.post('/users/verify', json={"email": inactive_user.email, "token": token})
+    assert response.status_code != 200
+    activated_user = test_session.query(User).filter(User.email == inactive_user.email).first()
+    assert activated_user.is_active is False
+
+
+def test_user_legacy_token_rejected_after_transition(client, inactive_user, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'ACCEPT_LEGACY_EMAIL_TOKENS', False)
+    token = hash_password(inactive_user.get_context_string(USER_VERIFY_ACCOUNT))
+    response = client.post('/users/verify', json={"email": inactive_user.email, "token": token})
+    assert response.status_code != 200
@@ -0,0 +1,115 @@
+"""
+1. The availability index should find overlapping bookings and allow back-to-back ones.
+2. Approving, cancelling and completing requests should be written through to the index.
+3. Availability queries should not read vehicle_requests once the index is warm.
+4. A stale index should be reloaded from the approved requests.
+5. Times with a UTC offset should be converted to naive UTC, in requests and availability queries.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.vehicle import APPROVED, VehicleRequest
+from app.services.vehicle import availability_index, load_availability_index
+from app.utils.intervals import AvailabilityIndex
+from tests.conftest import captured_statements
+
+START = datetime(2030, 11, 5, 9, 0)
+
+
+def hours(first: float, last: float):
+    return START + timedelta(hours=first), START + timedelta(hours=last)
+
+
+def _period(first: float, last: float) -> dict:
+    start, end = hours(first, last)
+    return {"start_at": start.isoformat(), "end_at": end.isoformat()}
+
+
+def test_index_conflicts():
+    index = AvailabilityIndex(ttl=60)
+    assert index.add(1, 7, *hours(2, 4))
+    assert index.add(2, 7, *hours(6, 8))
+    assert index.add(3, 7, *hours(4, 6))
+    assert not index.add(4, 7, *hours(3, 5))
+
+    assert index.conflict(7, *hours(0, 2)) is None
+    assert index.conflict(7, *hours(1, 3)) == 1
+    assert index.conflict(7, *hours(5, 9)) == 2
+    assert index.conflict(7, *hours(8, 9)) is None
+    assert index.free_vehicles([7, 8], *hours(3, 4)) == [8]
+
+    index.discard(3)
+    assert index.is_free(7, *hours(4, 6))
+    assert index.add(4, 7, *hours(4, 5))
+
+
+def test_replace_drops_overlapping_bookings():
+    index = AvailabilityIndex(ttl=60)
+    index.replace([(1, 7, *hours(0, 3)), (2, 7, *hours(2, 4)), (3, 8, *hours(2, 4))])
+    assert not index.is_stale()
+    assert index.conflict(7, *hours(3, 4)) is None
+    assert index.conflict(8, *hours(3, 4)) == 3
+
+
+def test_index_follows_request_lifecycle(admin_client, vehicles):
+    vehicle_id = vehicles[0].id
+    created = admin_client.post("/vehicle-requests", json={"vehicle_id": vehicle_id, "from_location": "Office",
+                                                           "to_location": "Airport", "motif": "Pick up",
+                                                           **_period(1, 3)}).json()
+    admin_client.post(f"/vehicle-requests/{created['id']}/approve")
+
+    response = admin_client.get(f"/vehicles/{vehicle_id}/availability", params=_period(2, 5))
+    assert response.json() == {"vehicle_id": vehicle_id, "available": False, "conflicting_request_id": created["id"]}
+    available = admin_client.get("/vehicles/available", params=_period(2, 5)).json()
+    assert [vehicle["id"] for vehicle in available] == [vehicles[1].id]
+    assert admin_client.get(f"/vehicles/{vehicle_id}/availability", params=_period(3, 5)).json()["available"]
+
+    admin_client.post(f"/vehicle-requests/{created['id']}/cancel")
+    assert admin_client.get(f"/vehicles/{vehicle_id}/availability", params=_period(2, 5)).json()["available"]
+    assert admin_client.get("/vehicles/available", params=_period(5, 2)).status_code == 400
+
+
+def test_warm_index_skips_request_table(admin_client, vehicles, test_session):
+    load_availability_index(sessionmaker(bind=test_session.get_bind()))
+    with captured_statements(test_session.get_bind()) as statements:
+        assert admin_client.get("/vehicles/available", params=_period(0, 1)).status_code == 200
+        assert admin_client.get(f"/vehicles/{vehicles[0].id}/availability", params=_period(0, 1)).status_code == 200
+    assert statements
+    assert not any("vehicle_requests" in statement for statement in statements)
+
+
+def test_stale_index_is_reloaded(admin_client, user, vehicles, test_session):
+    load_availability_index(sessionmaker(bind=test_session.get_bind()))
+    booking = VehicleRequest(requester_id=user.id, vehicle_id=vehicles[0].id, from_location="Office",
+                             to_location="Site", motif="Inspection", status=APPROVED,
+                             start_at=START, end_at=START + timedelta(hours=2))
+    test_session.add(booking)
+    test_session.commit()
+    # Approved on another worker: invisible until the index goes stale.
+    assert admin_client.get(f"/vehicles/{vehicles[0].id}/availability", params=_period(0, 1)).json()["available"]
+    availability_index.ttl = 0
+    try:
+        response = admin_client.get(f"/vehicles/{vehicles[0].id}/availability", params=_period(0, 1))
+    finally:
+        availability_index.ttl = 60
+    assert response.json()["conflicting_request_id"] == booking.id
+
+
+def test_offset_times_are_naive_utc(admin_client, vehicles):
+    vehicle_id = vehicles[0].id
+    created = admin_client.post("/vehicle-requests", json={"vehicle_id": vehicle_id, "from_location": "Office",
+                                                           "to_location": "Airport", "motif": "Pick up",
+                                                           "start_at": "2030-11-05T10:00:00+01:00",
+                                                           "end_at": "2030-11-05T11:00:00Z"})
+    assert created.status_code == 201
+    assert created.json()["start_at"].startswith("2030-11-05T09:00:00")
+    admin_client.post(f"/vehicle-requests/{created.json()['id']}/approve")
+
+    response = admin_client.get(f"/vehicles/{vehicle_id}/availability",
+                                params={"start_at": "2030-11-05T08:00:00Z", "end_at": "2030-11-05T09:30:00Z"})
+    assert response.status_code == 200
+    assert response.json()["conflicting_request_id"] == created.json()["id"]
+    available = admin_client.get("/vehicles/available",
+                                 params={"start_at": "2030-11-05T12:00:00+02:00", "end_at": "2030-11-05T10:30:00Z"})
+    assert [vehicle["id"] for vehicle in available.json()] == [vehicles[1].id]
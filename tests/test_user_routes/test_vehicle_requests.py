@@ -0,0 +1,139 @@
+"""
+1. Users should be able to request a vehicle and list their own requests, newest first.
+2. Admins should be able to list pending requests by date and a vehicle's requests, page by page.
+3. Approving should refuse a vehicle already booked for an overlapping period.
+4. Requests should only move through the allowed status transitions.
+5. Non-admins should not be able to review requests or see other users' requests.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect
+
+from app.models.user import User
+from app.models.vehicle import VehicleRequest
+from tests.conftest import engine
+
+START = datetime(2030, 11, 5, 9, 0)
+
+
+def _request(vehicle_id=None, start=START, hours=3, **fields):
+    return {"vehicle_id": vehicle_id, "from_location": "Office", "to_location": "Client Meeting",
+            "start_at": start.isoformat(), "end_at": (start + timedelta(hours=hours)).isoformat(),
+            "motif": "Client presentation", **fields}
+
+
+def _other_user_request(test_session, vehicle, start=START, hours=3):
+    other = User(first_name="Sarah", email="sarah@describly.com", is_active=True)
+    test_session.add(other)
+    test_session.flush()
+    model = VehicleRequest(requester_id=other.id, vehicle_id=vehicle.id, from_location="Warehouse",
+                           to_location="Delivery Point", start_at=start, end_at=start + timedelta(hours=hours),
+                           motif="Delivery")
+    test_session.add(model)
+    test_session.commit()
+    return model
+
+
+def test_hot_queries_have_composite_indexes(app_test):
+    indexes = {tuple(index["column_names"]) for index in inspect(engine).get_indexes("vehicle_requests")}
+    assert {("requester_id", "created_at", "id"), ("status", "start_at", "id"),
+            ("vehicle_id", "start_at", "id")} <= indexes
+
+
+def test_create_request(auth_client, vehicles):
+    response = auth_client.post("/vehicle-requests", json=_request(vehicles[0].id, roadmap="Office -> Client"))
+    assert response.status_code == 201
+    assert response.json()["status"] == "pending"
+    assert response.json()["vehicle_id"] == vehicles[0].id
+    assert response.json()["roadmap"] == "Office -> Client"
+
+
+def test_list_my_requests(auth_client, user, vehicles, test_session):
+    # Explicit created_at, as SQLite's CURRENT_TIMESTAMP has one-second resolution.
+    now = datetime.utcnow()
+    test_session.add_all(VehicleRequest(requester_id=user.id, from_location="Office", to_location="Airport",
+                                        start_at=START, end_at=START + timedelta(hours=1), motif="Pick up",
+                                        created_at=now + timedelta(seconds=i)) for i in range(3))
+    test_session.commit()
+    _other_user_request(test_session, vehicles[1])
+
+    first = auth_client.get("/vehicle-requests/mine", params={"limit": 2})
+    assert first.status_code == 200
+    second = auth_client.get("/vehicle-requests/mine", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert "x-next-cursor" not in second.headers
+    ids = [item["id"] for item in first.json() + second.json()]
+    assert ids == sorted(ids, reverse=True) and len(ids) == 3
+
+
+def test_request_period_is_validated(auth_client):
+    response = auth_client.post("/vehicle-requests", json=_request(hours=-1))
+    assert response.status_code == 422
+
+
+def test_pending_requests_by_date(admin_client, vehicles, test_session):
+    for day in (3, 1, 2):
+        admin_client.post("/vehicle-requests", json=_request(vehicles[0].id, start=START + timedelta(days=day)))
+    first = admin_client.get("/vehicle-requests", params={"limit": 2})
+    assert first.status_code == 200
+    second = admin_client.get("/vehicle-requests", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    starts = [item["start_at"] for item in first.json() + second.json()]
+    assert starts == sorted(starts) and len(starts) == 3
+
+    window = admin_client.get("/vehicle-requests", params={"start_from": (START + timedelta(days=2)).isoformat()})
+    assert len(window.json()) == 2
+    assert admin_client.get("/vehicle-requests", params={"status": "approved"}).json() == []
+    assert len(admin_client.get(f"/vehicles/{vehicles[0].id}/requests").json()) == 3
+    assert admin_client.get(f"/vehicles/{vehicles[1].id}/requests").json() == []
+
+
+def test_approve_refuses_overlapping_booking(admin_client, vehicles, test_session):
+    booked = _other_user_request(test_session, vehicles[0])
+    assert admin_client.post(f"/vehicle-requests/{booked.id}/approve").status_code == 200
+
+    overlapping = admin_client.post("/vehicle-requests", json=_request(vehicles[0].id, start=START + timedelta(hours=2)))
+    response = admin_client.post(f"/vehicle-requests/{overlapping.json()['id']}/approve")
+    assert response.status_code == 409
+
+    # Assigning a free vehicle instead succeeds, as does a back-to-back trip on the first one.
+    response = admin_client.post(f"/vehicle-requests/{overlapping.json()['id']}/approve",
+                                 json={"vehicle_id": vehicles[1].id})
+    assert response.status_code == 200
+    assert response.json()["vehicle_id"] == vehicles[1].id
+    assert response.json()["reviewed_by_id"] is not None
+    adjacent = admin_client.post("/vehicle-requests", json=_request(vehicles[0].id, start=START + timedelta(hours=3)))
+    assert admin_client.post(f"/vehicle-requests/{adjacent.json()['id']}/approve").status_code == 200
+
+
+def test_status_transitions(admin_client, vehicles):
+    created = admin_client.post("/vehicle-requests", json=_request()).json()
+    assert admin_client.post(f"/vehicle-requests/{created['id']}/approve").status_code == 400
+    assert admin_client.post(f"/vehicle-requests/{created['id']}/complete").status_code == 409
+    assert admin_client.post(f"/vehicle-requests/{created['id']}/deny").json()["status"] == "denied"
+    assert admin_client.post(f"/vehicle-requests/{created['id']}/cancel").status_code == 409
+
+    created = admin_client.post("/vehicle-requests", json=_request(vehicles[0].id)).json()
+    admin_client.post(f"/vehicle-requests/{created['id']}/approve")
+    assert admin_client.post(f"/vehicle-requests/{created['id']}/complete").json()["status"] == "completed"
+
+
+def test_non_admins_cannot_review(auth_client, vehicles, test_session):
+    other = _other_user_request(test_session, vehicles[0])
+    assert auth_client.post(f"/vehicle-requests/{other.id}/approve").status_code == 403
+    assert auth_client.get("/vehicle-requests").status_code == 403
+    assert auth_client.post("/vehicles", json={"name": "Honda Civic", "plate_number": "DEF-456"}).status_code == 403
+    assert auth_client.get(f"/vehicle-requests/{other.id}").status_code == 404
+    assert auth_client.post(f"/vehicle-requests/{other.id}/cancel").status_code == 404
+
+    own = auth_client.post("/vehicle-requests", json=_request(vehicles[0].id)).json()
+    assert auth_client.get(f"/vehicle-requests/{own['id']}").status_code == 200
+    assert auth_client.post(f"/vehicle-requests/{own['id']}/cancel").json()["status"] == "cancelled"
+
+
+def test_admin_manages_vehicles(admin_client):
+    response = admin_client.post("/vehicles", json={"name": "Honda Civic", "plate_number": "DEF-456", "seats": 4})
+    assert response.status_code == 201
+    assert admin_client.post("/vehicles", json={"name": "Copy", "plate_number": "DEF-456"}).status_code == 400
+    vehicle_id = response.json()["id"]
+    assert admin_client.patch(f"/vehicles/{vehicle_id}", json={"is_active": False}).json()["is_active"] is False
+    assert admin_client.get("/vehicles", params={"active": True}).json() == []
+    assert admin_client.post("/vehicle-requests", json=_request(vehicle_id)).status_code == 400